@@ -0,0 +1,323 @@
+import hashlib
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+from src.database.metadata_filter import matches
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def hashed_embedding(text: str, dimension: int = 1536) -> List[float]:
+    """Bag-of-words hashing embedding: texts sharing words get similar vectors"""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for word in WORD.findall(text.lower()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimension
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector.tolist()
+
+
+class _Latency:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class FakeRateLimitError(Exception):
+    """Shaped like openai.error.RateLimitError: HTTP 429 with a Retry-After header"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Rate limit reached for requests")
+        self.http_status = 429
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+class FakeOpenAI(_Latency):
+    """Stands in for the pre-1.0 openai module (Embedding and ChatCompletion)
+
+    With max_concurrent_embeddings set, embedding calls beyond that many in
+    flight fail with a 429, like a provider enforcing its limits.
+    """
+
+    def __init__(self, dimension: int = 1536, embedding_latency: float = 0.0,
+                 chat_latency: float = 0.0, token_latency: float = 0.0,
+                 max_concurrent_embeddings: int = 0):
+        super().__init__(embedding_latency)
+        self.dimension = dimension
+        self.chat_latency = chat_latency
+        self.token_latency = token_latency
+        self.max_concurrent_embeddings = max_concurrent_embeddings
+        self.embedding_calls = 0
+        self.embedded_texts = 0
+        self.chat_calls = 0
+        self.rate_limited = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.Embedding = SimpleNamespace(create=self._create_embedding)
+        self.ChatCompletion = SimpleNamespace(create=self._create_chat)
+
+    def _create_embedding(self, input, model=None, **kwargs):
+        with self._lock:
+            if self.max_concurrent_embeddings and self._in_flight >= self.max_concurrent_embeddings:
+                self.rate_limited += 1
+                raise FakeRateLimitError(retry_after=self.latency)
+            self._in_flight += 1
+        try:
+            self.wait()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        texts = [input] if isinstance(input, str) else list(input)
+        with self._lock:
+            self.embedding_calls += 1
+            self.embedded_texts += len(texts)
+        return {"data": [
+            {"index": i, "embedding": hashed_embedding(text, self.dimension)}
+            for i, text in enumerate(texts)
+        ]}
+
+    def _answer(self, messages) -> str:
+        question = messages[-1]["content"].rsplit("User Query:", 1)[-1].strip()
+        return f"Here is what I found about {question}"
+
+    def _create_chat(self, messages, stream=False, **kwargs):
+        with self._lock:
+            self.chat_calls += 1
+        answer = self._answer(messages)
+        if not stream:
+            time.sleep(self.chat_latency)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+        return self._stream(answer)
+
+    def _stream(self, answer: str):
+        time.sleep(self.chat_latency)
+        yield {"choices": [{"delta": {"role": "assistant"}}]}
+        for token in re.findall(r"\S+\s*", answer):
+            time.sleep(self.token_latency)
+            yield {"choices": [{"delta": {"content": token}}]}
+
+
+class FakePineconeIndex(_Latency):
+    """In-memory stand-in for pinecone.Index with brute-force cosine search"""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self._lock = threading.Lock()
+        self.vectors: Dict[str, tuple] = {}
+        self.query_calls = 0
+        self._matrix = None
+
+    def upsert(self, vectors):
+        self.wait()
+        with self._lock:
+            for vector_id, values, metadata in vectors:
+                vector = np.asarray(values, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                self.vectors[vector_id] = (vector / norm if norm else vector, dict(metadata))
+            self._matrix = None
+        return {"upserted_count": len(vectors)}
+
+    def delete(self, ids=None, delete_all=False):
+        self.wait()
+        with self._lock:
+            if delete_all:
+                self.vectors.clear()
+            for vector_id in ids or []:
+                self.vectors.pop(vector_id, None)
+            self._matrix = None
+
+    def describe_index_stats(self):
+        return {"total_vector_count": len(self.vectors)}
+
+    def query(self, vector, top_k=5, include_metadata=True, filter=None):
+        self.wait()
+        with self._lock:
+            self.query_calls += 1
+            if self._matrix is None:
+                items = list(self.vectors.items())
+                matrix = np.stack([values for _, (values, _) in items]) if items else None
+                self._matrix = (items, matrix)
+            items, matrix = self._matrix
+        if not items:
+            return SimpleNamespace(matches=[])
+        query = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        if filter:
+            # Pinecone applies the filter during the search, not after top_k
+            scores = np.where([matches(meta, filter) for _, (_, meta) in items], scores, -np.inf)
+        top = [row for row in np.argsort(-scores)[:top_k] if np.isfinite(scores[row])]
+        return SimpleNamespace(matches=[
+            SimpleNamespace(id=items[row][0], score=float(scores[row]),
+                            metadata=items[row][1][1] if include_metadata else {})
+            for row in top
+        ])
+
+
+class _Record:
+    def __init__(self, values: Dict):
+        self._values = values
+
+    def data(self):
+        return dict(self._values)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self._values.values())[key]
+        return self._values[key]
+
+
+class _Result:
+    def __init__(self, records: List[Dict]):
+        self._records = [_Record(record) for record in records]
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def peek(self):
+        return self._records[0] if self._records else None
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+
+class InMemoryGraph(_Latency):
+    """Executes the Cypher statements Neo4jManager issues against Python dicts
+
+    It implements the statement shapes this project sends, not Cypher in
+    general. Use it as a Neo4j driver: Neo4jManager(driver=InMemoryGraph()).
+    """
+
+    RELATIONSHIP = re.compile(r"MERGE \(a\)-\[:(\w+)\]->\(b\)")
+    HOPS = re.compile(r"\[\*1\.\.(\d+)\]")
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self._lock = threading.RLock()
+        self.nodes: Dict[str, Dict] = {}
+        self.edges: Dict[str, set] = defaultdict(set)  # source -> {(type, target)}
+        self.statements = 0
+
+    # Driver / session surface
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    def verify_connectivity(self):
+        return None
+
+    def execute_write(self, work, *args, **kwargs):
+        return work(self, *args, **kwargs)
+
+    execute_read = execute_write
+
+    def run(self, query: str, parameters: Dict = None, **params):
+        self.wait()
+        params = {**(parameters or {}), **params}
+        query = " ".join(query.split())
+        with self._lock:
+            self.statements += 1
+            return _Result(self._execute(query, params))
+
+    # Statement handlers
+    def _execute(self, query: str, params: Dict) -> List[Dict]:
+        if query.startswith("CREATE CONSTRAINT") or query.startswith("CREATE INDEX"):
+            return []
+        if "UNWIND $rows AS row MERGE (l:Location {id: row.id})" in query:
+            for row in params["rows"]:
+                self.nodes.setdefault(row["id"], {}).update(row)
+            return []
+        if "MERGE (l:Location {id: $id})" in query:
+            self.nodes.setdefault(params["id"], {}).update(params["properties"])
+            return []
+        if "-[r]->() WHERE l.id IN $ids DELETE r" in query:
+            for node_id in params["ids"]:
+                self.edges.pop(node_id, None)
+            return []
+        if "DETACH DELETE" in query and "$ids" in query:
+            doomed = set(params["ids"])
+            for node_id in doomed:
+                self.nodes.pop(node_id, None)
+                self.edges.pop(node_id, None)
+            for source in list(self.edges):
+                self.edges[source] = {edge for edge in self.edges[source] if edge[1] not in doomed}
+            return []
+        relationship = self.RELATIONSHIP.search(query)
+        if relationship:
+            for row in params["rows"]:
+                if row["source"] in self.nodes and row["target"] in self.nodes:
+                    self.edges[row["source"]].add((relationship.group(1), row["target"]))
+            return []
+        if "RETURN l.id AS id, l.name AS name, l.type AS type" in query:
+            return [{"id": node.get("id"), "name": node.get("name"), "type": node.get("type")}
+                    for node in self.nodes.values()]
+        if "RETURN l {.*} AS location" in query and "$ids" not in query:
+            return [{"location": dict(node)} for node in self.nodes.values()]
+        if "RETURN a.id AS source, type(r) AS type, b.id AS target" in query:
+            return [{"source": source, "type": edge_type, "target": target}
+                    for source, edges in self.edges.items() for edge_type, target in sorted(edges)]
+        if "MATCH (l:Location {name: $name}) RETURN l" in query:
+            return [{"l": node} for node in self.nodes.values() if node.get("name") == params["name"]][:1]
+        hops = self.HOPS.search(query)
+        if hops and "l.id IN $ids" in query:
+            return self._neighborhood(params["ids"], int(hops.group(1)), params.get("limit", 50))
+        raise NotImplementedError(f"InMemoryGraph does not support: {query}")
+
+    def _undirected(self) -> Dict[str, set]:
+        adjacency = defaultdict(set)
+        for source, edges in self.edges.items():
+            for _, target in edges:
+                adjacency[source].add(target)
+                adjacency[target].add(source)
+        return adjacency
+
+    def _neighborhood(self, ids: List[str], hops: int, limit: int) -> List[Dict]:
+        adjacency = self._undirected()
+        results = []
+        for node_id in ids:
+            if node_id not in self.nodes:
+                continue
+            distances = {node_id: 0}
+            queue = deque([node_id])
+            while queue:
+                current = queue.popleft()
+                if distances[current] == hops:
+                    continue
+                for neighbor in adjacency[current]:
+                    if neighbor not in distances:
+                        distances[neighbor] = distances[current] + 1
+                        queue.append(neighbor)
+            neighbors = sorted(
+                (distance, neighbor) for neighbor, distance in distances.items() if neighbor != node_id
+            )[:limit]
+            results.append({
+                "location": dict(self.nodes[node_id]),
+                "neighbors": [
+                    {"id": neighbor, "name": self.nodes[neighbor].get("name"),
+                     "type": self.nodes[neighbor].get("type"), "distance": distance}
+                    for distance, neighbor in neighbors
+                ],
+            })
+        return results
+
+    def edge_count(self) -> int:
+        return sum(len(edges) for edges in self.edges.values())
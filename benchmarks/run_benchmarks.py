@@ -0,0 +1,393 @@
+import argparse
+import json
+import os
+import platform
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.fakes import FakeOpenAI, FakePineconeIndex, InMemoryGraph, hashed_embedding
+from src.database.graph_snapshot import GraphSnapshot
+from src.database.lexical_index import BM25Index
+from src.database.local_vector_manager import LocalVectorManager
+from src.database.neo4j_manager import Neo4jManager
+from src.database.pinecone_manager import PineconeManager
+from src.database.sync_manager import DatasetSync
+from src.database.vector_snapshot import VectorSnapshot
+from src.models.embedding_engine import EmbeddingCache, EmbeddingEngine
+from src.models.llm_handler import LLMHandler
+from src.models.retriever import HybridRetriever
+from src.utils.config import Config
+from src.utils.entity_matcher import EntityMatcher
+from src.utils.latency import percentile
+from src.utils.text_processor import TextProcessor
+
+QUERY_TEMPLATES = [
+    "What should I do in {city}?",
+    "Best time to visit {city} and {other}?",
+    "Is {name} worth it?",
+    "{days} days in {city}, where should I stay?",
+    "How do I get from {city} to {other}?",
+    "Any {tag} experiences around {city}?",
+]
+
+
+class Stack:
+    """One set of managers wired to local fakes with the given latencies (seconds)"""
+
+    def __init__(self, records: List[Dict], embedding_latency: float, vector_latency: float,
+                 graph_latency: float, dimension: int):
+        self.openai = FakeOpenAI(dimension=dimension, embedding_latency=embedding_latency)
+        self.index = FakePineconeIndex(latency=vector_latency)
+        self.graph = InMemoryGraph(latency=graph_latency)
+        self.embedder = EmbeddingEngine(cache=EmbeddingCache(":memory:"), client=self.openai)
+        self.vector_store = PineconeManager(embedder=self.embedder, index=self.index)
+        self.neo4j = Neo4jManager(driver=self.graph)
+        self.matcher = EntityMatcher.from_records(records)
+        self.llm = LLMHandler(client=self.openai)
+        self.retriever = HybridRetriever(self.neo4j, self.vector_store, self.matcher)
+        self.lexical = BM25Index.from_records(records)
+
+
+def make_queries(records: List[Dict], count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    cities = [r['name'] for r in records if r.get('type') == 'City']
+    names = [r['name'] for r in records if r.get('type') != 'City']
+    tags = sorted({tag for r in records for tag in r.get('tags', [])})
+    return [
+        rng.choice(QUERY_TEMPLATES).format(
+            city=rng.choice(cities), other=rng.choice(cities), name=rng.choice(names),
+            tag=rng.choice(tags), days=rng.randint(2, 7)
+        )
+        for _ in range(count)
+    ]
+
+
+def latency_stats(samples: List[float]) -> Dict:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def bench_ingest(stack: Stack, records: List[Dict]) -> Dict:
+    documents = DatasetSync.documents(records)
+    start = time.perf_counter()
+    stack.vector_store.upsert_texts(documents, batch_size=Config.BATCH_SIZE)
+    vector_seconds = time.perf_counter() - start
+
+    graph_stats = stack.neo4j.bulk_load(records)
+    return {
+        "records": len(records),
+        "vector_seconds": round(vector_seconds, 4),
+        "vector_docs_per_sec": round(len(documents) / vector_seconds, 1) if vector_seconds else 0.0,
+        "embedding_api_calls": stack.openai.embedding_calls,
+        "graph": graph_stats,
+    }
+
+
+def bench_queries(stack: Stack, queries: List[str]) -> Dict:
+    samples, usage = [], {}
+    for query in queries:
+        start = time.perf_counter()
+        context = stack.retriever.retrieve(query)
+        _, usage = stack.llm.build_messages(query, context["graph"], context["vectors"])
+        samples.append(time.perf_counter() - start)
+    return {
+        "end_to_end": latency_stats(samples),
+        "stages": stack.retriever.latency_summary(),
+        "prompt_tokens_last": usage.get("prompt_tokens"),
+    }
+
+
+def bench_lexical(stack: Stack, queries: List[str]) -> Dict:
+    """Same queries with and without the BM25 fast path, each with a cold embedding cache"""
+    results = {}
+    for label, lexical in (("without_lexical", None), ("with_lexical", stack.lexical)):
+        embedder = EmbeddingEngine(cache=EmbeddingCache(":memory:"), client=stack.openai)
+        retriever = HybridRetriever(
+            stack.neo4j, PineconeManager(embedder=embedder, index=stack.index), stack.matcher,
+            lexical=lexical
+        )
+        calls_before = stack.openai.embedding_calls
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            retriever.retrieve(query)
+            samples.append(time.perf_counter() - start)
+        retriever.close()
+        results[label] = {
+            "retrieval": latency_stats(samples),
+            "embedding_api_calls": stack.openai.embedding_calls - calls_before,
+            "paths": dict(retriever.path_counts),
+        }
+    return results
+
+
+def bench_filtered(stack: Stack, records: List[Dict], count: int, seed: int = 0) -> Dict:
+    """Local index search with and without a metadata pre-filter, e.g. hotels in a city with a tag"""
+    rng = random.Random(seed)
+    ids = list(stack.index.vectors)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        local = LocalVectorManager(index_path=tmpdir, dimension=stack.openai.dimension, embedder=stack.embedder)
+        local.upsert_vectors(
+            ids, [stack.index.vectors[i][0] for i in ids], [stack.index.vectors[i][1] for i in ids]
+        )
+        hotels = [r for r in records if r.get('type') == 'Hotel']
+        index = local.metadata_index()
+        unfiltered, filtered, scanned = [], [], []
+        for _ in range(count):
+            hotel = rng.choice(hotels)
+            filter = {"type": "Hotel", "city": hotel['city'], "tags": {"$in": [rng.choice(hotel['tags'])]}}
+            vector = hashed_embedding(f"{hotel['city']} hotel", stack.openai.dimension)
+            start = time.perf_counter()
+            local.search(vector, Config.TOP_K_RESULTS)
+            unfiltered.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            local.search(vector, Config.TOP_K_RESULTS, filter=filter)
+            filtered.append(time.perf_counter() - start)
+            scanned.append(len(index.candidates(filter)))
+    return {
+        "rows": len(ids),
+        "mean_rows_scanned": round(sum(scanned) / len(scanned), 1) if scanned else 0.0,
+        "unfiltered": latency_stats(unfiltered),
+        "filtered": latency_stats(filtered),
+    }
+
+
+def bench_graph(stack: Stack, records: List[Dict], count: int, seed: int = 0) -> Dict:
+    """Neighbourhood lookups against the graph vs the in-process snapshot, plus city routes"""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    snapshot = GraphSnapshot.from_neo4j(stack.neo4j)
+    build_seconds = time.perf_counter() - start
+    ids = [rng.choice(records)['id'] for _ in range(count)]
+    cities = [r['name'] for r in records if r.get('type') == 'City']
+    timings = {"graph": [], "snapshot": [], "route": []}
+    for location_id in ids:
+        for label, source in (("graph", stack.neo4j), ("snapshot", snapshot)):
+            start = time.perf_counter()
+            source.query_neighborhood([location_id])
+            timings[label].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        snapshot.route(rng.choice(cities), rng.choice(cities))
+        timings["route"].append(time.perf_counter() - start)
+    return {
+        "build_seconds": round(build_seconds, 4),
+        **{label: latency_stats(samples) for label, samples in timings.items()},
+    }
+
+
+def bench_concurrent_embeddings(stack: Stack, queries: List[str], users: int) -> Dict:
+    """Many sessions embedding queries at once, with and without the micro-batching dispatcher"""
+    results = {}
+    for label, window in (("unbatched", 0.0), ("dispatcher", Config.EMBEDDING_BATCH_WINDOW or 0.005)):
+        engine = EmbeddingEngine(cache=EmbeddingCache(":memory:"), client=stack.openai, batch_window=window)
+        calls_before = stack.openai.embedding_calls
+        samples = []
+        lock = threading.Lock()
+
+        def session(user: int):
+            for query in queries[user::users]:
+                start = time.perf_counter()
+                engine.embed(f"{query} (session {user})")
+                with lock:
+                    samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=session, args=(user,)) for user in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        results[label] = {
+            "users": users,
+            "queries_per_sec": round(len(samples) / seconds, 1) if seconds else 0.0,
+            "embedding_api_calls": stack.openai.embedding_calls - calls_before,
+            "latency": latency_stats(samples),
+        }
+        if engine.dispatcher is not None:
+            results[label]["dispatcher"] = engine.dispatcher.stats()
+        engine.close()
+    return results
+
+
+def bench_denormalized(stack: Stack, queries: List[str]) -> Dict:
+    """Retrieval with a graph hop (parallel, or sequential after the vector search) vs vector-only
+
+    The vector documents carry denormalized neighbourhood summaries, so the
+    vector-only path still returns city and nearby-place context.
+    """
+    vector_only = HybridRetriever(None, stack.vector_store, stack.matcher)
+    timings = {"hybrid_parallel": [], "vector_then_graph": [], "vector_only": []}
+    grounded = 0
+    for query in queries:
+        start = time.perf_counter()
+        stack.retriever.retrieve(query)
+        timings["hybrid_parallel"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        matches = stack.vector_store.query(query, Config.TOP_K_RESULTS)
+        stack.neo4j.query_neighborhood([match["id"] for match in matches])
+        timings["vector_then_graph"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        context = vector_only.retrieve(query)
+        timings["vector_only"].append(time.perf_counter() - start)
+        top = (context["vectors"] or [{}])[0]
+        grounded += bool(top.get("nearby") or top.get("connected_cities"))
+    vector_only.close()
+    return {
+        **{label: latency_stats(samples) for label, samples in timings.items()},
+        "grounded_top_match_share": round(grounded / len(queries), 3) if queries else 0.0,
+    }
+
+
+def bench_snapshot(stack: Stack, records: List[Dict], dimension: int, vector_latency: float) -> Dict:
+    """Rebuild the vector index from a snapshot vs re-embedding through a cold cache"""
+    documents = DatasetSync.documents(records)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vectors.npz")
+        start = time.perf_counter()
+        VectorSnapshot.from_documents(documents, stack.embedder).save(path)
+        export_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        snapshot = VectorSnapshot.load(path)
+        load_seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        cold = FakeOpenAI(dimension=dimension, embedding_latency=stack.openai.latency)
+        embedder = EmbeddingEngine(cache=EmbeddingCache(":memory:"), client=cold, batch_window=0)
+        fresh = PineconeManager(embedder=embedder, index=FakePineconeIndex(latency=vector_latency))
+        start = time.perf_counter()
+        fresh.upsert_texts(documents, batch_size=Config.BATCH_SIZE)
+        reembed_seconds = time.perf_counter() - start
+        reembed_calls = cold.embedding_calls
+
+        cold = FakeOpenAI(dimension=dimension)
+        embedder = EmbeddingEngine(cache=EmbeddingCache(":memory:"), client=cold, batch_window=0)
+        restored = PineconeManager(embedder=embedder, index=FakePineconeIndex(latency=vector_latency))
+        # No sync has run against these indexes
+        manifest = os.path.join(tmp, "sync_manifest.json")
+        restore = snapshot.restore(restored, manifest_path=manifest)
+        local = LocalVectorManager(index_path=os.path.join(tmp, "local"), dimension=dimension, embedder=embedder)
+        local_restore = snapshot.restore(local, seed_cache=False, manifest_path=manifest)
+    return {
+        "vectors": len(snapshot),
+        "file_mb": round(size / 1e6, 2),
+        "export_seconds": round(export_seconds, 4),
+        "load_seconds": round(load_seconds, 4),
+        "reembed": {
+            "seconds": round(reembed_seconds, 4),
+            "vectors_per_sec": round(len(documents) / reembed_seconds, 1) if reembed_seconds else 0.0,
+            "embedding_api_calls": reembed_calls,
+        },
+        "restore_pinecone": {**restore, "embedding_api_calls": cold.embedding_calls},
+        "restore_local": local_restore,
+    }
+
+
+def run(scales: List[int], queries: int, embedding_latency: float, vector_latency: float,
+        graph_latency: float, dimension: int, dataset: str = Config.DATASET_PATH, users: int = 50) -> Dict:
+    base = TextProcessor.parse_location_data(dataset)
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {
+            "queries": queries, "dimension": dimension,
+            "embedding_latency": embedding_latency, "vector_latency": vector_latency,
+            "graph_latency": graph_latency, "users": users,
+        },
+        "scales": {},
+    }
+    for scale in scales:
+        records = TextProcessor.scale_dataset(base, scale)
+        stack = Stack(records, embedding_latency, vector_latency, graph_latency, dimension)
+        ingest = bench_ingest(stack, records)
+        query_log = make_queries(records, queries)
+        query = bench_queries(stack, query_log)
+        lexical = bench_lexical(stack, query_log)
+        filtered = bench_filtered(stack, records, queries)
+        graph = bench_graph(stack, records, queries)
+        concurrent = bench_concurrent_embeddings(stack, query_log, users)
+        denormalized = bench_denormalized(stack, query_log)
+        snapshot = bench_snapshot(stack, records, dimension, vector_latency)
+        stack.retriever.close()
+        results["scales"][f"{scale}x"] = {
+            "ingest": ingest, "query": query, "lexical": lexical, "filtered": filtered, "graph": graph,
+            "concurrent_embeddings": concurrent, "denormalized": denormalized, "snapshot": snapshot,
+        }
+        print(
+            f"{scale}x: {ingest['records']} records, {ingest['vector_docs_per_sec']} docs/sec, "
+            f"{ingest['graph']['nodes_per_sec']} nodes/sec, query p50 {query['end_to_end']['p50_ms']}ms "
+            f"p95 {query['end_to_end']['p95_ms']}ms p99 {query['end_to_end']['p99_ms']}ms"
+        )
+        print(
+            f"{scale}x lexical fast path: embedding calls "
+            f"{lexical['without_lexical']['embedding_api_calls']} -> {lexical['with_lexical']['embedding_api_calls']}, "
+            f"retrieval p50 {lexical['without_lexical']['retrieval']['p50_ms']}ms -> "
+            f"{lexical['with_lexical']['retrieval']['p50_ms']}ms"
+        )
+        print(
+            f"{scale}x filtered search: {filtered['mean_rows_scanned']}/{filtered['rows']} rows scanned, "
+            f"p50 {filtered['unfiltered']['p50_ms']}ms -> {filtered['filtered']['p50_ms']}ms"
+        )
+        print(
+            f"{scale}x graph snapshot: built in {graph['build_seconds']}s, neighbourhood p50 "
+            f"{graph['graph']['p50_ms']}ms -> {graph['snapshot']['p50_ms']}ms, route p50 {graph['route']['p50_ms']}ms"
+        )
+        print(
+            f"{scale}x {users} concurrent users: embedding calls "
+            f"{concurrent['unbatched']['embedding_api_calls']} -> {concurrent['dispatcher']['embedding_api_calls']}, "
+            f"{concurrent['unbatched']['queries_per_sec']} -> {concurrent['dispatcher']['queries_per_sec']} queries/sec, "
+            f"p95 {concurrent['unbatched']['latency']['p95_ms']}ms -> {concurrent['dispatcher']['latency']['p95_ms']}ms"
+        )
+        print(
+            f"{scale}x retrieval p50: vector then graph {denormalized['vector_then_graph']['p50_ms']}ms, "
+            f"parallel hybrid {denormalized['hybrid_parallel']['p50_ms']}ms, "
+            f"vector-only {denormalized['vector_only']['p50_ms']}ms "
+            f"({denormalized['grounded_top_match_share']:.0%} of top matches carry graph context)"
+        )
+        print(
+            f"{scale}x snapshot of {snapshot['vectors']} vectors ({snapshot['file_mb']}MB): re-embed "
+            f"{snapshot['reembed']['vectors_per_sec']} vectors/sec ({snapshot['reembed']['embedding_api_calls']} API calls), "
+            f"restore {snapshot['restore_pinecone']['vectors_per_sec']} vectors/sec to Pinecone, "
+            f"{snapshot['restore_local']['vectors_per_sec']} vectors/sec to the local index"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ingest and query benchmarks")
+    parser.add_argument("--scales", default="1,10,100", help="Comma-separated dataset multipliers")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--embedding-latency", type=float, default=0.02)
+    parser.add_argument("--vector-latency", type=float, default=0.01)
+    parser.add_argument("--graph-latency", type=float, default=0.01)
+    parser.add_argument("--dimension", type=int, default=Config.PINECONE_DIMENSION)
+    parser.add_argument("--users", type=int, default=50, help="Concurrent sessions for the embedding benchmark")
+    parser.add_argument("--output", default=None, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    results = run(
+        [int(scale) for scale in args.scales.split(",")], args.queries,
+        args.embedding_latency, args.vector_latency, args.graph_latency, args.dimension, users=args.users
+    )
+    output = args.output or os.path.join(
+        "benchmarks", "results", datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
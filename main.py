@@ -1,167 +1,235 @@
-import os
-import sys
-import logging
-from dotenv import load_dotenv
-import streamlit as st
-from src.database.neo4j_manager import Neo4jManager
-from src.database.pinecone_manager import PineconeManager
-from src.models.llm_handler import LLMHandler
-from src.utils.text_processor import TextProcessor
-from src.interface.chat_interface import ChatInterface
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-# ...existing code...
-
-class TravelAssistantSetup:
-    def __init__(self):
-        load_dotenv()
-        self.verify_pinecone_setup()  # Add verification before initializing
-        self.neo4j = Neo4jManager()
-        self.pinecone = PineconeManager()
-        self.text_processor = TextProcessor()
-        self.chat_interface = ChatInterface()
-
-    def verify_pinecone_setup(self):
-        """Verify Pinecone configuration before initialization"""
-        logger.info("Verifying Pinecone configuration...")
-        
-        # Check API key format
-        api_key = os.getenv('PINECONE_API_KEY')
-        if not api_key or len(api_key) < 32:  # Pinecone API keys are typically longer
-            raise ValueError("Invalid Pinecone API key format. Please check your .env file")
-            
-        # Verify environment
-        env = os.getenv('PINECONE_ENVIRONMENT')
-        if env != 'gcp-starter':
-            logger.warning(f"Pinecone environment is set to '{env}'. For free tier, use 'gcp-starter'")
-        
-        try:
-            # Test Pinecone connection
-            import pinecone
-            pinecone.init(api_key=api_key, environment=env)
-            
-            # Check existing indexes
-            existing_indexes = pinecone.list_indexes()
-            if existing_indexes:
-                logger.warning(f"Found existing Pinecone indexes: {existing_indexes}")
-                logger.warning("Consider deleting unused indexes in Pinecone console: https://app.pinecone.io")
-            
-            logger.info("Pinecone configuration verified successfully")
-            
-        except Exception as e:
-            raise ConnectionError(f"Failed to connect to Pinecone: {str(e)}")
-
-    # ...existing code...
-
-    def check_environment_variables(self):
-        """Check if all required environment variables are set"""
-        required_vars = [
-            'NEO4J_URI', 'NEO4J_USER', 'NEO4J_PASSWORD',
-            'PINECONE_API_KEY', 'PINECONE_ENVIRONMENT',
-            'OPENAI_API_KEY'
-        ]
-        
-        missing_vars = [var for var in required_vars if not os.getenv(var)]
-        if missing_vars:
-            raise EnvironmentError(f"Missing environment variables: {', '.join(missing_vars)}")
-
-    def load_location_data(self):
-        """Load location data into Neo4j"""
-        try:
-            logger.info("Loading location data into Neo4j...")
-            locations = self.text_processor.parse_location_data('data/locations.json')
-            self.neo4j.load_locations('data/locations.json')
-            logger.info("Location data loaded successfully")
-            return locations
-        except Exception as e:
-            logger.error(f"Error loading location data: {str(e)}")
-            raise
-
-    def process_travel_info(self):
-        """Process and load travel information into Pinecone"""
-        try:
-            logger.info("Processing travel information...")
-            with open('data/travel_info.txt', 'r', encoding='utf-8') as f:
-                text = f.read()
-            
-            # Clean and chunk the text
-            cleaned_text = self.text_processor.clean_text(text)
-            chunks = self.text_processor.chunk_text(cleaned_text)
-            
-            # Prepare documents for Pinecone
-            documents = [{"content": chunk, "type": "travel_info"} for chunk in chunks]
-            
-            # Upload to Pinecone
-            logger.info("Uploading data to Pinecone...")
-            self.pinecone.upsert_texts(documents)
-            logger.info("Travel information processed and uploaded successfully")
-        except Exception as e:
-            logger.error(f"Error processing travel information: {str(e)}")
-            raise
-
-    def run_tests(self):
-        """Run unit tests"""
-        try:
-            logger.info("Running unit tests...")
-            import unittest
-            from tests.test_managers import TestNeo4jManager, TestPineconeManager, TestTextProcessor
-            
-            test_loader = unittest.TestLoader()
-            test_suite = unittest.TestSuite()
-            
-            test_suite.addTests(test_loader.loadTestsFromTestCase(TestNeo4jManager))
-            test_suite.addTests(test_loader.loadTestsFromTestCase(TestPineconeManager))
-            test_suite.addTests(test_loader.loadTestsFromTestCase(TestTextProcessor))
-            
-            runner = unittest.TextTestRunner(verbosity=2)
-            result = runner.run(test_suite)
-            
-            if not result.wasSuccessful():
-                raise Exception("Unit tests failed")
-            
-            logger.info("All tests passed successfully")
-        except Exception as e:
-            logger.error(f"Error running tests: {str(e)}")
-            raise
-
-    def run_application(self):
-        """Run the Streamlit chat interface"""
-        try:
-            logger.info("Starting chat interface...")
-            self.chat_interface.display_chat()
-        except Exception as e:
-            logger.error(f"Error running chat interface: {str(e)}")
-            raise
-
-def main():
-    try:
-        setup = TravelAssistantSetup()
-        
-        # Step 1: Check environment variables
-        logger.info("Checking environment variables...")
-        setup.check_environment_variables()
-        
-        # Step 2: Run unit tests
-        setup.run_tests()
-        
-        # Step 3: Load location data into Neo4j
-        setup.load_location_data()
-        
-        # Step 4: Process and load travel information into Pinecone
-        setup.process_travel_info()
-        
-        # Step 5: Run the chat interface
-        setup.run_application()
-        
-    except Exception as e:
-        logger.error(f"Application failed to start: {str(e)}")
-        sys.exit(1)
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import time
+
+_STARTED = time.perf_counter()
+
+import os
+import sys
+import logging
+from dotenv import load_dotenv
+from src.utils.config import Config
+from src.utils.metrics import metrics
+from src.utils.resources import get_registry
+from src.utils.startup import BackgroundBoot, StartupTimer, start_once
+from src.utils.text_processor import TextProcessor
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# ...existing code...
+
+class TravelAssistantSetup:
+    def __init__(self, timer: StartupTimer = None):
+        load_dotenv()
+        self.timer = timer if timer is not None else StartupTimer()
+        self.registry = get_registry()
+        self.text_processor = TextProcessor()
+        self._chat_interface = None
+
+    # Backends are built on first use, so constructing the setup is cheap
+    @property
+    def neo4j(self):
+        return self.registry.get("neo4j")
+
+    @property
+    def pinecone(self):
+        return self.registry.get("vector_store")
+
+    @property
+    def chat_interface(self):
+        if self._chat_interface is None:
+            from src.interface.chat_interface import ChatInterface
+            self._chat_interface = ChatInterface()
+        return self._chat_interface
+
+    def verify_pinecone_setup(self):
+        """Verify Pinecone configuration before initialization"""
+        logger.info("Verifying Pinecone configuration...")
+        
+        # Check API key format
+        api_key = os.getenv('PINECONE_API_KEY')
+        if not api_key or len(api_key) < 32:  # Pinecone API keys are typically longer
+            raise ValueError("Invalid Pinecone API key format. Please check your .env file")
+            
+        # Verify environment
+        env = os.getenv('PINECONE_ENVIRONMENT')
+        if env != 'gcp-starter':
+            logger.warning(f"Pinecone environment is set to '{env}'. For free tier, use 'gcp-starter'")
+        
+        try:
+            # Test Pinecone connection
+            import pinecone
+            pinecone.init(api_key=api_key, environment=env)
+            
+            # Check existing indexes
+            existing_indexes = pinecone.list_indexes()
+            if existing_indexes:
+                logger.warning(f"Found existing Pinecone indexes: {existing_indexes}")
+                logger.warning("Consider deleting unused indexes in Pinecone console: https://app.pinecone.io")
+            
+            logger.info("Pinecone configuration verified successfully")
+            
+        except Exception as e:
+            raise ConnectionError(f"Failed to connect to Pinecone: {str(e)}")
+
+    # ...existing code...
+
+    def check_environment_variables(self):
+        """Check if all required environment variables are set"""
+        required_vars = ['NEO4J_URI', 'NEO4J_USER', 'NEO4J_PASSWORD', 'OPENAI_API_KEY']
+        # The local vector backend runs offline and needs no Pinecone credentials
+        if Config.VECTOR_BACKEND == "pinecone":
+            required_vars += ['PINECONE_API_KEY', 'PINECONE_ENVIRONMENT']
+
+        missing_vars = [var for var in required_vars if not os.getenv(var)]
+        if missing_vars:
+            raise EnvironmentError(f"Missing environment variables: {', '.join(missing_vars)}")
+
+    def load_location_data(self):
+        """Load location data into Neo4j"""
+        try:
+            logger.info("Loading location data into Neo4j...")
+            locations = self.text_processor.parse_location_data('data/locations.json')
+            self.neo4j.load_locations('data/locations.json')
+            logger.info("Location data loaded successfully")
+            return locations
+        except Exception as e:
+            logger.error(f"Error loading location data: {str(e)}")
+            raise
+
+    def sync_data(self):
+        """Incrementally sync the dataset into Neo4j and the vector index"""
+        try:
+            logger.info(f"Syncing {Config.DATASET_PATH} ({Config.SYNC_MODE} mode)...")
+            from src.database.sync_manager import DatasetSync
+            sync = DatasetSync(self.neo4j, self.pinecone)
+            summary = sync.sync_file(Config.DATASET_PATH, full=Config.SYNC_MODE == "full")
+            registry = get_registry()
+            # The response cache compares against this; re-read the manifest on next use
+            registry.reset("data_version")
+            if summary["upserted"] or summary["deleted"]:
+                # Rebuild the in-memory indexes from the synced dataset on next use
+                registry.reset("matcher")
+                registry.reset("lexical_index")
+                if Config.GRAPH_SNAPSHOT_ENABLED:
+                    from src.database.graph_snapshot import GraphSnapshot
+                    # Swapped in place so in-flight retrievals keep a consistent graph
+                    registry.get("graph_snapshot").refresh(GraphSnapshot.from_records(
+                        TextProcessor.parse_location_data(Config.DATASET_PATH), summary["version"]
+                    ))
+            metrics.write()
+            return summary
+        except Exception as e:
+            logger.error(f"Error syncing data: {str(e)}")
+            raise
+
+    def _ready(self, name: str):
+        """Build a shared resource and probe it, raising if it is unhealthy"""
+        self.registry.get(name)
+        if not self.registry.check(name, force=True):
+            raise ConnectionError(f"'{name}' failed its health check")
+
+    def readiness_checks(self):
+        """Backend connections and in-memory indexes to warm up concurrently"""
+        checks = {
+            "neo4j": lambda: self._ready("neo4j"),
+            "vector_store": lambda: self._ready("vector_store"),
+            "llm": lambda: self.registry.get("llm"),
+            "matcher": lambda: self.registry.get("matcher"),
+            "lexical_index": lambda: self.registry.get("lexical_index"),
+        }
+        if Config.GRAPH_SNAPSHOT_ENABLED:
+            checks["graph_snapshot"] = lambda: self.registry.get("graph_snapshot")
+        return checks
+
+    def start_background(self) -> BackgroundBoot:
+        """Readiness checks and data sync, off the render path"""
+        return BackgroundBoot(self.readiness_checks(), self.sync_data, Config.STARTUP_DEADLINE, self.timer)
+
+    def run_tests(self):
+        """Run unit tests"""
+        try:
+            logger.info("Running unit tests...")
+            import unittest
+            from tests.test_managers import TestNeo4jManager, TestPineconeManager, TestTextProcessor
+            
+            test_loader = unittest.TestLoader()
+            test_suite = unittest.TestSuite()
+            
+            test_suite.addTests(test_loader.loadTestsFromTestCase(TestNeo4jManager))
+            test_suite.addTests(test_loader.loadTestsFromTestCase(TestPineconeManager))
+            test_suite.addTests(test_loader.loadTestsFromTestCase(TestTextProcessor))
+            
+            runner = unittest.TextTestRunner(verbosity=2)
+            result = runner.run(test_suite)
+            
+            if not result.wasSuccessful():
+                raise Exception("Unit tests failed")
+            
+            logger.info("All tests passed successfully")
+        except Exception as e:
+            logger.error(f"Error running tests: {str(e)}")
+            raise
+
+    def run_application(self, notice: str = None):
+        """Run the Streamlit chat interface"""
+        try:
+            logger.info("Starting chat interface...")
+            self.chat_interface.display_chat(notice)
+        except Exception as e:
+            logger.error(f"Error running chat interface: {str(e)}")
+            raise
+
+def main_full(setup: TravelAssistantSetup):
+    """Serial startup: verify, optionally test, and sync everything before serving"""
+    if Config.VECTOR_BACKEND == "pinecone":
+        with setup.timer.phase("verify_pinecone"):
+            setup.verify_pinecone_setup()
+    if Config.RUN_TESTS_ON_STARTUP:
+        with setup.timer.phase("tests"):
+            setup.run_tests()
+    with setup.timer.phase("sync"):
+        setup.sync_data()
+    setup.run_application()
+    setup.timer.mark("first_render")
+    setup.timer.write()
+
+
+def main_fast(setup: TravelAssistantSetup):
+    """Render immediately; readiness checks and sync continue in the background
+
+    The boot is process-wide, so Streamlit reruns reuse it rather than
+    starting another sync.
+    """
+    boot = start_once(setup.start_background)
+    setup.run_application(boot.status())
+    if "first_render" not in boot.timer.marks:
+        logger.info(f"Time to first render: {boot.timer.mark('first_render') * 1000:.0f}ms")
+        boot.timer.write()
+
+
+def main():
+    try:
+        timer = StartupTimer(origin=_STARTED)
+        timer.record("imports", time.perf_counter() - _STARTED)
+        setup = TravelAssistantSetup(timer)
+
+        # Step 1: Check environment variables
+        logger.info("Checking environment variables...")
+        setup.check_environment_variables()
+
+        # Step 2: Serve. Live-service tests run in CI, or in full mode with RUN_TESTS_ON_STARTUP
+        if Config.STARTUP_MODE == "full":
+            main_full(setup)
+        else:
+            main_fast(setup)
+
+    except Exception as e:
+        logger.error(f"Application failed to start: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
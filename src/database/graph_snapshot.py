@@ -0,0 +1,305 @@
+import json
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.utils.config import Config
+from src.utils.entity_matcher import normalize
+from src.utils.text_processor import TextProcessor
+
+if TYPE_CHECKING:
+    from src.database.neo4j_manager import Neo4jManager
+
+logger = logging.getLogger(__name__)
+
+CITY = "City"
+# Edges that tie a hotel, attraction or activity to its city
+PLACE_RELATIONS = ("Located_In", "Available_In")
+
+
+class GraphSnapshot:
+    """Read-only, in-process copy of the location graph in CSR form
+
+    Nodes are numbered 0..n-1; the neighbours of node i are
+    indices[indptr[i]:indptr[i + 1]] with the relationship of each edge in
+    edge_types. Edges are stored in both directions so traversal ignores
+    direction, as query_neighborhood does in Neo4j. Shortest city-to-city
+    routes over Connected_To edges and per-city lists of places are
+    precomputed at build time, so lookups never touch Neo4j.
+    """
+
+    def __init__(self, properties: List[Dict], indptr: np.ndarray, indices: np.ndarray,
+                 edge_types: np.ndarray, relations: List[str], version: Optional[str] = None):
+        self.properties = properties
+        self.ids = [node["id"] for node in properties]
+        self.row = {node_id: row for row, node_id in enumerate(self.ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_types = edge_types
+        self.relations = relations
+        self.version = version
+        self._by_name = {" ".join(normalize(node.get("name") or "")): row for row, node in enumerate(properties)}
+        self._build_places()
+        self._build_city_routes()
+
+    @classmethod
+    def from_graph(cls, nodes: Iterable[Dict], relationships: Iterable[Dict],
+                   version: Optional[str] = None) -> "GraphSnapshot":
+        """Build from node property dicts and {source, type, target} relationships"""
+        properties = list(nodes)
+        row = {node["id"]: i for i, node in enumerate(properties)}
+        relations: List[str] = []
+        relation_codes: Dict[str, int] = {}
+        adjacency = defaultdict(list)
+        for relationship in relationships:
+            source, target = row.get(relationship["source"]), row.get(relationship["target"])
+            if source is None or target is None:
+                continue
+            code = relation_codes.setdefault(relationship["type"], len(relation_codes))
+            if code == len(relations):
+                relations.append(relationship["type"])
+            adjacency[source].append((target, code))
+            adjacency[target].append((source, code))
+
+        indptr = np.zeros(len(properties) + 1, dtype=np.int32)
+        indices, edge_types = [], []
+        for node in range(len(properties)):
+            edges = sorted(set(adjacency.get(node, ())))
+            indices.extend(target for target, _ in edges)
+            edge_types.extend(code for _, code in edges)
+            indptr[node + 1] = len(indices)
+        return cls(properties, indptr, np.asarray(indices, dtype=np.int32),
+                   np.asarray(edge_types, dtype=np.int8), relations, version)
+
+    @classmethod
+    def from_records(cls, records: List[Dict], version: Optional[str] = None) -> "GraphSnapshot":
+        """Build from dataset records, as loaded into Neo4j"""
+        # Imported here so loading a snapshot does not pull in the Neo4j driver
+        from src.database.neo4j_manager import Neo4jManager
+        return cls.from_graph(
+            [Neo4jManager.node_properties(record) for record in records],
+            TextProcessor.extract_relationships(records),
+            version
+        )
+
+    @classmethod
+    def from_neo4j(cls, neo4j: "Neo4jManager", version: Optional[str] = None) -> "GraphSnapshot":
+        """Build from the live graph"""
+        nodes, relationships = neo4j.export_graph()
+        return cls.from_graph(nodes, relationships, version)
+
+    # Precomputed indexes
+    def _neighbors(self, row: int, relations: Optional[Iterable[str]] = None):
+        start, end = self.indptr[row], self.indptr[row + 1]
+        if relations is None:
+            return self.indices[start:end]
+        codes = [self.relations.index(name) for name in relations if name in self.relations]
+        return self.indices[start:end][np.isin(self.edge_types[start:end], codes)]
+
+    def _build_places(self):
+        self.city_rows = [row for row, node in enumerate(self.properties) if node.get("type") == CITY]
+        self.city_of: Dict[int, int] = {}
+        self.places: Dict[int, Dict[str, List[str]]] = {row: defaultdict(list) for row in self.city_rows}
+        for city in self.city_rows:
+            for place in self._neighbors(city, PLACE_RELATIONS):
+                place = int(place)
+                if self.properties[place].get("type") == CITY:
+                    continue
+                self.city_of.setdefault(place, city)
+                self.places[city][self.properties[place].get("type", "unknown")].append(self.ids[place])
+
+    def _build_city_routes(self):
+        """All-pairs shortest paths between cities (BFS per city, unweighted)
+
+        city_next[i, j] is the next city on a shortest path from city i to
+        city j, or -1 when j is unreachable; city_distance holds the hop count.
+        """
+        count = len(self.city_rows)
+        self.city_position = {row: i for i, row in enumerate(self.city_rows)}
+        self.city_distance = np.full((count, count), -1, dtype=np.int32)
+        self.city_next = np.full((count, count), -1, dtype=np.int32)
+        city_links = [
+            [self.city_position[int(n)] for n in self._neighbors(row, ["Connected_To"])
+             if int(n) in self.city_position]
+            for row in self.city_rows
+        ]
+        for target in range(count):
+            # BFS outwards from the target: each node's parent is its next hop towards it
+            self.city_distance[target, target] = 0
+            self.city_next[target, target] = target
+            queue = deque([target])
+            while queue:
+                current = queue.popleft()
+                for neighbor in city_links[current]:
+                    if self.city_distance[neighbor, target] < 0:
+                        self.city_distance[neighbor, target] = self.city_distance[current, target] + 1
+                        self.city_next[neighbor, target] = current
+                        queue.append(neighbor)
+
+    # Lookups
+    def resolve(self, key: str) -> Optional[int]:
+        """Row of a location given its id or (case-insensitive) name"""
+        if key in self.row:
+            return self.row[key]
+        return self._by_name.get(" ".join(normalize(key)))
+
+    def _city(self, row: int) -> Optional[int]:
+        if self.properties[row].get("type") == CITY:
+            return row
+        return self.city_of.get(row)
+
+    def _summary(self, row: int) -> Dict:
+        node = self.properties[row]
+        return {"id": node["id"], "name": node.get("name"), "type": node.get("type")}
+
+    def route(self, source: str, target: str) -> Optional[Dict]:
+        """Shortest city-to-city route; places resolve to the city they are in"""
+        source_row, target_row = self.resolve(source), self.resolve(target)
+        if source_row is None or target_row is None:
+            return None
+        source_city, target_city = self._city(source_row), self._city(target_row)
+        if source_city is None or target_city is None:
+            return None
+        i, j = self.city_position[source_city], self.city_position[target_city]
+        if self.city_next[i, j] < 0:
+            return None
+        path = [i]
+        while path[-1] != j:
+            path.append(int(self.city_next[path[-1], j]))
+        return {
+            "from": self._summary(source_row),
+            "to": self._summary(target_row),
+            "hops": int(self.city_distance[i, j]),
+            "path": [self._summary(self.city_rows[position]) for position in path],
+        }
+
+    def routes_between(self, ids: List[str]) -> List[Dict]:
+        """Routes between consecutive distinct cities among the given locations"""
+        cities = []
+        for location_id in ids:
+            row = self.resolve(location_id)
+            city = self._city(row) if row is not None else None
+            if city is not None and city not in cities:
+                cities.append(city)
+        routes = []
+        for source, target in zip(cities, cities[1:]):
+            route = self.route(self.ids[source], self.ids[target])
+            if route is not None:
+                routes.append(route)
+        return routes
+
+    def places_in(self, city: str, type: Optional[str] = None) -> List[str]:
+        """Ids of the hotels, attractions and activities in a city"""
+        row = self.resolve(city)
+        places = self.places.get(row, {}) if row is not None else {}
+        if type is not None:
+            return list(places.get(type, []))
+        return [place for group in places.values() for place in group]
+
+    def nearby(self, location: str, type: Optional[str] = None) -> List[str]:
+        """Other places in the same city as a location"""
+        row = self.resolve(location)
+        city = self._city(row) if row is not None else None
+        if city is None:
+            return []
+        return [place for place in self.places_in(self.ids[city], type) if place != self.ids[row]]
+
+    def query_neighborhood(self, ids: List[str], hops: int = 2, limit: int = 50) -> List[Dict]:
+        """Same contract as Neo4jManager.query_neighborhood, answered from the snapshot"""
+        results = []
+        for location_id in ids:
+            row = self.row.get(location_id)
+            if row is None:
+                continue
+            distances = {row: 0}
+            frontier = [row]
+            for distance in range(1, hops + 1):
+                reached = []
+                for current in frontier:
+                    for neighbor in self._neighbors(current):
+                        neighbor = int(neighbor)
+                        if neighbor not in distances:
+                            distances[neighbor] = distance
+                            reached.append(neighbor)
+                frontier = reached
+            neighbors = sorted(
+                (distance, self.ids[neighbor]) for neighbor, distance in distances.items() if neighbor != row
+            )[:limit]
+            results.append({
+                "location": dict(self.properties[row]),
+                "neighbors": [
+                    {**self._summary(self.row[neighbor_id]), "distance": distance}
+                    for distance, neighbor_id in neighbors
+                ],
+            })
+        return results
+
+    # Persistence
+    def save(self, path: str):
+        """Write the snapshot to an .npz file atomically"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = json.dumps({"properties": self.properties, "relations": self.relations, "version": self.version})
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, indptr=self.indptr, indices=self.indices, edge_types=self.edge_types,
+                 meta=np.array(meta))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "GraphSnapshot":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls(meta["properties"], data["indptr"], data["indices"], data["edge_types"],
+                       meta["relations"], meta.get("version"))
+
+
+class GraphSnapshotStore:
+    """Holds the current snapshot and swaps in a rebuilt one atomically
+
+    Readers take a reference to the current snapshot per call, so a refresh
+    never exposes a half-built graph; the new snapshot is fully built and
+    saved before the reference is replaced.
+    """
+
+    def __init__(self, snapshot: GraphSnapshot, path: Optional[str] = Config.GRAPH_SNAPSHOT_PATH):
+        self.path = path
+        self._snapshot = snapshot
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str = Config.GRAPH_SNAPSHOT_PATH, dataset_path: str = Config.DATASET_PATH,
+             version: Optional[str] = None) -> "GraphSnapshotStore":
+        """Load the saved snapshot, rebuilding it from the dataset if missing or stale"""
+        if path and os.path.exists(path):
+            snapshot = GraphSnapshot.load(path)
+            if version is None or snapshot.version == version:
+                return cls(snapshot, path)
+            logger.info("Graph snapshot is older than the synced data; rebuilding")
+        store = cls(GraphSnapshot.from_records(TextProcessor.parse_location_data(dataset_path), version), path)
+        if path:
+            store.snapshot.save(path)
+        return store
+
+    @property
+    def snapshot(self) -> GraphSnapshot:
+        return self._snapshot
+
+    def refresh(self, snapshot: GraphSnapshot):
+        """Persist and publish a new snapshot"""
+        with self._lock:
+            if self.path:
+                snapshot.save(self.path)
+            self._snapshot = snapshot
+        logger.info(f"Graph snapshot refreshed: {len(snapshot.ids)} nodes, version {snapshot.version}")
+
+    def query_neighborhood(self, ids: List[str], hops: int = 2, limit: int = 50) -> List[Dict]:
+        return self._snapshot.query_neighborhood(ids, hops, limit)
+
+    def routes_between(self, ids: List[str]) -> List[Dict]:
+        return self._snapshot.routes_between(ids)
+
+    def route(self, source: str, target: str) -> Optional[Dict]:
+        return self._snapshot.route(source, target)
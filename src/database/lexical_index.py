@@ -0,0 +1,134 @@
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from src.database.metadata_filter import matches
+from src.utils.config import Config
+from src.utils.entity_matcher import normalize
+from src.utils.text_processor import TextProcessor
+
+STOPWORDS = frozenset(
+    "a an and are at best can do for from going good how i in is it me my near of on "
+    "or should the there to visit want what when where which with".split()
+)
+
+# Field weights: a term in the name says more than one in the description
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "semantic_text": 1.0, "description": 0.5}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in normalize(text) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory BM25 inverted index over the dataset's name, tags and text fields
+
+    Also keeps each record's vector document so lexical hits can stand in for,
+    or be fused with, vector matches.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.documents: List[Dict] = []
+        self.by_id: Dict[str, Dict] = {}
+        self.lengths: List[float] = []
+        self.postings: Dict[str, List[tuple]] = defaultdict(list)  # term -> [(doc, weighted tf)]
+        self.idf: Dict[str, float] = {}
+        self.average_length = 0.0
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], **kwargs) -> "BM25Index":
+        index = cls(**kwargs)
+        for record in records:
+            index._add(record)
+        index._finalize()
+        return index
+
+    def _add(self, record: Dict):
+        doc = len(self.ids)
+        frequencies = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            value = record.get(field)
+            if not value:
+                continue
+            text = " ".join(value) if isinstance(value, list) else str(value)
+            for token in tokenize(text):
+                frequencies[token] += weight
+        for term, frequency in frequencies.items():
+            self.postings[term].append((doc, frequency))
+        self.ids.append(record['id'])
+        self.documents.append(TextProcessor.build_document(record))
+        self.by_id[record['id']] = self.documents[-1]
+        self.lengths.append(sum(frequencies.values()))
+
+    def _finalize(self):
+        total = len(self.ids)
+        self.average_length = (sum(self.lengths) / total) if total else 0.0
+        self.idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query: str, top_k: int = Config.TOP_K_RESULTS,
+               filter: Optional[Dict] = None) -> List[Dict]:
+        """Top-k documents by BM25 score, shaped like vector matches"""
+        terms = set(tokenize(query))
+        scores = defaultdict(float)
+        matched = defaultdict(float)
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, frequency in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc] / (self.average_length or 1.0))
+                scores[doc] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+                matched[doc] += idf
+        query_weight = sum(self.idf.get(term, 0.0) for term in terms) or 1.0
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if filter:
+            ranked = [(doc, score) for doc, score in ranked if matches(self.documents[doc], filter)]
+        ranked = ranked[:top_k]
+        return [
+            {
+                **self.documents[doc],
+                "score": round(score, 4),
+                # Share of the query's (idf-weighted) terms that this document contains
+                "coverage": round(matched[doc] / query_weight, 4),
+                "source": "lexical",
+            }
+            for doc, score in ranked
+        ]
+
+    @staticmethod
+    def is_confident(results: List[Dict],
+                     min_coverage: float = Config.LEXICAL_MIN_COVERAGE,
+                     min_margin: float = Config.LEXICAL_MIN_MARGIN) -> bool:
+        """True when the top hit covers the query and clearly beats the runner-up"""
+        if not results or results[0]["coverage"] < min_coverage:
+            return False
+        if len(results) == 1:
+            return True
+        return results[0]["score"] >= min_margin * results[1]["score"]
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[Dict]], k: int = 60,
+                           top_k: Optional[int] = None,
+                           documents: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+    """Fuse several ranked result lists by summing 1 / (k + rank) per id"""
+    scores = defaultdict(float)
+    items: Dict[str, Dict] = {}
+    for source, results in rankings.items():
+        for rank, item in enumerate(results or [], 1):
+            item_id = item["id"]
+            scores[item_id] += 1.0 / (k + rank)
+            if item_id not in items and item.get("content"):
+                items[item_id] = item
+    fused = []
+    for item_id, score in sorted(scores.items(), key=lambda entry: entry[1], reverse=True):
+        item = items.get(item_id) or (documents or {}).get(item_id)
+        if item is None:
+            continue
+        fused.append({**item, "score": round(score, 6)})
+    return fused[:top_k] if top_k else fused
@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.database.metadata_filter import MetadataIndex
+from src.models.embedding_engine import EmbeddingEngine
+from src.utils.config import Config
+from src.utils.metrics import traced
+from src.utils.text_processor import TextProcessor
+
+
+class _IndexState:
+    """One published version of the index: matrix, ids and metadata that belong together
+
+    Never modified once published; writers build a new state and swap the
+    reference, so a search that reads it once sees a consistent index. The
+    metadata posting lists are built on first filtered search of this state.
+    """
+
+    __slots__ = ("vectors", "ids", "metadata", "_metadata_index")
+
+    def __init__(self, vectors: np.ndarray, ids: List[str], metadata: List[Dict]):
+        self.vectors = vectors
+        self.ids = ids
+        self.metadata = metadata
+        self._metadata_index: Optional[MetadataIndex] = None
+
+    @property
+    def metadata_index(self) -> MetadataIndex:
+        # Two threads may both build it; the results are identical
+        if self._metadata_index is None:
+            self._metadata_index = MetadataIndex(self.metadata)
+        return self._metadata_index
+
+
+class LocalVectorManager:
+    """In-process vector index with the same contract as PineconeManager
+
+    Vectors live in one contiguous float32 matrix, L2-normalised at insert time
+    so cosine similarity is a single matrix-vector product. The matrix is saved
+    as a .npy file and memory-mapped on load. Filtered searches first narrow the
+    rows with posting lists over the structured metadata, then score only those.
+    Writes publish a new immutable state, so searches never lock.
+    """
+
+    def __init__(self,
+                 index_path: str = Config.LOCAL_INDEX_PATH,
+                 dimension: int = Config.PINECONE_DIMENSION,
+                 embedder: Optional[EmbeddingEngine] = None):
+        self.index_path = index_path
+        self.dimension = dimension
+        self.embedder = embedder if embedder is not None else EmbeddingEngine()
+        self._lock = threading.Lock()
+        self._vectors_file = os.path.join(index_path, "vectors.npy")
+        self._meta_file = os.path.join(index_path, "metadata.json")
+        self._state = _IndexState(np.zeros((0, dimension), dtype=np.float32), [], [])
+        self._load()
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._state.vectors
+
+    @property
+    def ids(self) -> List[str]:
+        return self._state.ids
+
+    @property
+    def metadata(self) -> List[Dict]:
+        return self._state.metadata
+
+    def _load(self):
+        """Memory-map a previously saved index, if there is one"""
+        if not (os.path.exists(self._vectors_file) and os.path.exists(self._meta_file)):
+            return
+        with open(self._meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        vectors = np.load(self._vectors_file, mmap_mode='r')
+        if vectors.shape[1] != self.dimension or vectors.shape[0] != len(meta["ids"]):
+            raise ValueError(f"Local index at {self.index_path} does not match its metadata")
+        self._state = _IndexState(vectors, meta["ids"], meta["metadata"])
+
+    def _publish(self, vectors: np.ndarray, ids: List[str], metadata: List[Dict]):
+        """Write the index atomically, then swap in the new state; called with the lock held"""
+        os.makedirs(self.index_path, exist_ok=True)
+        tmp_vectors = self._vectors_file + ".tmp.npy"
+        tmp_meta = self._meta_file + ".tmp"
+        np.save(tmp_vectors, np.ascontiguousarray(vectors, dtype=np.float32))
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({"ids": ids, "metadata": metadata}, f)
+        os.replace(tmp_vectors, self._vectors_file)
+        os.replace(tmp_meta, self._meta_file)
+        self._state = _IndexState(np.load(self._vectors_file, mmap_mode='r'), ids, metadata)
+
+    def metadata_index(self) -> MetadataIndex:
+        """Posting lists over the current metadata, rebuilt after writes"""
+        return self._state.metadata_index
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @traced("get_embedding")
+    def get_embedding(self, text: str) -> List[float]:
+        """Get embedding for text using the shared embedding engine"""
+        try:
+            return self.embedder.embed(text)
+        except Exception as e:
+            raise Exception(f"Failed to generate embedding: {str(e)}")
+
+    def upsert_vectors(self, ids: List[str], vectors, metadata: List[Dict]):
+        """Insert or replace vectors by id"""
+        matrix = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimension))
+        with self._lock:
+            state = self._state
+            current = np.array(state.vectors, dtype=np.float32)
+            all_ids, all_metadata = list(state.ids), list(state.metadata)
+            positions = {vector_id: row for row, vector_id in enumerate(all_ids)}
+            new_rows = []
+            for vector_id, vector, meta in zip(ids, matrix, metadata):
+                row = positions.get(vector_id)
+                if row is None:
+                    positions[vector_id] = len(all_ids)
+                    all_ids.append(vector_id)
+                    all_metadata.append(meta)
+                    new_rows.append(vector)
+                else:
+                    current[row] = vector
+                    all_metadata[row] = meta
+            if new_rows:
+                current = np.vstack([current, np.stack(new_rows)])
+            self._publish(current, all_ids, all_metadata)
+
+    def bulk_load(self, ids: List[str], vectors, metadata: List[Dict], batch_size: int = 0,
+                  replace: bool = False) -> int:
+        """Load precomputed vectors in one write; returns the batch count (always 1)
+
+        The index file is rewritten on every write, so batching would only
+        add work; batch_size is accepted for parity with PineconeManager.
+        With replace, existing vectors are dropped first, so ids missing from
+        the load do not survive it. An empty index takes the matrix as is
+        instead of merging row by row.
+        """
+        with self._lock:
+            if (replace or not self._state.ids) and len(set(ids)) == len(ids):
+                matrix = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimension))
+                self._publish(matrix, list(ids), list(metadata))
+                return 1
+            if replace:
+                self._publish(np.zeros((0, self.dimension), dtype=np.float32), [], [])
+        self.upsert_vectors(ids, vectors, metadata)
+        return 1
+
+    @traced("ingest_vectors")
+    def upsert_texts(self, texts: List[Dict[str, str]], batch_size: int = 50):
+        """Embed texts and store them in the local index"""
+        try:
+            embeddings = self.embedder.embed_texts([text_dict['content'] for text_dict in texts])
+        except Exception as e:
+            raise Exception(f"Failed to generate embeddings: {str(e)}")
+        ids = [text_dict.get('id', str(i)) for i, text_dict in enumerate(texts)]
+        metadata = [TextProcessor.document_metadata(text_dict) for text_dict in texts]
+        self.upsert_vectors(ids, embeddings, metadata)
+        print(f"Upserted {len(texts)} vectors into local index '{self.index_path}'")
+
+    def delete(self, ids: List[str]):
+        """Delete vectors by id"""
+        doomed = set(ids)
+        with self._lock:
+            state = self._state
+            keep = [row for row, vector_id in enumerate(state.ids) if vector_id not in doomed]
+            if len(keep) == len(state.ids):
+                return
+            self._publish(
+                np.array(state.vectors[keep], dtype=np.float32),
+                [state.ids[row] for row in keep],
+                [state.metadata[row] for row in keep]
+            )
+
+    @traced("vector_search")
+    def search(self, query_vector, top_k: int = 5, filter: Optional[Dict] = None) -> List[Dict]:
+        """Exact cosine top-k, over the rows matching the filter when one is given"""
+        # One read of the published state; concurrent writes swap in a new one
+        state = self._state
+        vectors = state.vectors
+        if len(vectors) == 0:
+            return []
+        query = self._normalize(np.asarray(query_vector, dtype=np.float32))
+        if filter:
+            rows = state.metadata_index.candidates(filter)
+            if len(rows) == 0:
+                return []
+            scores = vectors[rows] @ query
+        else:
+            rows = None
+            scores = vectors @ query
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                **state.metadata[row if rows is None else rows[row]],
+                "id": state.ids[row if rows is None else rows[row]],
+                "score": float(scores[row])
+            }
+            for row in top
+        ]
+
+    @traced("vector_query")
+    def query(self, query_text: str, top_k: int = 5, filter: Optional[Dict] = None) -> List[Dict]:
+        """Query the local index"""
+        try:
+            return self.search(self.get_embedding(query_text), top_k, filter=filter)
+        except Exception as e:
+            raise Exception(f"Failed to query index: {str(e)}")
+
+    def evaluate_recall(self, query_vectors, top_k: int = 5) -> float:
+        """Mean recall@k of search() against a float64 brute-force ranking"""
+        state = self._state
+        exact = np.asarray(state.vectors, dtype=np.float64)
+        recalls = []
+        for query_vector in query_vectors:
+            query = np.asarray(query_vector, dtype=np.float64)
+            query = query / (np.linalg.norm(query) or 1.0)
+            expected = {state.ids[row] for row in np.argsort(-(exact @ query))[:top_k]}
+            found = {match["id"] for match in self.search(query_vector, top_k)}
+            recalls.append(len(found & expected) / len(expected) if expected else 1.0)
+        return float(np.mean(recalls)) if recalls else 1.0
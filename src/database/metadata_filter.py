@@ -0,0 +1,141 @@
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Structured fields carried in vector metadata and indexed for pre-filtering
+FILTERABLE_FIELDS = ("type", "city", "region", "tags", "best_time_to_visit")
+
+
+def _values(value) -> List:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def _operand(condition) -> Dict:
+    # A bare value is shorthand for {"$eq": value}, as in Pinecone
+    return condition if isinstance(condition, dict) else {"$eq": condition}
+
+
+def matches(metadata: Dict, filter: Optional[Dict]) -> bool:
+    """Evaluate a Pinecone-style filter expression against one metadata dict
+
+    Supports $eq, $ne, $in, $nin, $exists, $and and $or. List-valued fields
+    (such as tags) match when any element matches.
+    """
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, clause) for clause in condition):
+                return False
+        elif not _matches_field(metadata.get(key), _operand(condition)):
+            return False
+    return True
+
+
+def _matches_field(value, condition: Dict) -> bool:
+    present = _values(value)
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            ok = operand in present
+        elif operator == "$ne":
+            ok = operand not in present
+        elif operator == "$in":
+            ok = any(item in present for item in operand)
+        elif operator == "$nin":
+            ok = not any(item in present for item in operand)
+        elif operator == "$exists":
+            ok = bool(present) == bool(operand)
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+        if not ok:
+            return False
+    return True
+
+
+class MetadataIndex:
+    """Posting lists over the filterable metadata fields of a vector index
+
+    Each (field, value) pair maps to the sorted row numbers holding it. A
+    filter is evaluated into a boolean row mask by combining posting lists, so
+    only the surviving rows need to be scored. Fields without posting lists
+    fall back to evaluating the clause row by row.
+    """
+
+    def __init__(self, metadata: List[Dict], fields=FILTERABLE_FIELDS):
+        self.size = len(metadata)
+        self.fields = set(fields)
+        self.metadata = metadata
+        postings = defaultdict(list)
+        for row, meta in enumerate(metadata):
+            for field in self.fields:
+                for value in _values(meta.get(field)):
+                    postings[(field, value)].append(row)
+        self.postings = {key: np.asarray(rows, dtype=np.int64) for key, rows in postings.items()}
+        self._present = {}
+
+    def rows(self, field: str, value) -> np.ndarray:
+        return self.postings.get((field, value), np.empty(0, dtype=np.int64))
+
+    def _posting_mask(self, field: str, values) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        for value in values:
+            mask[self.rows(field, value)] = True
+        return mask
+
+    def _exists_mask(self, field: str) -> np.ndarray:
+        if field not in self._present:
+            mask = np.zeros(self.size, dtype=bool)
+            for (key, _), rows in self.postings.items():
+                if key == field:
+                    mask[rows] = True
+            self._present[field] = mask
+        return self._present[field]
+
+    def _field_mask(self, field: str, condition: Dict) -> np.ndarray:
+        if field not in self.fields:
+            return np.fromiter(
+                (_matches_field(meta.get(field), condition) for meta in self.metadata),
+                dtype=bool, count=self.size
+            )
+        mask = np.ones(self.size, dtype=bool)
+        for operator, operand in condition.items():
+            if operator == "$eq":
+                mask &= self._posting_mask(field, [operand])
+            elif operator == "$ne":
+                mask &= ~self._posting_mask(field, [operand])
+            elif operator == "$in":
+                mask &= self._posting_mask(field, operand)
+            elif operator == "$nin":
+                mask &= ~self._posting_mask(field, operand)
+            elif operator == "$exists":
+                present = self._exists_mask(field)
+                mask &= present if operand else ~present
+            else:
+                raise ValueError(f"Unsupported filter operator: {operator}")
+        return mask
+
+    def mask(self, filter: Optional[Dict]) -> np.ndarray:
+        """Boolean mask of the rows matching a filter expression"""
+        mask = np.ones(self.size, dtype=bool)
+        for key, condition in (filter or {}).items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self.mask(clause)
+            elif key == "$or":
+                either = np.zeros(self.size, dtype=bool)
+                for clause in condition:
+                    either |= self.mask(clause)
+                mask &= either
+            else:
+                mask &= self._field_mask(key, _operand(condition))
+        return mask
+
+    def candidates(self, filter: Optional[Dict]) -> np.ndarray:
+        """Row numbers matching a filter expression, in ascending order"""
+        return np.flatnonzero(self.mask(filter))
@@ -1,52 +1,207 @@
-from neo4j import GraphDatabase
-import json
-from typing import Dict, List
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-class Neo4jManager:
-    def __init__(self):
-        self.uri = os.getenv("NEO4J_URI")
-        self.user = os.getenv("NEO4J_USER")
-        self.password = os.getenv("NEO4J_PASSWORD")
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
-
-    def close(self):
-        self.driver.close()
-
-    def create_location_node(self, tx, location: Dict):
-        query = """
-        CREATE (l:Location {
-            name: $name,
-            type: $type,
-            country: $country,
-            description: $description
-        })
-        """
-        tx.run(query, **location)
-
-    def create_relationship(self, tx, location1: str, location2: str, relationship_type: str):
-        query = """
-        MATCH (l1:Location {name: $loc1})
-        MATCH (l2:Location {name: $loc2})
-        CREATE (l1)-[r:%s]->(l2)
-        """ % relationship_type
-        tx.run(query, loc1=location1, loc2=location2)
-
-    def load_locations(self, locations_file: str):
-        with open(locations_file, 'r') as f:
-            locations = json.load(f)
-        
-        with self.driver.session() as session:
-            for location in locations:
-                session.execute_write(self.create_location_node, location)
-
-    def query_location(self, name: str) -> Dict:
-        with self.driver.session() as session:
-            result = session.run(
-                "MATCH (l:Location {name: $name}) RETURN l",
-                name=name
-            )
-            return result.single()[0] if result.peek() else None
\ No newline at end of file
+from neo4j import GraphDatabase
+import json
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List
+import os
+from dotenv import load_dotenv
+from src.utils.config import Config
+from src.utils.metrics import traced
+from src.utils.text_processor import TextProcessor
+
+load_dotenv()
+
+RELATIONSHIP_TYPE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+class Neo4jManager:
+    def __init__(self, driver=None):
+        self.uri = os.getenv("NEO4J_URI")
+        self.user = os.getenv("NEO4J_USER")
+        self.password = os.getenv("NEO4J_PASSWORD")
+        self.driver = driver if driver is not None else GraphDatabase.driver(self.uri, auth=(self.user, self.password))
+
+    def close(self):
+        self.driver.close()
+
+    @staticmethod
+    def node_properties(location: Dict) -> Dict:
+        """Node properties for a location record, keyed by a stable id"""
+        properties = {
+            key: value for key, value in location.items()
+            if key != "connections" and value is not None
+        }
+        properties.setdefault("id", location["name"])
+        return properties
+
+    def create_location_node(self, tx, location: Dict):
+        query = """
+        MERGE (l:Location {id: $id})
+        SET l += $properties
+        """
+        properties = self.node_properties(location)
+        tx.run(query, id=properties["id"], properties=properties)
+
+    def delete_location_nodes(self, tx, ids: List[str]):
+        tx.run("MATCH (l:Location) WHERE l.id IN $ids DETACH DELETE l", ids=ids)
+
+    @staticmethod
+    def relationship_type(name: str) -> str:
+        """Validate a relationship type before it is placed in a Cypher string"""
+        if not RELATIONSHIP_TYPE.match(name or ""):
+            raise ValueError(f"Invalid relationship type: {name!r}")
+        return name
+
+    def create_relationship(self, tx, location1: str, location2: str, relationship_type: str):
+        query = """
+        MATCH (l1:Location {name: $loc1})
+        MATCH (l2:Location {name: $loc2})
+        CREATE (l1)-[r:%s]->(l2)
+        """ % self.relationship_type(relationship_type)
+        tx.run(query, loc1=location1, loc2=location2)
+
+    def create_schema(self):
+        """Create the uniqueness constraint and lookup indexes used by MERGE"""
+        with self.driver.session() as session:
+            session.run(
+                "CREATE CONSTRAINT location_id IF NOT EXISTS "
+                "FOR (l:Location) REQUIRE l.id IS UNIQUE"
+            )
+            session.run(
+                "CREATE INDEX location_name IF NOT EXISTS "
+                "FOR (l:Location) ON (l.name)"
+            )
+
+    @staticmethod
+    def merge_nodes_batch(tx, rows: List[Dict]):
+        tx.run(
+            """
+            UNWIND $rows AS row
+            MERGE (l:Location {id: row.id})
+            SET l += row
+            """,
+            rows=rows
+        )
+
+    @staticmethod
+    def clear_outgoing_batch(tx, ids: List[str]):
+        tx.run(
+            "MATCH (l:Location)-[r]->() WHERE l.id IN $ids DELETE r",
+            ids=ids
+        )
+
+    @staticmethod
+    def merge_relationships_batch(tx, query: str, rows: List[Dict]):
+        tx.run(query, rows=rows)
+
+    @traced("ingest_graph")
+    def bulk_load(self, locations: List[Dict], batch_size: int = Config.NEO4J_BATCH_SIZE) -> Dict:
+        """Load nodes and their connections with batched UNWIND statements"""
+        self.create_schema()
+        rows = [self.node_properties(location) for location in locations]
+        relationships = defaultdict(list)
+        for relationship in TextProcessor.extract_relationships(locations):
+            relationships[self.relationship_type(relationship['type'])].append(
+                {"source": relationship['source'], "target": relationship['target']}
+            )
+
+        with self.driver.session() as session:
+            start = time.perf_counter()
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i:i + batch_size]
+                session.execute_write(self.merge_nodes_batch, batch)
+                # Connections are replaced, not accumulated, when a record changes
+                session.execute_write(self.clear_outgoing_batch, [row["id"] for row in batch])
+            node_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            edge_count = 0
+            for relationship_type, edges in relationships.items():
+                # One query string per type keeps the server's plan cache warm
+                query = f"""
+                UNWIND $rows AS row
+                MATCH (a:Location {{id: row.source}})
+                MATCH (b:Location {{id: row.target}})
+                MERGE (a)-[:{relationship_type}]->(b)
+                """
+                for i in range(0, len(edges), batch_size):
+                    session.execute_write(self.merge_relationships_batch, query, edges[i:i + batch_size])
+                edge_count += len(edges)
+            edge_seconds = time.perf_counter() - start
+
+        stats = {
+            "nodes": len(rows),
+            "edges": edge_count,
+            "node_seconds": round(node_seconds, 3),
+            "edge_seconds": round(edge_seconds, 3),
+            "nodes_per_sec": round(len(rows) / node_seconds, 1) if node_seconds else 0.0,
+            "edges_per_sec": round(edge_count / edge_seconds, 1) if edge_seconds else 0.0,
+        }
+        print(
+            f"Loaded {stats['nodes']} nodes ({stats['nodes_per_sec']}/sec) and "
+            f"{stats['edges']} relationships ({stats['edges_per_sec']}/sec)"
+        )
+        return stats
+
+    def load_locations(self, locations_file: str):
+        with open(locations_file, 'r') as f:
+            locations = json.load(f)
+        self.upsert_locations(locations)
+
+    def upsert_locations(self, locations: List[Dict]):
+        if not locations:
+            return
+        self.bulk_load(locations)
+
+    def delete_locations(self, ids: List[str]):
+        if not ids:
+            return
+        with self.driver.session() as session:
+            session.execute_write(self.delete_location_nodes, ids)
+
+    @traced("graph_query")
+    def query_location(self, name: str) -> Dict:
+        with self.driver.session() as session:
+            result = session.run(
+                "MATCH (l:Location {name: $name}) RETURN l",
+                name=name
+            )
+            return result.single()[0] if result.peek() else None
+
+    def list_locations(self) -> List[Dict]:
+        """id, name and type of every location, e.g. to build an EntityMatcher"""
+        with self.driver.session() as session:
+            result = session.run("MATCH (l:Location) RETURN l.id AS id, l.name AS name, l.type AS type")
+            return [record.data() for record in result]
+
+    def export_graph(self):
+        """All location nodes with their properties, and all relationships between them"""
+        with self.driver.session() as session:
+            nodes = [record["location"] for record in session.run("MATCH (l:Location) RETURN l {.*} AS location")]
+            relationships = [
+                record.data() for record in session.run(
+                    "MATCH (a:Location)-[r]->(b:Location) "
+                    "RETURN a.id AS source, type(r) AS type, b.id AS target"
+                )
+            ]
+        return nodes, relationships
+
+    @traced("graph_neighborhood")
+    def query_neighborhood(self, ids: List[str], hops: int = 2, limit: int = 50) -> List[Dict]:
+        """Fetch several locations and their 1..hops neighborhoods in one query"""
+        if not ids:
+            return []
+        if hops not in (1, 2):
+            raise ValueError("hops must be 1 or 2")
+        query = """
+        MATCH (l:Location) WHERE l.id IN $ids
+        OPTIONAL MATCH p = (l)-[*1..%d]-(n:Location)
+        WHERE n <> l
+        WITH l, n, min(length(p)) AS distance
+        ORDER BY distance
+        WITH l, collect(n {.id, .name, .type, distance: distance})[..$limit] AS neighbors
+        RETURN l {.*} AS location, neighbors
+        """ % hops
+        with self.driver.session() as session:
+            result = session.run(query, ids=ids, limit=limit)
+            return [record.data() for record in result]
@@ -1,121 +1,189 @@
-import pinecone
-import openai
-import os
-import time
-from typing import List, Dict
-from dotenv import load_dotenv
-
-load_dotenv()
-
-class PineconeManager:
-    def __init__(self):
-        self.api_key = os.getenv("PINECONE_API_KEY")
-        self.environment = os.getenv("PINECONE_ENVIRONMENT")
-        self.index_name = "travel-knowledge"
-        
-        if not self.api_key or not self.environment:
-            raise ValueError("Pinecone API key and environment must be set in .env file")
-        
-        # Initialize Pinecone with error handling
-        self._init_pinecone()
-
-    def _init_pinecone(self):
-        """Initialize Pinecone connection with error handling"""
-        try:
-            pinecone.init(
-                api_key=self.api_key,
-                environment=self.environment
-            )
-        except Exception as e:
-            raise ConnectionError(f"Failed to initialize Pinecone: {str(e)}")
-
-    def _initialize_index(self, max_retries=3):
-        """Initialize Pinecone index with retry logic"""
-        for attempt in range(max_retries):
-            try:
-                # First, check and delete existing index if it exists
-                existing_indexes = pinecone.list_indexes()
-                if self.index_name in existing_indexes:
-                    print(f"Deleting existing index '{self.index_name}'...")
-                    pinecone.delete_index(self.index_name)
-                    time.sleep(20)  # Wait for deletion to complete
-                
-                # Create new index with starter (free tier) configuration
-                print(f"Creating new index '{self.index_name}'...")
-                pinecone.create_index(
-                    name=self.index_name,
-                    dimension=1536,
-                    metric="cosine",
-                    pod_type="starter"  # Changed to starter for free tier
-                )
-                # Wait for index to be ready
-                time.sleep(20)
-                
-                self.index = pinecone.Index(self.index_name)
-                print(f"Successfully initialized index '{self.index_name}'")
-                break
-                
-            except Exception as e:
-                if "no pod quota available" in str(e).lower():
-                    print("Attempting to clean up and recreate index...")
-                    # Delete all indexes to free up quota
-                    for idx in pinecone.list_indexes():
-                        pinecone.delete_index(idx)
-                        time.sleep(20)
-                    
-                    if attempt == max_retries - 1:
-                        raise Exception(
-                            "Unable to create index. Please ensure:\n"
-                            "1. You're using a valid API key\n"
-                            "2. You've deleted any unused indexes\n"
-                            "3. You're within the free tier limits\n"
-                            "Visit https://app.pinecone.io to manage your indexes"
-                        )
-                    time.sleep(30)  # Wait longer before retry
-                    continue
-                
-                raise Exception(f"Failed to initialize Pinecone index: {str(e)}")
-
-    def get_embedding(self, text: str) -> List[float]:
-        """Get embedding for text using OpenAI API"""
-        try:
-            response = openai.Embedding.create(
-                input=text,
-                model="text-embedding-ada-002"
-            )
-            return response['data'][0]['embedding']
-        except Exception as e:
-            raise Exception(f"Failed to generate embedding: {str(e)}")
-
-    def upsert_texts(self, texts: List[Dict[str, str]], batch_size: int = 50):
-        """Upsert texts to Pinecone index with smaller batch size"""
-        vectors = []
-        for i, text_dict in enumerate(texts):
-            embedding = self.get_embedding(text_dict['content'])
-            vectors.append((
-                str(i),
-                embedding,
-                {"content": text_dict['content'], "type": text_dict['type']}
-            ))
-        
-        # Upsert in smaller batches
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i:i + batch_size]
-            try:
-                self.index.upsert(vectors=batch)
-                print(f"Upserted batch {i//batch_size + 1}/{len(vectors)//batch_size + 1}")
-            except Exception as e:
-                raise Exception(f"Failed to upsert batch: {str(e)}")
-
-    def query(self, query_text: str, top_k: int = 5) -> List[Dict]:
-        """Query the Pinecone index"""
-        try:
-            query_embedding = self.get_embedding(query_text)
-            results = self.index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True
-            )
-            return [match.metadata for match in results.matches]
-        except Exception as e:
-            raise Exception(f"Failed to query index: {str(e)}")
\ No newline at end of file
+import pinecone
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from dotenv import load_dotenv
+from src.models.embedding_engine import EmbeddingEngine
+from src.utils.config import Config
+from src.utils.text_processor import TextProcessor
+from src.utils.metrics import traced
+from src.utils.rate_limiter import RequestScheduler, backoff_delay, get_scheduler, wait_for
+
+load_dotenv()
+
+class PineconeManager:
+    def __init__(self, embedder: Optional[EmbeddingEngine] = None, index=None,
+                 scheduler: Optional[RequestScheduler] = None):
+        self.embedder = embedder if embedder is not None else EmbeddingEngine()
+        self.scheduler = scheduler if scheduler is not None else get_scheduler("vector_index")
+        self.api_key = os.getenv("PINECONE_API_KEY")
+        self.environment = os.getenv("PINECONE_ENVIRONMENT")
+        self.index_name = "travel-knowledge"
+
+        if index is not None:
+            # An already connected index (or a local stand-in) was supplied
+            self.index = index
+            return
+        
+        if not self.api_key or not self.environment:
+            raise ValueError("Pinecone API key and environment must be set in .env file")
+        
+        # Initialize Pinecone with error handling
+        self._init_pinecone()
+        self._initialize_index()
+
+    def _init_pinecone(self):
+        """Initialize Pinecone connection with error handling"""
+        try:
+            pinecone.init(
+                api_key=self.api_key,
+                environment=self.environment
+            )
+        except Exception as e:
+            raise ConnectionError(f"Failed to initialize Pinecone: {str(e)}")
+
+    def _initialize_index(self, max_retries=3):
+        """Connect to the Pinecone index, creating it only if it does not exist"""
+        for attempt in range(max_retries):
+            try:
+                existing_indexes = pinecone.list_indexes()
+                if self.index_name not in existing_indexes:
+                    # Create new index with starter (free tier) configuration
+                    print(f"Creating new index '{self.index_name}'...")
+                    pinecone.create_index(
+                        name=self.index_name,
+                        dimension=1536,
+                        metric="cosine",
+                        pod_type="starter"  # Changed to starter for free tier
+                    )
+                    self._wait_until_ready()
+
+                self.index = pinecone.Index(self.index_name)
+                print(f"Successfully initialized index '{self.index_name}'")
+                break
+
+            except Exception as e:
+                if "no pod quota available" in str(e).lower():
+                    if attempt == max_retries - 1:
+                        raise Exception(
+                            "Unable to create index. Please ensure:\n"
+                            "1. You're using a valid API key\n"
+                            "2. You've deleted any unused indexes\n"
+                            "3. You're within the free tier limits\n"
+                            "Visit https://app.pinecone.io to manage your indexes"
+                        )
+                    time.sleep(backoff_delay(attempt + 2))
+                    continue
+
+                raise Exception(f"Failed to initialize Pinecone index: {str(e)}")
+
+    def _wait_until_ready(self, timeout: float = Config.INDEX_READY_TIMEOUT):
+        """Poll the index status until Pinecone reports it ready"""
+        def ready():
+            status = getattr(pinecone.describe_index(self.index_name), "status", None) or {}
+            return bool(status.get("ready"))
+
+        waited = wait_for(ready, timeout, description=f"index '{self.index_name}' to be ready")
+        print(f"Index '{self.index_name}' ready after {waited:.1f}s")
+
+    @traced("get_embedding")
+    def get_embedding(self, text: str) -> List[float]:
+        """Get embedding for text using OpenAI API"""
+        try:
+            return self.embedder.embed(text)
+        except Exception as e:
+            raise Exception(f"Failed to generate embedding: {str(e)}")
+
+    @traced("ingest_vectors")
+    def upsert_texts(self, texts: List[Dict[str, str]], batch_size: int = 50):
+        """Upsert texts to Pinecone index with smaller batch size"""
+        try:
+            embeddings = self.embedder.embed_texts([text_dict['content'] for text_dict in texts])
+        except Exception as e:
+            raise Exception(f"Failed to generate embeddings: {str(e)}")
+        stats = self.embedder.stats()
+        print(
+            f"Embedded {len(texts)} texts: {stats['cache_hits']} cache hits, "
+            f"{stats['cache_misses']} misses, {stats['texts_per_sec']} texts/sec"
+        )
+
+        self.upsert_vectors(
+            [text_dict.get('id', str(i)) for i, text_dict in enumerate(texts)],
+            embeddings,
+            [TextProcessor.document_metadata(text_dict) for text_dict in texts],
+            batch_size=batch_size
+        )
+
+    def upsert_vectors(self, ids: List[str], vectors, metadata: List[Dict],
+                       batch_size: int = 50, verbose: bool = True) -> int:
+        """Upsert precomputed vectors in concurrent batches; returns the batch count"""
+        # Upsert batches concurrently; the scheduler holds them to the index's rate limits
+        starts = range(0, len(ids), batch_size)
+        workers = max(1, min(len(starts), self.scheduler.concurrency.maximum))
+
+        def upsert(start: int):
+            end = start + batch_size
+            # numpy rows become plain lists for the client
+            values = vectors[start:end]
+            values = values.tolist() if hasattr(values, "tolist") else values
+            return self.scheduler.call(self.index.upsert, vectors=list(zip(ids[start:end], values, metadata[start:end])))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(upsert, start) for start in starts]
+            for number, future in enumerate(futures, 1):
+                try:
+                    future.result()
+                    if verbose:
+                        print(f"Upserted batch {number}/{len(futures)}")
+                except Exception as e:
+                    raise Exception(f"Failed to upsert batch: {str(e)}")
+        return len(futures)
+
+    def bulk_load(self, ids: List[str], vectors, metadata: List[Dict],
+                  batch_size: int = Config.SNAPSHOT_RESTORE_BATCH_SIZE, replace: bool = False) -> int:
+        """Load precomputed vectors (e.g. a restored snapshot) without embedding calls
+
+        With replace, every vector in the index is deleted first.
+        """
+        if replace:
+            try:
+                self.scheduler.call(self.index.delete, delete_all=True)
+            except Exception as e:
+                raise Exception(f"Failed to clear index: {str(e)}")
+        return self.upsert_vectors(ids, vectors, metadata, batch_size=batch_size, verbose=False)
+
+    def delete(self, ids: List[str], batch_size: int = 1000):
+        """Delete vectors by id"""
+        for i in range(0, len(ids), batch_size):
+            try:
+                self.scheduler.call(self.index.delete, ids=ids[i:i + batch_size])
+            except Exception as e:
+                raise Exception(f"Failed to delete vectors: {str(e)}")
+
+    @traced("vector_search")
+    def search(self, query_vector: List[float], top_k: int = 5, filter: Optional[Dict] = None) -> List[Dict]:
+        """Query the Pinecone index with a precomputed embedding
+
+        filter takes Pinecone's metadata filter syntax, e.g.
+        {"type": "Hotel", "city": "Da Nang", "tags": {"$in": ["beach"]}}.
+        """
+        results = self.scheduler.call(
+            self.index.query,
+            vector=query_vector,
+            top_k=top_k,
+            include_metadata=True,
+            filter=filter
+        )
+        return [
+            {**match.metadata, "id": match.id, "score": match.score}
+            for match in results.matches
+        ]
+
+    @traced("vector_query")
+    def query(self, query_text: str, top_k: int = 5, filter: Optional[Dict] = None) -> List[Dict]:
+        """Query the Pinecone index"""
+        try:
+            return self.search(self.get_embedding(query_text), top_k, filter=filter)
+        except Exception as e:
+            raise Exception(f"Failed to query index: {str(e)}")
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.config import Config
+from src.utils.metrics import traced
+from src.utils.text_processor import TextProcessor
+
+logger = logging.getLogger(__name__)
+
+# Bump when the documents or metadata written for a record change shape, so
+# the next sync rewrites every record instead of only the changed ones
+DOCUMENT_SCHEMA = 3
+
+
+def record_fingerprint(record: Dict) -> str:
+    """Content hash of a dataset record, independent of key order"""
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def manifest_version(manifest_path: str = Config.SYNC_MANIFEST_PATH) -> Optional[str]:
+    """Version hash written by the last successful sync, or None
+
+    Reads the manifest; long-running callers use the registry's cached
+    "data_version" resource, which is refreshed after each sync.
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("version")
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def forget_documents(manifest_path: str = Config.SYNC_MANIFEST_PATH) -> bool:
+    """Drop the manifest's document fingerprints so the next sync rewrites every document
+
+    For when the vector index was replaced behind the sync's back (e.g. by a
+    snapshot restore). Records are kept, so the graph is not re-upserted.
+    Returns whether there was a manifest to update.
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    manifest["documents"] = {}
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+    return True
+
+
+class DatasetSync:
+    """Incremental, idempotent sync of the dataset into Neo4j and the vector index
+
+    A manifest of per-record and per-document fingerprints is kept on disk.
+    Each run upserts only new or changed records into the graph, rewrites only
+    the vector documents whose content changed, and deletes records that
+    disappeared from the dataset, in both stores. The manifest is written only after both stores
+    have been updated, so a failed run is simply retried on the next start.
+    """
+
+    def __init__(self, neo4j, vector_store, manifest_path: str = Config.SYNC_MANIFEST_PATH):
+        self.neo4j = neo4j
+        self.vector_store = vector_store
+        self.manifest_path = manifest_path
+        self.backend = type(vector_store).__name__
+
+    def _read_manifest(self) -> Optional[Dict]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_manifest(self) -> Dict:
+        empty = {"backend": self.backend, "schema": DOCUMENT_SCHEMA, "version": None, "records": {}, "documents": {}}
+        manifest = self._read_manifest()
+        if manifest is None:
+            return empty
+        if manifest.get("backend") != self.backend:
+            # A different vector backend has none of our vectors yet
+            return empty
+        if manifest.get("schema", 1) != DOCUMENT_SCHEMA:
+            logger.info("Document schema changed; re-syncing every record")
+            return empty
+        return manifest
+
+    def save_manifest(self, records: Dict[str, str], documents: Optional[Dict[str, str]] = None):
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        version = hashlib.sha256(
+            "".join(f"{key}:{value}" for key, value in sorted(records.items())).encode("utf-8")
+        ).hexdigest()
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "backend": self.backend, "schema": DOCUMENT_SCHEMA, "version": version,
+                "records": records, "documents": documents or {},
+            }, f)
+        os.replace(tmp_path, self.manifest_path)
+        return version
+
+    def plan(self, records: List[Dict], full: bool = False) -> Tuple[List[Dict], List[str], Dict[str, str]]:
+        """Split records into (changed, removed ids, new fingerprints)
+
+        `full` marks every record as changed. Removals are always worked out
+        from the manifest on disk, even one written for another backend or
+        schema, so ids that left the dataset are deleted rather than forgotten.
+        """
+        previous = {} if full else self.load_manifest()["records"]
+        recorded = (self._read_manifest() or {}).get("records", {})
+        fingerprints = {}
+        changed = []
+        for record in records:
+            if record['id'] in fingerprints:
+                raise ValueError(f"Duplicate record id in dataset: {record['id']}")
+            fingerprint = record_fingerprint(record)
+            fingerprints[record['id']] = fingerprint
+            if previous.get(record['id']) != fingerprint:
+                changed.append(record)
+        removed = [record_id for record_id in recorded if record_id not in fingerprints]
+        return changed, removed, fingerprints
+
+    @staticmethod
+    def documents(records: List[Dict]) -> List[Dict]:
+        """Vector documents for every record
+
+        Documents carry their city's region and best time to visit and a
+        summary of their graph neighbourhood, so one record's change can alter
+        the documents of other records; see stale_documents.
+        """
+        enriched = TextProcessor.attach_neighborhoods(TextProcessor.inherit_city_fields(records))
+        return [TextProcessor.build_document(record) for record in enriched]
+
+    @staticmethod
+    def stale_documents(documents: List[Dict], previous: Dict[str, str]) -> Tuple[List[Dict], Dict[str, str]]:
+        """Split out the documents whose content differs from the last sync
+
+        Returns (documents to write, fingerprints of all documents). Comparing
+        whole documents catches every neighbour a change reaches, such as the
+        city a hotel moved out of, without rewriting the ones it does not.
+        """
+        fingerprints = {document['id']: record_fingerprint(document) for document in documents}
+        stale = [document for document in documents if previous.get(document['id']) != fingerprints[document['id']]]
+        return stale, fingerprints
+
+    @traced("sync")
+    def sync(self, records: List[Dict], full: bool = False) -> Dict:
+        """Bring both stores in line with the given records"""
+        start = time.perf_counter()
+        changed, removed, fingerprints = self.plan(records, full=full)
+
+        if removed:
+            logger.info(f"Deleting {len(removed)} removed records...")
+            self.neo4j.delete_locations(removed)
+            self.vector_store.delete(removed)
+        if changed:
+            logger.info(f"Upserting {len(changed)} new or changed records...")
+            self.neo4j.upsert_locations(changed)
+        previous_documents = {} if full else self.load_manifest().get("documents", {})
+        stale, document_fingerprints = self.stale_documents(self.documents(records), previous_documents)
+        if stale:
+            logger.info(f"Rewriting {len(stale)} vector documents...")
+            self.vector_store.upsert_texts(stale)
+
+        version = self.save_manifest(fingerprints, document_fingerprints)
+        summary = {
+            "total": len(records),
+            "upserted": len(changed),
+            "deleted": len(removed),
+            "documents_written": len(stale),
+            "unchanged": len(records) - len(changed),
+            "version": version,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        logger.info(f"Sync complete: {summary}")
+        return summary
+
+    def sync_file(self, dataset_path: str = Config.DATASET_PATH, full: bool = False) -> Dict:
+        return self.sync(TextProcessor.parse_location_data(dataset_path), full=full)
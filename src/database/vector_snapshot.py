@@ -0,0 +1,201 @@
+import argparse
+import json
+import logging
+import os
+import time
+from array import array
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+from src.utils.config import Config
+from src.utils.metrics import metrics
+from src.utils.text_processor import TextProcessor
+
+if TYPE_CHECKING:
+    from src.models.embedding_engine import EmbeddingEngine
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+
+class VectorSnapshot:
+    """Ids, embeddings and metadata of the vector corpus, stored column by column in one .npz
+
+    Ids and content hashes are fixed-width string arrays, the vectors a single
+    float32 matrix and the metadata one JSON document. Restoring it rebuilds an
+    index without any embedding calls; the content hashes also seed the
+    embedding cache, so the next sync finds every document already embedded.
+    """
+
+    def __init__(self, ids: List[str], vectors: np.ndarray, metadata: List[Dict],
+                 hashes: Optional[List[str]] = None, model: str = Config.EMBEDDING_MODEL,
+                 version: Optional[str] = None):
+        if len(ids) != len(vectors) or len(ids) != len(metadata):
+            raise ValueError(f"Snapshot columns differ in length: {len(ids)} ids, "
+                             f"{len(vectors)} vectors, {len(metadata)} metadata")
+        self.ids = list(ids)
+        self.vectors = np.asarray(vectors, dtype=np.float32).reshape(len(self.ids), -1)
+        self.metadata = metadata
+        self.hashes = list(hashes) if hashes is not None else []
+        self.model = model
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    @classmethod
+    def from_documents(cls, documents: List[Dict], embedder: "EmbeddingEngine",
+                       version: Optional[str] = None) -> "VectorSnapshot":
+        """Embed documents as the ingest pipeline does; cached texts cost no API calls"""
+        from src.models.embedding_engine import text_hash
+        texts = [document['content'] for document in documents]
+        return cls(
+            [document.get('id', str(i)) for i, document in enumerate(documents)],
+            np.asarray(embedder.embed_texts(texts), dtype=np.float32),
+            [TextProcessor.document_metadata(document) for document in documents],
+            [text_hash(text) for text in texts],
+            embedder.model,
+            version
+        )
+
+    @classmethod
+    def from_dataset(cls, embedder: "EmbeddingEngine", dataset_path: str = Config.DATASET_PATH,
+                     manifest_path: str = Config.SYNC_MANIFEST_PATH) -> "VectorSnapshot":
+        """Snapshot of every vector document the sync writes for the dataset"""
+        from src.database.sync_manager import DatasetSync, manifest_version
+        records = TextProcessor.parse_location_data(dataset_path)
+        return cls.from_documents(DatasetSync.documents(records), embedder, manifest_version(manifest_path))
+
+    # Persistence
+    def save(self, path: str = Config.VECTOR_SNAPSHOT_PATH):
+        """Write the snapshot atomically
+
+        Stored uncompressed: float vectors barely compress, and loading stays a
+        straight read.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = json.dumps({
+            "format": SNAPSHOT_FORMAT, "model": self.model, "version": self.version, "metadata": self.metadata,
+        })
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, ids=np.array(self.ids, dtype=str), hashes=np.array(self.hashes, dtype=str),
+                 vectors=self.vectors, meta=np.array(meta))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = Config.VECTOR_SNAPSHOT_PATH) -> "VectorSnapshot":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("format") != SNAPSHOT_FORMAT:
+                raise ValueError(f"Unsupported vector snapshot format: {meta.get('format')}")
+            return cls(data["ids"].tolist(), data["vectors"], meta["metadata"], data["hashes"].tolist(),
+                       meta["model"], meta.get("version"))
+
+    # Restore
+    def seed_cache(self, embedder: "EmbeddingEngine", chunk_size: int = 5000) -> int:
+        """Store the snapshot vectors in the embedding cache under their content hashes"""
+        if not self.hashes:
+            return 0
+        for start in range(0, len(self.hashes), chunk_size):
+            rows = self.vectors[start:start + chunk_size]
+            embedder.cache.put_many(self.model, [
+                (key, array("f", row.tobytes())) for key, row in zip(self.hashes[start:start + chunk_size], rows)
+            ])
+        return len(self.hashes)
+
+    def restore(self, vector_store, batch_size: int = Config.SNAPSHOT_RESTORE_BATCH_SIZE,
+                seed_cache: bool = True, replace: bool = True,
+                manifest_path: str = Config.SYNC_MANIFEST_PATH) -> Dict:
+        """Bulk-load the snapshot into a vector backend; returns counts and throughput
+
+        By default the index is cleared first so it matches the snapshot
+        exactly; replace=False merges the snapshot into what is there. If the
+        snapshot was exported from a different data version than the last
+        sync, the sync manifest's document fingerprints no longer describe the
+        index, so they are dropped and the next sync rewrites what differs.
+        """
+        from src.database.sync_manager import forget_documents, manifest_version
+        # Pinecone checks dimensions itself; the local index is checked here
+        dimension = getattr(vector_store, "dimension", None)
+        if dimension is not None and self.dimension != dimension:
+            raise ValueError(f"Snapshot vectors have {self.dimension} dimensions, the index expects {dimension}")
+        embedder = getattr(vector_store, "embedder", None)
+        if embedder is not None and embedder.model != self.model:
+            raise ValueError(f"Snapshot was embedded with {self.model}, queries use {embedder.model}")
+
+        start = time.perf_counter()
+        batches = vector_store.bulk_load(self.ids, self.vectors, self.metadata, batch_size=batch_size, replace=replace)
+        seconds = time.perf_counter() - start
+        seeded = self.seed_cache(embedder) if seed_cache and embedder is not None else 0
+
+        synced_version = manifest_version(manifest_path)
+        version_mismatch = synced_version is not None and synced_version != self.version
+        if version_mismatch:
+            logger.warning(
+                f"Snapshot version {self.version} differs from the synced data ({synced_version}); "
+                "the next sync will rewrite every vector document"
+            )
+            forget_documents(manifest_path)
+
+        summary = {
+            "vectors": len(self),
+            "batches": batches,
+            "seconds": round(seconds, 3),
+            "vectors_per_sec": round(len(self) / seconds, 1) if seconds else 0.0,
+            "cache_seeded": seeded,
+            "version_mismatch": version_mismatch,
+        }
+        metrics.count("snapshot_vectors_total", len(self), op="restore")
+        logger.info(f"Restored vector snapshot: {summary}")
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or restore the embedded vector corpus")
+    parser.add_argument("command", choices=["export", "restore"])
+    parser.add_argument("--path", default=Config.VECTOR_SNAPSHOT_PATH, help="Snapshot file (.npz)")
+    parser.add_argument("--backend", default=None, help="Vector backend to restore into (default: VECTOR_BACKEND)")
+    parser.add_argument("--dataset", default=Config.DATASET_PATH, help="Dataset to export documents for")
+    parser.add_argument("--batch-size", type=int, default=Config.SNAPSHOT_RESTORE_BATCH_SIZE)
+    parser.add_argument("--merge", action="store_true",
+                        help="Keep vectors already in the index instead of replacing them")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    from src.models.embedding_engine import EmbeddingEngine
+    embedder = EmbeddingEngine()
+    try:
+        if args.command == "export":
+            start = time.perf_counter()
+            snapshot = VectorSnapshot.from_dataset(embedder, args.dataset)
+            snapshot.save(args.path)
+            seconds = time.perf_counter() - start
+            stats = embedder.stats()
+            print(
+                f"Exported {len(snapshot)} vectors ({snapshot.dimension} dimensions) to {args.path} in "
+                f"{seconds:.1f}s ({stats['cache_hits']} cache hits, {stats['api_calls']} embedding API calls)"
+            )
+        else:
+            from src.database.vector_store import create_vector_manager
+            start = time.perf_counter()
+            snapshot = VectorSnapshot.load(args.path)
+            load_seconds = time.perf_counter() - start
+            summary = snapshot.restore(create_vector_manager(args.backend, embedder=embedder), args.batch_size,
+                                       replace=not args.merge)
+            print(
+                f"Restored {summary['vectors']} vectors in {summary['batches']} batches: loaded in "
+                f"{load_seconds:.1f}s, written in {summary['seconds']}s ({summary['vectors_per_sec']} vectors/sec), "
+                f"{summary['cache_seeded']} embeddings cached"
+            )
+    finally:
+        embedder.close()
+
+
+if __name__ == "__main__":
+    main()
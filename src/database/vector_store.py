@@ -0,0 +1,18 @@
+from typing import TYPE_CHECKING, Optional
+
+from src.utils.config import Config
+
+if TYPE_CHECKING:
+    from src.models.embedding_engine import EmbeddingEngine
+
+
+def create_vector_manager(backend: Optional[str] = None, embedder: Optional["EmbeddingEngine"] = None):
+    """Build the vector index manager selected by VECTOR_BACKEND"""
+    backend = (backend or Config.VECTOR_BACKEND).lower()
+    if backend == "local":
+        from src.database.local_vector_manager import LocalVectorManager
+        return LocalVectorManager(embedder=embedder)
+    if backend == "pinecone":
+        from src.database.pinecone_manager import PineconeManager
+        return PineconeManager(embedder=embedder)
+    raise ValueError(f"Unknown vector backend '{backend}'. Use 'pinecone' or 'local'")
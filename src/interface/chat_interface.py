@@ -1,45 +1,108 @@
-import streamlit as st
-from src.database.neo4j_manager import Neo4jManager
-from src.database.pinecone_manager import PineconeManager
-from src.models.llm_handler import LLMHandler
-
-class ChatInterface:
-    def __init__(self):
-        self.neo4j = Neo4jManager()
-        self.pinecone = PineconeManager()
-        self.llm = LLMHandler()
-
-    def initialize_session(self):
-        if 'messages' not in st.session_state:
-            st.session_state.messages = []
-
-    def display_chat(self):
-        st.title("Travel Assistant")
-        self.initialize_session()
-
-        # Display chat history
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-
-        # Chat input
-        if prompt := st.chat_input("What would you like to know?"):
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            with st.chat_message("user"):
-                st.markdown(prompt)
-
-            # Get context from both sources
-            neo4j_context = self.neo4j.query_location(prompt)
-            pinecone_context = self.pinecone.query(prompt)
-
-            # Generate response
-            response = self.llm.generate_response(prompt, neo4j_context, pinecone_context)
-
-            # Display assistant response
-            with st.chat_message("assistant"):
-                st.markdown(response)
-            st.session_state.messages.append({"role": "assistant", "content": response})
-
-if __name__ == "__main__":
-    chat_interface = ChatInterface()
+from typing import Optional
+
+import streamlit as st
+from src.models.conversation import ConversationMemory, SessionRetriever
+from src.models.response_cache import context_fingerprint
+from src.utils.metrics import metrics
+from src.utils.resources import get_registry, graph_source
+
+class ChatInterface:
+    def __init__(self):
+        # Shared per process, so Streamlit reruns do not reconnect. Components
+        # are fetched on first use, so the page renders before any backend is up.
+        self.registry = get_registry()
+
+    @property
+    def llm(self):
+        return self.registry.get("llm")
+
+    @property
+    def retriever(self):
+        # Periodic health checks of the backends retrieval uses; a failed one resets the retriever built on top
+        source = graph_source()
+        if source:
+            self.registry.check(source)
+        self.registry.check("vector_store")
+        return self.registry.get("retriever")
+
+    @property
+    def response_cache(self):
+        return self.registry.get("response_cache")
+
+    def initialize_session(self):
+        # Bounded turns, rolling summary and entity cache for this session
+        if 'memory' not in st.session_state:
+            st.session_state.memory = ConversationMemory()
+
+    @staticmethod
+    def render_stream(tokens) -> str:
+        """Render tokens progressively and return the full message"""
+        placeholder = st.empty()
+        response = ""
+        for token in tokens:
+            response += token
+            placeholder.markdown(response + "▌")
+        placeholder.markdown(response)
+        return response
+
+    def respond(self, prompt: str) -> str:
+        """Retrieve context and render the assistant's answer to a prompt"""
+        # Get context from both sources concurrently, or from this session's cache for follow-ups
+        memory = st.session_state.memory
+        context = SessionRetriever(self.retriever, memory).retrieve(prompt)
+        neo4j_context = context["graph"]
+        pinecone_context = context["vectors"]
+
+        # Serve near-identical questions over the same context from the cache
+        embedding = context["query_embedding"]
+        history = memory.history()
+        fingerprint = context_fingerprint(neo4j_context, pinecone_context, history)
+        self.response_cache.ensure_version(self.registry.get("data_version"))
+        # Paths that skip the embedding call (lexical, session) match on the normalised query instead
+        cached = self.response_cache.lookup(embedding, fingerprint, query=prompt)
+
+        with st.chat_message("assistant"):
+            if cached is not None:
+                st.markdown(cached)
+                return cached
+
+            # Stream the assistant response as tokens arrive
+            timings = {}
+            response = self.render_stream(
+                self.llm.stream_response(prompt, neo4j_context, pinecone_context, history, timings)
+            )
+        self.response_cache.store(
+            embedding, fingerprint, response,
+            timings.get("total_ms", 0.0) / 1000, query=prompt
+        )
+        return response
+
+    def display_chat(self, notice: Optional[str] = None):
+        st.title("Travel Assistant")
+        if notice:
+            st.caption(notice)
+        self.initialize_session()
+
+        # Display recent chat history; older turns live on only in the summary
+        memory = st.session_state.memory
+        if memory.summary:
+            with st.expander("Earlier in this conversation"):
+                st.text(memory.summary)
+        for message in memory.turns:
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"])
+
+        # Chat input
+        if prompt := st.chat_input("What would you like to know?"):
+            with st.chat_message("user"):
+                st.markdown(prompt)
+
+            with metrics.span("chat_request"):
+                response = self.respond(prompt)
+            metrics.write()
+            memory.add("user", prompt)
+            memory.add("assistant", response)
+
+if __name__ == "__main__":
+    chat_interface = ChatInterface()
     chat_interface.display_chat()
\ No newline at end of file
@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.config import Config
+from src.utils.text_processor import TextProcessor
+
+
+class ContextBuilder:
+    """Turns retrieved graph and vector results into a compact, token-budgeted prompt section
+
+    Entities are deduplicated across both sources, ranked (locations named in
+    the question first, then vector matches by score), rendered as one line
+    each and added until the token budget is spent. Overlapping chunks of
+    one source are merged so the shared span is only paid for once.
+    """
+
+    # Shortest shared word run that counts as chunk overlap rather than coincidence
+    MIN_OVERLAP_WORDS = 3
+
+    def __init__(self, token_budget: int = Config.CONTEXT_TOKEN_BUDGET, max_neighbors: int = 8):
+        self.token_budget = token_budget
+        self.max_neighbors = max_neighbors
+
+    @staticmethod
+    def _entity_id(match: Dict) -> str:
+        # Chunk ids look like "city_hanoi#0"; several chunks share one entity
+        return match.get("source_id") or str(match.get("id", "")).split("#")[0]
+
+    @staticmethod
+    def _chunk_index(match: Dict) -> int:
+        _, _, index = str(match.get("id", "")).partition("#")
+        return int(index) if index.isdigit() else 0
+
+    @classmethod
+    def _merge_chunks(cls, chunks: List[Tuple[int, str]]) -> List[str]:
+        """Merge chunks of one source that overlap, in chunk order
+
+        Chunking repeats the tail of each chunk at the head of the next, so a
+        chunk whose leading words continue the previous one's trailing words
+        is joined onto it, and a chunk already contained in another is dropped.
+        """
+        merged: List[List[str]] = []
+        for _, content in sorted(chunks, key=lambda chunk: chunk[0]):
+            words = content.split()
+            padded = f" {' '.join(words)} "
+            if any(padded in f" {' '.join(previous)} " for previous in merged):
+                continue
+            if merged:
+                previous = merged[-1]
+                for size in range(min(len(previous), len(words)), cls.MIN_OVERLAP_WORDS - 1, -1):
+                    if previous[-size:] == words[:size]:
+                        previous.extend(words[size:])
+                        break
+                else:
+                    merged.append(words)
+            else:
+                merged.append(words)
+        return [" ".join(words) for words in merged]
+
+    def _collect(self, neo4j_context, pinecone_context) -> List[Dict]:
+        items: Dict[str, Dict] = {}
+        seen_content = set()
+
+        for item in neo4j_context or []:
+            route = item.get("route")
+            if route:
+                key = f"route:{route['from']['id']}:{route['to']['id']}"
+                # Routes answer the question directly, so they rank above everything else
+                items[key] = {"score": 3.0, "location": None, "chunks": [], "neighbors": [], "route": route}
+                continue
+            location = item.get("location") or {}
+            key = location.get("id") or location.get("name")
+            if not key:
+                continue
+            items[key] = {
+                "score": 1.0 + max(0.0, location.get("score", 0.0)),
+                "location": location,
+                "chunks": [],
+                "neighbors": item.get("neighbors", []),
+            }
+
+        for match in pinecone_context or []:
+            content = (match.get("content") or "").strip()
+            if not content or content in seen_content:
+                continue
+            seen_content.add(content)
+            key = self._entity_id(match)
+            entry = items.setdefault(key, {"score": 0.0, "location": None, "chunks": [], "neighbors": []})
+            entry["score"] = max(entry["score"], match.get("score") or 0.0)
+            entry["chunks"].append((self._chunk_index(match), content))
+            entry.setdefault("type", match.get("type"))
+        for entry in items.values():
+            entry["chunks"] = self._merge_chunks(entry["chunks"])
+        return sorted(items.values(), key=lambda entry: entry["score"], reverse=True)
+
+    def _render(self, entry: Dict) -> List[str]:
+        location = entry["location"]
+        lines = []
+        if entry.get("route"):
+            route = entry["route"]
+            stops = " -> ".join(stop["name"] for stop in route["path"])
+            lines.append(
+                f"- Route from {route['from']['name']} to {route['to']['name']}: "
+                f"{stops} ({route['hops']} hop{'s' if route['hops'] != 1 else ''})"
+            )
+        elif location:
+            details = [location.get("type"), location.get("region")]
+            if location.get("best_time_to_visit"):
+                details.append(f"best time: {location['best_time_to_visit']}")
+            if location.get("tags"):
+                details.append("tags: " + ", ".join(location["tags"]))
+            header = f"- {location.get('name', location.get('id'))} ({'; '.join(d for d in details if d)})"
+            description = location.get("description") or location.get("semantic_text")
+            # Vector chunks of a graph entity usually repeat its description
+            lines.append(f"{header}: {description}" if description else header)
+            if entry["neighbors"]:
+                nearby = ", ".join(
+                    f"{n.get('name')} ({n.get('type')})"
+                    for n in entry["neighbors"][:self.max_neighbors]
+                    if n.get("name")
+                )
+                if nearby:
+                    lines.append(f"  Related: {nearby}")
+        else:
+            for content in entry["chunks"]:
+                lines.append(f"- [{entry.get('type') or 'info'}] {content}")
+        return lines
+
+    def build(self, neo4j_context, pinecone_context,
+              token_budget: Optional[int] = None) -> Tuple[str, Dict]:
+        """Render the context and report what fit in the budget"""
+        budget = self.token_budget if token_budget is None else token_budget
+        entries = self._collect(neo4j_context, pinecone_context)
+        lines, used, included = [], 0, 0
+        for entry in entries:
+            rendered = self._render(entry)
+            cost = sum(TextProcessor.count_tokens(line) for line in rendered)
+            if used + cost > budget:
+                continue
+            lines.extend(rendered)
+            used += cost
+            included += 1
+        return "\n".join(lines), {
+            "context_tokens": used,
+            "entities": len(entries),
+            "included": included,
+            "dropped": len(entries) - included,
+        }
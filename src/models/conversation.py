@@ -0,0 +1,246 @@
+import re
+from collections import Counter, OrderedDict, deque
+from typing import Dict, List, Optional
+
+from src.database.lexical_index import tokenize
+from src.utils.config import Config
+from src.utils.entity_matcher import normalize
+from src.utils.metrics import metrics
+from src.utils.text_processor import TextProcessor
+
+# Words that point back at a place said earlier ("what about hotels there?"). Pronouns
+# like "it" or "this" are left out: they show up just as often in unrelated questions.
+REFERENCE_WORDS = {"there", "here", "same"}
+# "that city", "these hotels", ...: a demonstrative only refers back when it names a kind of place
+REFERENCE_DEMONSTRATIVES = {"this", "that", "these", "those"}
+REFERENCE_NOUNS = {
+    "place", "places", "city", "cities", "town", "area", "one", "ones",
+    "hotel", "hotels", "restaurant", "restaurants", "attraction", "attractions",
+}
+FOLLOW_UP_PREFIXES = (("what", "about"), ("how", "about"), ("and",))
+# Conversational filler that does not ask for anything new
+FILLER_WORDS = {"about", "tell", "more", "please", "again", "also", "else", "anything", "so", "then", "us"}
+
+
+def _entity_id(match: Dict) -> str:
+    # Keyed like ContextBuilder, so the chunks of one entity are cached together
+    return match.get("source_id") or str(match.get("id", "")).split("#")[0]
+
+
+def _first_sentence(text: str, max_words: int = 24) -> str:
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    words = sentence.split()
+    return " ".join(words[:max_words]) + (" ..." if len(words) > max_words else "")
+
+
+class ConversationMemory:
+    """Bounded memory for one chat session
+
+    Keeps the last `max_turns` messages verbatim; older ones are folded into
+    a rolling extractive summary capped at `summary_tokens`. Entities
+    retrieved during the session are cached (LRU, `max_entities`) with their
+    graph neighbourhood and top vector chunks, and the entities of the latest
+    turn that named any are kept as the focus for resolving references like
+    "there" or "it". Everything is bounded, so memory stays flat however long
+    the conversation runs.
+    """
+
+    def __init__(self, max_turns: int = Config.SESSION_MAX_TURNS,
+                 summary_tokens: int = Config.SESSION_SUMMARY_TOKENS,
+                 max_entities: int = Config.SESSION_ENTITY_CACHE_SIZE,
+                 chunks_per_entity: int = 3):
+        self.max_turns = max_turns
+        self.summary_tokens = summary_tokens
+        self.max_entities = max_entities
+        self.chunks_per_entity = chunks_per_entity
+        self.turns: deque = deque()
+        self._summary: deque = deque()
+        self._summary_size = 0
+        self.entities: "OrderedDict[str, Dict]" = OrderedDict()
+        self.focus: List[Dict] = []
+        self.stats = Counter()
+
+    # Conversation turns
+    def add(self, role: str, content: str):
+        self.turns.append({"role": role, "content": content})
+        while len(self.turns) > self.max_turns:
+            self._fold(self.turns.popleft())
+
+    def _fold(self, message: Dict):
+        line = f"{message['role'].capitalize()}: {_first_sentence(message['content'])}"
+        size = TextProcessor.count_tokens(line)
+        self._summary.append((line, size))
+        self._summary_size += size
+        while self._summary_size > self.summary_tokens and len(self._summary) > 1:
+            _, dropped = self._summary.popleft()
+            self._summary_size -= dropped
+
+    @property
+    def summary(self) -> str:
+        return "\n".join(line for line, _ in self._summary)
+
+    def history(self, max_tokens: int = Config.SESSION_HISTORY_TOKENS) -> List[Dict]:
+        """Prior messages for the prompt: the summary of older turns, then recent ones
+
+        Capped at `max_tokens` on top of the retrieved context; the oldest
+        recent turns are dropped first.
+        """
+        messages, budget = [], max_tokens
+        if self._summary:
+            messages.append({"role": "system", "content": f"Earlier in this conversation:\n{self.summary}"})
+            budget -= self._summary_size
+        recent = []
+        for turn in reversed(self.turns):
+            size = TextProcessor.count_tokens(turn["content"])
+            if size > budget:
+                break
+            budget -= size
+            recent.append(dict(turn))
+        messages.extend(reversed(recent))
+        return messages
+
+    # Entities
+    def resolve(self, query: str, named: List[Dict]) -> List[Dict]:
+        """Entities a query is about: those it names, else the focus if it refers back"""
+        if named:
+            self.focus = [{"id": entity["id"], "name": entity.get("name")} for entity in named]
+            return self.focus
+        tokens = normalize(query)
+        refers_back = (
+            bool(REFERENCE_WORDS.intersection(tokens))
+            or any(tuple(tokens[:len(prefix)]) == prefix for prefix in FOLLOW_UP_PREFIXES)
+            or any(
+                word in REFERENCE_DEMONSTRATIVES and following in REFERENCE_NOUNS
+                for word, following in zip(tokens, tokens[1:])
+            )
+        )
+        if refers_back and self.focus:
+            self.stats["resolved_references"] += 1
+            return self.focus
+        return []
+
+    def _touch(self, entity_id: str) -> Dict:
+        entry = self.entities.get(entity_id)
+        if entry is None:
+            entry = self.entities[entity_id] = {"graph": None, "chunks": []}
+            while len(self.entities) > self.max_entities:
+                self.entities.popitem(last=False)
+        else:
+            self.entities.move_to_end(entity_id)
+        return entry
+
+    def has(self, ids: List[str], require_graph: bool = True) -> bool:
+        """Whether every entity has cached context
+
+        With require_graph, an entity only seen among vector matches does not
+        count; its neighbourhood has not been fetched yet.
+        """
+        def cached(entry: Optional[Dict]) -> bool:
+            if entry is None:
+                return False
+            return entry["graph"] is not None or (not require_graph and bool(entry["chunks"]))
+        return bool(ids) and all(cached(self.entities.get(entity_id)) for entity_id in ids)
+
+    def remember(self, context: Dict):
+        """Cache the graph neighbourhoods and vector chunks of a retrieval"""
+        for item in context.get("graph") or []:
+            location = item.get("location")
+            if location and location.get("id"):
+                self._touch(location["id"])["graph"] = item
+        for match in context.get("vectors") or []:
+            entity_id = _entity_id(match)
+            if not entity_id:
+                continue
+            chunks = self._touch(entity_id)["chunks"]
+            if all(chunk.get("id") != match.get("id") for chunk in chunks):
+                chunks.append(match)
+                chunks.sort(key=lambda chunk: -chunk.get("score", 0.0))
+                del chunks[self.chunks_per_entity:]
+
+    def cached_graph(self, ids: List[str]) -> List[Dict]:
+        graph = []
+        for entity_id in ids:
+            entry = self.entities[entity_id]
+            self.entities.move_to_end(entity_id)
+            if entry["graph"] is not None:
+                graph.append(entry["graph"])
+        return graph
+
+    def cached_context(self, ids: List[str], top_k: int) -> Dict:
+        """Graph and vector context for cached entities, plus cached chunks of their neighbours"""
+        graph = self.cached_graph(ids)
+        chunks = [chunk for entity_id in ids for chunk in self.entities[entity_id]["chunks"]]
+        neighbor_chunks = [
+            chunk
+            for item in graph for neighbor in item.get("neighbors", [])
+            if neighbor.get("id") in self.entities
+            for chunk in self.entities[neighbor["id"]]["chunks"]
+        ]
+        neighbor_chunks.sort(key=lambda chunk: -chunk.get("score", 0.0))
+        return {"graph": graph, "vectors": (chunks + neighbor_chunks)[:max(top_k, len(chunks))]}
+
+
+class SessionRetriever:
+    """Retrieval for one session that reuses context already fetched in it
+
+    A question about entities whose context is cached (named again or
+    referred to as "there", "that city", ...) reuses their cached graph
+    neighbourhood. If it asks for nothing beyond them ("and there?") the
+    cached chunks are reused too; if it has content terms of its own ("what
+    about hotels there?") the vector search still runs. Otherwise the shared
+    retriever runs in full. Referred-to entity names are appended to the
+    query so entity linking and the vector search see them, and results are
+    cached.
+    """
+
+    def __init__(self, retriever, memory: ConversationMemory):
+        self.retriever = retriever
+        self.memory = memory
+
+    def retrieve(self, query: str, top_k: int = Config.TOP_K_RESULTS, filter: Optional[Dict] = None) -> Dict:
+        named = self.retriever.matcher.find(query)
+        entities = self.memory.resolve(query, named)
+        ids = [entity["id"] for entity in entities]
+        # Cached chunks were not selected by this filter, so filtered queries always go to the stores
+        require_graph = getattr(self.retriever, "neo4j", None) is not None
+        cached = not filter and self.memory.has(ids, require_graph)
+        if cached and not self._content_terms(query, entities):
+            self.memory.stats["reused"] += 1
+            metrics.count("session_retrieval_total", source="reused")
+            return {
+                **self.memory.cached_context(ids, top_k),
+                "query_embedding": None,
+                "path": "session",
+                "timings": {},
+                "timed_out": [],
+                "errors": {},
+            }
+
+        if entities and not named:
+            query = f"{query} ({', '.join(entity['name'] or entity['id'] for entity in entities)})"
+        if cached:
+            context = self.retriever.retrieve(query, top_k, graph=False)
+            context["graph"] = self.memory.cached_graph(ids)
+            self.memory.stats["graph_reused"] += 1
+            metrics.count("session_retrieval_total", source="graph_reused")
+        else:
+            context = self.retriever.retrieve(query, top_k, filter=filter)
+            self.memory.stats["retrieved"] += 1
+            metrics.count("session_retrieval_total", source="retrieved")
+
+        # A retrieval that only brought back what the session already held
+        retrieved_ids = {item["location"]["id"] for item in context.get("graph") or [] if item.get("location")}
+        retrieved_ids.update(_entity_id(match) for match in context.get("vectors") or [])
+        if retrieved_ids and all(entity_id in self.memory.entities for entity_id in retrieved_ids):
+            self.memory.stats["repeat_retrievals"] += 1
+            metrics.count("session_repeat_retrieval_total")
+        self.memory.remember(context)
+        return context
+
+    @staticmethod
+    def _content_terms(query: str, entities: List[Dict]) -> List[str]:
+        """Query terms beyond the entities, reference words and filler"""
+        known = REFERENCE_WORDS | REFERENCE_DEMONSTRATIVES | FILLER_WORDS
+        for entity in entities:
+            known = known.union(normalize(entity.get("name") or ""))
+        return [token for token in tokenize(query) if token not in known]
@@ -0,0 +1,308 @@
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.utils.config import Config
+from src.utils.latency import LatencyRecorder
+from src.utils.metrics import SIZE_BUCKETS, metrics, traced
+from src.utils.rate_limiter import RequestScheduler, get_scheduler
+from src.utils.text_processor import TextProcessor
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(text: str) -> str:
+    """Stable content hash used as the cache key for a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent embedding cache keyed by (model, hash of text)"""
+
+    def __init__(self, path: str = Config.EMBEDDING_CACHE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the given hashes, skipping misses"""
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *chunk]
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+        return found
+
+    def put_many(self, model: str, items: List[Tuple[str, List[float]]]):
+        """Store (hash, vector) pairs for a model"""
+        rows = [(model, key, array("f", vector).tobytes()) for key, vector in items]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingDispatcher:
+    """Coalesces concurrent single-text embedding requests into batched calls
+
+    Callers block in submit() while a background thread collects requests
+    for up to `window` seconds after the first one arrives (or until
+    `max_batch` are waiting) and hands the group to `embed_batch` on a small
+    worker pool, so collection continues while a batch is in flight.
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]],
+                 window: float = Config.EMBEDDING_BATCH_WINDOW,
+                 max_batch: int = Config.EMBEDDING_DISPATCH_MAX_BATCH,
+                 max_workers: int = Config.EMBEDDING_MAX_WORKERS):
+        self.embed_batch = embed_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.latencies = LatencyRecorder()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embedding-dispatch")
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._requests = 0
+        self._batches = 0
+
+    def submit(self, text: str) -> List[float]:
+        """Embed one text as part of the next batch"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Embedding dispatcher is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-dispatcher", daemon=True)
+                self._thread.start()
+            self._requests += 1
+            # Enqueued under the lock so close() cannot slip its sentinel in ahead of us
+            self._queue.put((text, future, time.perf_counter()))
+        return future.result()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = first[2] + self.window
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._executor.submit(self._dispatch, batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: List[Tuple[str, Future, float]]):
+        now = time.perf_counter()
+        for _, _, enqueued in batch:
+            self.latencies.record("queue_wait", now - enqueued)
+            metrics.observe("embedding_queue_wait_seconds", now - enqueued)
+        metrics.observe("embedding_batch_size", len(batch), buckets=SIZE_BUCKETS)
+        with self._lock:
+            self._batches += 1
+        try:
+            vectors = self.embed_batch([text for text, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for (_, future, _), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+    def stats(self) -> Dict:
+        """Requests, batches, mean batch size and queue-wait percentiles"""
+        with self._lock:
+            requests, batches = self._requests, self._batches
+        return {
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": round(requests / batches, 2) if batches else 0.0,
+            "queue_wait": self.latencies.summary().get("queue_wait", {}),
+        }
+
+    def close(self):
+        """Flush waiting requests and stop the dispatcher thread"""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+        self._executor.shutdown(wait=True)
+
+
+class EmbeddingEngine:
+    """Batched, concurrent embedding client backed by a persistent cache
+
+    With a positive batch_window, single-text embed() calls that miss the
+    cache go through an EmbeddingDispatcher, so concurrent sessions share
+    batched API calls instead of making one request each.
+    """
+
+    def __init__(self,
+                 model: str = Config.EMBEDDING_MODEL,
+                 batch_size: int = Config.EMBEDDING_BATCH_SIZE,
+                 max_workers: int = Config.EMBEDDING_MAX_WORKERS,
+                 cache: Optional[EmbeddingCache] = None,
+                 client=None,
+                 batch_window: float = Config.EMBEDDING_BATCH_WINDOW,
+                 scheduler: Optional[RequestScheduler] = None):
+        self.model = model
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.cache = cache if cache is not None else EmbeddingCache()
+        if client is None:
+            # The openai package is slow to import, so it is loaded on first use
+            import openai
+            client = openai
+        self.client = client
+        self.scheduler = scheduler if scheduler is not None else get_scheduler("embedding")
+        self.dispatcher = EmbeddingDispatcher(
+            self.embed_texts, window=batch_window,
+            max_batch=min(batch_size, Config.EMBEDDING_DISPATCH_MAX_BATCH), max_workers=max_workers
+        ) if batch_window > 0 else None
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def close(self):
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+        self.cache.close()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._hits = 0
+            self._misses = 0
+            self._api_calls = 0
+            self._texts = 0
+            self._seconds = 0.0
+
+    def stats(self) -> Dict:
+        """Cache hit/miss counts, API calls and embedding throughput"""
+        with self._stats_lock:
+            return {
+                "cache_hits": self._hits,
+                "cache_misses": self._misses,
+                "api_calls": self._api_calls,
+                "texts": self._texts,
+                "seconds": round(self._seconds, 4),
+                "texts_per_sec": round(self._texts / self._seconds, 2) if self._seconds else 0.0,
+            }
+
+    @traced("embedding_api")
+    def _request_batch(self, batch: List[str]) -> List[List[float]]:
+        """Embed one batch of texts with a single API call"""
+        response = self.scheduler.call(
+            self.client.Embedding.create, input=batch, model=self.model,
+            tokens=sum(TextProcessor.count_tokens(text) for text in batch)
+        )
+        data = sorted(response["data"], key=lambda item: item["index"])
+        with self._stats_lock:
+            self._api_calls += 1
+        if metrics.enabled:
+            metrics.count("embedding_texts_total", len(batch))
+            metrics.count("bytes_total", sum(len(text.encode("utf-8")) for text in batch), kind="embedding_input")
+        return [item["embedding"] for item in data]
+
+    def embed(self, text: str) -> List[float]:
+        """Embed a single text"""
+        if self.dispatcher is None:
+            return self.embed_texts([text])[0]
+        # Cache hits return at once; only misses wait for a shared batch
+        start = time.perf_counter()
+        key = text_hash(text)
+        vector = self.cache.get_many(self.model, [key]).get(key)
+        if vector is None:
+            return self.dispatcher.submit(text)
+        metrics.count("embedding_cache_total", 1, result="hit")
+        with self._stats_lock:
+            self._hits += 1
+            self._texts += 1
+            self._seconds += time.perf_counter() - start
+        return vector
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in order, serving repeats from the cache"""
+        start = time.perf_counter()
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model, list(set(hashes)))
+
+        # Each distinct uncached text is sent to the API exactly once
+        pending = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors and key not in pending:
+                pending[key] = text
+
+        if pending:
+            keys = list(pending)
+            batches = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+            workers = max(1, min(self.max_workers, len(batches)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(
+                    lambda batch: self._request_batch([pending[key] for key in batch]),
+                    batches
+                )
+                for batch, embeddings in zip(batches, results):
+                    if len(embeddings) != len(batch):
+                        raise ValueError(
+                            f"Expected {len(batch)} embeddings, got {len(embeddings)}"
+                        )
+                    fresh = list(zip(batch, embeddings))
+                    self.cache.put_many(self.model, fresh)
+                    vectors.update(fresh)
+
+        metrics.count("embedding_cache_total", len(texts) - len(pending), result="hit")
+        metrics.count("embedding_cache_total", len(pending), result="miss")
+        with self._stats_lock:
+            self._misses += len(pending)
+            self._hits += len(texts) - len(pending)
+            self._texts += len(texts)
+            self._seconds += time.perf_counter() - start
+        return [vectors[key] for key in hashes]
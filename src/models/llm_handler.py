@@ -1,32 +1,136 @@
-import openai
-import os
-from typing import Dict, List
-from dotenv import load_dotenv
-
-load_dotenv()
-
-class LLMHandler:
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        openai.api_key = self.api_key
-
-    def generate_response(self, 
-                         query: str, 
-                         neo4j_context: Dict, 
-                         pinecone_context: List[Dict]) -> str:
-        # Construct the prompt with context
-        context = f"Neo4j Information: {neo4j_context}\n"
-        context += f"Additional Context: {pinecone_context}\n"
-        context += f"User Query: {query}\n"
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a knowledgeable travel assistant. Use the provided context to answer questions accurately."},
-                {"role": "user", "content": context}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        return response.choices[0].message.content
\ No newline at end of file
+import os
+import time
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from src.models.context_builder import ContextBuilder
+from src.utils.config import Config
+from src.utils.latency import LatencyRecorder
+from src.utils.metrics import metrics, traced
+from src.utils.rate_limiter import RequestScheduler, get_scheduler
+from src.utils.text_processor import TextProcessor
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "You are a knowledgeable travel assistant. Use the provided context to answer questions accurately."
+
+class LLMHandler:
+    def __init__(self, client=None, latencies: Optional[LatencyRecorder] = None,
+                 context_builder: Optional[ContextBuilder] = None,
+                 scheduler: Optional[RequestScheduler] = None):
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        if client is None:
+            import openai
+            openai.api_key = self.api_key
+            client = openai
+        self.client = client
+        self.latencies = latencies if latencies is not None else LatencyRecorder()
+        self.context_builder = context_builder if context_builder is not None else ContextBuilder()
+        # One handler is shared by every session, so per-call usage and timings
+        # are returned to the caller rather than kept on the instance
+        self.scheduler = scheduler if scheduler is not None else get_scheduler("chat")
+
+    def build_messages(self,
+                       query: str,
+                       neo4j_context: Dict,
+                       pinecone_context: List[Dict],
+                       history: Optional[List[Dict]] = None) -> Tuple[List[Dict], Dict]:
+        """Prompt messages for a query, and their usage (context stats and prompt tokens)"""
+        # Construct the prompt from deduplicated, budgeted context
+        rendered, stats = self.context_builder.build(neo4j_context, pinecone_context)
+        context = f"Context:\n{rendered}\n" if rendered else ""
+        context += f"User Query: {query}\n"
+        # Prior turns (bounded by the session memory) let follow-up questions make sense
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            *(history or []),
+            {"role": "user", "content": context}
+        ]
+        usage = {
+            **stats,
+            "prompt_tokens": sum(TextProcessor.count_tokens(m["content"]) for m in messages),
+        }
+        logger.info(f"Prompt usage: {usage}")
+        metrics.count("tokens_total", usage["prompt_tokens"], kind="prompt")
+        return messages, usage
+
+    @traced("llm_generate")
+    def generate_response(self,
+                         query: str,
+                         neo4j_context: Dict,
+                         pinecone_context: List[Dict],
+                         history: Optional[List[Dict]] = None,
+                         timings: Optional[Dict] = None) -> str:
+        """Generate a complete answer; `timings`, if given, receives this call's total_ms"""
+        start = time.perf_counter()
+        messages, usage = self.build_messages(query, neo4j_context, pinecone_context, history)
+        response = self.scheduler.call(
+            self.client.ChatCompletion.create,
+            model=Config.OPENAI_MODEL,
+            messages=messages,
+            temperature=Config.TEMPERATURE,
+            max_tokens=Config.MAX_TOKENS,
+            tokens=usage["prompt_tokens"] + Config.MAX_TOKENS
+        )
+        total = time.perf_counter() - start
+        self.latencies.record("llm_total", total)
+        if timings is not None:
+            timings["total_ms"] = round(total * 1000, 2)
+
+        content = response.choices[0].message.content
+        metrics.count("bytes_total", len(content.encode("utf-8")), kind="response")
+        return content
+
+    def stream_response(self,
+                        query: str,
+                        neo4j_context: Dict,
+                        pinecone_context: List[Dict],
+                        history: Optional[List[Dict]] = None,
+                        timings: Optional[Dict] = None) -> Iterator[str]:
+        """Yield response tokens as they arrive from the model
+
+        `timings`, if given, receives this call's first_token_ms and total_ms
+        once the stream is exhausted.
+        """
+        # Timed by hand: a span must not stay open across the yields below
+        start = time.perf_counter()
+        first_token = None
+        chunks, size = 0, 0
+        try:
+            messages, usage = self.build_messages(query, neo4j_context, pinecone_context, history)
+            # Rate limits surface when the stream is opened, so only that call is scheduled
+            stream = self.scheduler.call(
+                self.client.ChatCompletion.create,
+                model=Config.OPENAI_MODEL,
+                messages=messages,
+                temperature=Config.TEMPERATURE,
+                max_tokens=Config.MAX_TOKENS,
+                stream=True,
+                tokens=usage["prompt_tokens"] + Config.MAX_TOKENS
+            )
+            for chunk in stream:
+                token = chunk["choices"][0]["delta"].get("content")
+                if not token:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                    self.latencies.record("llm_first_token", first_token)
+                    metrics.observe("stage_seconds", first_token, stage="llm_first_token")
+                chunks += 1
+                size += len(token.encode("utf-8"))
+                yield token
+        finally:
+            metrics.record_stage("llm_stream", time.perf_counter() - start)
+
+        total = time.perf_counter() - start
+        self.latencies.record("llm_total", total)
+        # Each streamed delta carries one completion token
+        metrics.count("tokens_total", chunks, kind="completion")
+        metrics.count("bytes_total", size, kind="response")
+        if timings is not None:
+            timings.update({
+                "first_token_ms": round((first_token if first_token is not None else total) * 1000, 2),
+                "total_ms": round(total * 1000, 2),
+            })
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.utils.config import Config
+from src.utils.entity_matcher import normalize
+
+
+def context_fingerprint(neo4j_context, pinecone_context, history: Optional[List[Dict]] = None) -> str:
+    """Hash of the ids of the retrieved graph and vector context, and of the conversation history
+
+    The history is part of the prompt, so "tell me more" after different
+    turns must not share an answer.
+    """
+    graph_ids = []
+    for item in neo4j_context or []:
+        location = item.get("location") or {}
+        graph_ids.append(location.get("id"))
+        graph_ids.extend(neighbor.get("id") for neighbor in item.get("neighbors", []))
+    vector_ids = [match.get("id") for match in pinecone_context or []]
+    payload = json.dumps({
+        "graph": sorted(map(str, graph_ids)),
+        "vectors": sorted(map(str, vector_ids)),
+        "history": [[message.get("role"), message.get("content")] for message in history or []],
+    })
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SemanticResponseCache:
+    """LLM answer cache keyed by query embedding plus retrieved-context fingerprint
+
+    A lookup hits when an unexpired entry has the same context fingerprint and
+    a query embedding with cosine similarity at or above the threshold, or
+    the same normalised query text when no embedding was computed. Size
+    is bounded with LRU eviction, and all entries are dropped when the data
+    version (the sync manifest hash) changes.
+    """
+
+    def __init__(self,
+                 max_entries: int = Config.RESPONSE_CACHE_SIZE,
+                 ttl_seconds: float = Config.RESPONSE_CACHE_TTL,
+                 threshold: float = Config.RESPONSE_CACHE_THRESHOLD,
+                 clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.clock = clock
+        self.data_version = None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._by_fingerprint: Dict[str, set] = {}
+        self._next_key = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._saved_seconds = 0.0
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, key: int):
+        entry = self._entries.pop(key)
+        keys = self._by_fingerprint.get(entry["fingerprint"])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_fingerprint[entry["fingerprint"]]
+
+    def ensure_version(self, data_version: Optional[str]):
+        """Drop every entry if the underlying data has been re-synced"""
+        with self._lock:
+            if data_version != self.data_version:
+                self._entries.clear()
+                self._by_fingerprint.clear()
+                self.data_version = data_version
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_fingerprint.clear()
+
+    @staticmethod
+    def _text_key(query: Optional[str]) -> Optional[str]:
+        return " ".join(normalize(query)) if query else None
+
+    def lookup(self, embedding: Optional[List[float]], fingerprint: str,
+               query: Optional[str] = None) -> Optional[str]:
+        """Return a cached response for a similar query over the same context
+
+        Without an embedding (e.g. on the lexical fast path, which skips the
+        embedding call) only the same normalised query text matches.
+        """
+        vector = self._unit(embedding) if embedding else None
+        text = self._text_key(query)
+        now = self.clock()
+        with self._lock:
+            best_key, best_score = None, self.threshold
+            for key in list(self._by_fingerprint.get(fingerprint, ())):
+                entry = self._entries[key]
+                if now - entry["created"] > self.ttl_seconds:
+                    self._remove(key)
+                    continue
+                if text is not None and entry["text"] == text:
+                    score = 1.0
+                elif vector is not None and entry["vector"] is not None:
+                    score = float(entry["vector"] @ vector)
+                else:
+                    continue
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            entry = self._entries[best_key]
+            self._hits += 1
+            self._saved_seconds += entry["generation_seconds"]
+            return entry["response"]
+
+    def store(self, embedding: Optional[List[float]], fingerprint: str, response: str,
+              generation_seconds: float = 0.0, query: Optional[str] = None):
+        if not embedding and not query:
+            return
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = {
+                "vector": self._unit(embedding) if embedding else None,
+                "text": self._text_key(query),
+                "fingerprint": fingerprint,
+                "response": response,
+                "created": self.clock(),
+                "generation_seconds": generation_seconds,
+            }
+            self._by_fingerprint.setdefault(fingerprint, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "saved_seconds": round(self._saved_seconds, 3),
+            }
+
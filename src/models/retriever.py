@@ -0,0 +1,175 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from collections import Counter
+from typing import Dict, List, Optional
+
+from src.database.lexical_index import BM25Index, reciprocal_rank_fusion
+from src.database.metadata_filter import matches as metadata_matches
+from src.utils.config import Config
+from src.utils.latency import LatencyRecorder
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class HybridRetriever:
+    """Runs the graph lookup and the vector search for a query concurrently
+
+    The query embedding and the graph lookup start at the same time; the vector
+    search follows the embedding on the same worker. Each source has its own
+    deadline and whatever finished in time is returned, so a slow source
+    degrades the answer instead of blocking it.
+    """
+
+    def __init__(self, neo4j, vector_store, matcher,
+                 vector_timeout: float = Config.RETRIEVAL_VECTOR_TIMEOUT,
+                 graph_timeout: float = Config.RETRIEVAL_GRAPH_TIMEOUT,
+                 max_workers: int = Config.RETRIEVAL_MAX_WORKERS,
+                 latencies: Optional[LatencyRecorder] = None,
+                 lexical: Optional[BM25Index] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.neo4j = neo4j
+        self.vector_store = vector_store
+        self.matcher = matcher
+        self.lexical = lexical
+        self.path_counts = Counter()
+        self.vector_timeout = vector_timeout
+        self.graph_timeout = graph_timeout
+        # A shared executor outlives this retriever: sessions still holding it after a
+        # registry reset keep working, and close() leaves the pool to its owner
+        self._owns_executor = executor is None
+        self.executor = executor if executor is not None else ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="retrieval"
+        )
+        self.latencies = latencies if latencies is not None else LatencyRecorder()
+
+    def _timed(self, stage: str, timings: Dict, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            timings[stage] = round(elapsed * 1000, 2)
+            self.latencies.record(stage, elapsed)
+
+    def _vector_lookup(self, query: str, top_k: int, timings: Dict, filter: Optional[Dict] = None) -> Dict:
+        embedding = self._timed("embedding", timings, self.vector_store.get_embedding, query)
+        # Only filtered searches pass the keyword, so plain vector stores keep working
+        extra = {"filter": filter} if filter else {}
+        matches = self._timed("vector_search", timings, self.vector_store.search, embedding, top_k, **extra)
+        return {"embedding": embedding, "matches": matches}
+
+    def _graph_lookup(self, query: str, timings: Dict):
+        entity_ids = self._timed("entity_linking", timings, self.matcher.find_ids, query)
+        if not entity_ids:
+            return []
+        graph = self._timed("graph_query", timings, self.neo4j.query_neighborhood, entity_ids)
+        # A graph snapshot can also answer "how do I get from A to B" without a round trip
+        if len(entity_ids) > 1 and hasattr(self.neo4j, "routes_between"):
+            routes = self._timed("graph_routes", timings, self.neo4j.routes_between, entity_ids)
+            graph = graph + [{"route": route} for route in routes]
+        return graph
+
+    @staticmethod
+    def _graph_ranking(graph) -> List[Dict]:
+        """Matched locations first, then their neighbours by distance"""
+        ranking = [{"id": item["location"].get("id")} for item in graph or [] if item.get("location")]
+        neighbors = sorted(
+            (neighbor.get("distance", 1), neighbor["id"])
+            for item in graph or [] for neighbor in item.get("neighbors", [])
+        )
+        ranking.extend({"id": neighbor_id} for _, neighbor_id in neighbors)
+        return ranking
+
+    def retrieve(self, query: str, top_k: int = Config.TOP_K_RESULTS, filter: Optional[Dict] = None,
+                 graph: bool = True) -> Dict:
+        """Gather graph and vector context for a query within the per-source deadlines
+
+        With a lexical index attached, a confident BM25 hit answers the vector
+        side locally and the embedding call is skipped; otherwise the BM25,
+        vector and graph rankings are combined with reciprocal rank fusion.
+        A metadata filter (Pinecone syntax) restricts the vector and lexical
+        matches; graph context for entities named in the query is kept as is.
+        With graph=False only the vector side runs, for callers that already
+        hold the graph context.
+        """
+        start = time.perf_counter()
+        timings = {}
+        lexical_results = None
+        if self.lexical is not None:
+            lexical_results = self._timed("lexical_search", timings, self.lexical.search, query, top_k, filter=filter)
+        fast_path = lexical_results is not None and self.lexical.is_confident(lexical_results)
+
+        # Each worker runs in a copy of the caller's context so its spans join the request trace
+        futures = {}
+        # Without a graph source the vector documents' denormalized neighbourhoods stand in for it
+        if graph and self.neo4j is not None:
+            futures["graph"] = (
+                self.executor.submit(contextvars.copy_context().run, self._graph_lookup, query, timings),
+                self.graph_timeout
+            )
+        if not fast_path:
+            futures["vector"] = (
+                self.executor.submit(contextvars.copy_context().run, self._vector_lookup, query, top_k, timings, filter),
+                self.vector_timeout
+            )
+
+        results, timed_out, errors = {}, [], {}
+        for source, (future, timeout) in futures.items():
+            remaining = max(0.0, timeout - (time.perf_counter() - start))
+            try:
+                results[source] = future.result(timeout=remaining)
+            except TimeoutError:
+                timed_out.append(source)
+                logger.warning(f"{source} retrieval exceeded {timeout:.2f}s; continuing without it")
+            except Exception as e:
+                errors[source] = str(e)
+                logger.error(f"{source} retrieval failed: {str(e)}")
+
+        graph_context = results.get("graph")
+        vector = results.get("vector") or {}
+        if fast_path:
+            path, matches = "lexical", lexical_results
+        elif lexical_results is not None:
+            path = "fused"
+            matches = reciprocal_rank_fusion(
+                {
+                    "vector": vector.get("matches"),
+                    "lexical": lexical_results,
+                    "graph": [
+                        item for item in self._graph_ranking(graph_context)
+                        if not filter or metadata_matches(self.lexical.by_id.get(item["id"], {}), filter)
+                    ],
+                },
+                top_k=top_k,
+                documents=self.lexical.by_id
+            )
+        else:
+            path, matches = "hybrid", vector.get("matches")
+        self.path_counts[path] += 1
+        metrics.count("retrieval_path_total", path=path)
+
+        total = time.perf_counter() - start
+        self.latencies.record("retrieval", total)
+        timings["retrieval"] = round(total * 1000, 2)
+        logger.info(f"Retrieval timings (ms, {path}): {dict(timings)}")
+
+        return {
+            "graph": graph_context,
+            "vectors": matches,
+            "query_embedding": vector.get("embedding"),
+            "path": path,
+            "timings": dict(timings),
+            "timed_out": timed_out,
+            "errors": errors,
+        }
+
+    def latency_summary(self) -> Dict[str, Dict]:
+        """p50/p95/p99 per retrieval stage over recent queries"""
+        return self.latencies.summary()
+
+    def close(self):
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
@@ -1,27 +1,115 @@
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-class Config:
-    # Neo4j Configuration
-    NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-    NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-    NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-
-    # Pinecone Configuration
-    PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-    PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
-    PINECONE_INDEX_NAME = "travel-knowledge"
-    PINECONE_DIMENSION = 1536  # For OpenAI embeddings
-
-    # OpenAI Configuration
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    OPENAI_MODEL = "gpt-4"
-    EMBEDDING_MODEL = "text-embedding-ada-002"
-
-    # Application Configuration
-    BATCH_SIZE = 100
-    MAX_TOKENS = 500
-    TEMPERATURE = 0.7
-    TOP_K_RESULTS = 5
\ No newline at end of file
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class Config:
+    # Neo4j Configuration
+    NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+    NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+    NEO4J_BATCH_SIZE = int(os.getenv("NEO4J_BATCH_SIZE", "1000"))
+
+    # Pinecone Configuration
+    PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+    PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
+    PINECONE_INDEX_NAME = "travel-knowledge"
+    PINECONE_DIMENSION = 1536  # For OpenAI embeddings
+
+    # Vector backend: "pinecone" (hosted) or "local" (in-process NumPy index)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+    LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "data/cache/local_index")
+
+    # OpenAI Configuration
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_MODEL = "gpt-4"
+    EMBEDDING_MODEL = "text-embedding-ada-002"
+
+    # Embedding Configuration
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+    EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", "4"))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/cache/embeddings.sqlite")
+    # Window (seconds) for coalescing concurrent query embeddings into one call; 0 disables
+    EMBEDDING_BATCH_WINDOW = float(os.getenv("EMBEDDING_BATCH_WINDOW", "0.005"))
+    EMBEDDING_DISPATCH_MAX_BATCH = int(os.getenv("EMBEDDING_DISPATCH_MAX_BATCH", "64"))
+
+    # Data sync Configuration
+    DATASET_PATH = os.getenv("DATASET_PATH", "data/vietnam_travel_dataset.json")
+    SYNC_MANIFEST_PATH = os.getenv("SYNC_MANIFEST_PATH", "data/cache/sync_manifest.json")
+    SYNC_MODE = os.getenv("SYNC_MODE", "incremental")  # "incremental" or "full"
+
+    # Retrieval Configuration (seconds)
+    RETRIEVAL_VECTOR_TIMEOUT = float(os.getenv("RETRIEVAL_VECTOR_TIMEOUT", "3.0"))
+    RETRIEVAL_GRAPH_TIMEOUT = float(os.getenv("RETRIEVAL_GRAPH_TIMEOUT", "2.0"))
+    RETRIEVAL_MAX_WORKERS = int(os.getenv("RETRIEVAL_MAX_WORKERS", "8"))
+    # Vector documents carry a neighbourhood summary, so the graph lookup can be turned off
+    RETRIEVAL_GRAPH_ENABLED = os.getenv("RETRIEVAL_GRAPH_ENABLED", "true").lower() == "true"
+
+    # Graph snapshot Configuration
+    GRAPH_SNAPSHOT_ENABLED = os.getenv("GRAPH_SNAPSHOT_ENABLED", "true").lower() == "true"
+    GRAPH_SNAPSHOT_PATH = os.getenv("GRAPH_SNAPSHOT_PATH", "data/cache/graph_snapshot.npz")
+
+    # Lexical (BM25) retrieval Configuration
+    LEXICAL_ENABLED = os.getenv("LEXICAL_ENABLED", "true").lower() == "true"
+    LEXICAL_MIN_COVERAGE = float(os.getenv("LEXICAL_MIN_COVERAGE", "0.8"))
+    LEXICAL_MIN_MARGIN = float(os.getenv("LEXICAL_MIN_MARGIN", "1.5"))
+
+    # Semantic response cache Configuration
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+
+    # Shared resource Configuration
+    HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "30"))
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+
+    # Chunking Configuration
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+    CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(os.cpu_count() or 1)))
+
+    # Metrics Configuration
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    METRICS_EXPORT_PATH = os.getenv("METRICS_EXPORT_PATH", "data/cache/metrics.prom")
+    SLOW_REQUEST_THRESHOLD = float(os.getenv("SLOW_REQUEST_THRESHOLD", "3.0"))
+    SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", "1.0"))
+
+    # Rate limit and retry Configuration (per minute; 0 disables a limit)
+    EMBEDDING_RPM = float(os.getenv("EMBEDDING_RPM", "3000"))
+    EMBEDDING_TPM = float(os.getenv("EMBEDDING_TPM", "1000000"))
+    CHAT_RPM = float(os.getenv("CHAT_RPM", "3500"))
+    CHAT_TPM = float(os.getenv("CHAT_TPM", "90000"))
+    VECTOR_INDEX_RPM = float(os.getenv("VECTOR_INDEX_RPM", "6000"))
+    SCHEDULER_MAX_CONCURRENCY = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "16"))
+    # Calls slower than these (seconds) shrink the client's concurrency; 0 disables
+    EMBEDDING_TARGET_LATENCY = float(os.getenv("EMBEDDING_TARGET_LATENCY", "5"))
+    CHAT_TARGET_LATENCY = float(os.getenv("CHAT_TARGET_LATENCY", "30"))
+    VECTOR_INDEX_TARGET_LATENCY = float(os.getenv("VECTOR_INDEX_TARGET_LATENCY", "5"))
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "6"))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))
+    INDEX_READY_TIMEOUT = float(os.getenv("INDEX_READY_TIMEOUT", "300"))
+
+    # Vector snapshot Configuration
+    VECTOR_SNAPSHOT_PATH = os.getenv("VECTOR_SNAPSHOT_PATH", "data/cache/vector_snapshot.npz")
+    # Pinecone caps upsert requests at 2MB, about 100 vectors of 1536 dimensions with metadata
+    SNAPSHOT_RESTORE_BATCH_SIZE = int(os.getenv("SNAPSHOT_RESTORE_BATCH_SIZE", "100"))
+
+    # Session memory Configuration
+    SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "12"))
+    SESSION_SUMMARY_TOKENS = int(os.getenv("SESSION_SUMMARY_TOKENS", "300"))
+    SESSION_ENTITY_CACHE_SIZE = int(os.getenv("SESSION_ENTITY_CACHE_SIZE", "32"))
+    SESSION_HISTORY_TOKENS = int(os.getenv("SESSION_HISTORY_TOKENS", "600"))
+
+    # Startup Configuration
+    STARTUP_MODE = os.getenv("STARTUP_MODE", "fast")  # "fast" (render first, sync in background) or "full"
+    STARTUP_DEADLINE = float(os.getenv("STARTUP_DEADLINE", "10"))
+    RUN_TESTS_ON_STARTUP = os.getenv("RUN_TESTS_ON_STARTUP", "false").lower() == "true"
+    STARTUP_REPORT_PATH = os.getenv("STARTUP_REPORT_PATH", "data/cache/startup.json")
+
+    # Application Configuration
+    BATCH_SIZE = 100
+    MAX_TOKENS = 500
+    TEMPERATURE = 0.7
+    TOP_K_RESULTS = 5
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
\ No newline at end of file
@@ -0,0 +1,117 @@
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List
+
+# Common alternative names that do not appear in the dataset itself
+DEFAULT_ALIASES = {
+    "city_hanoi": ["ha noi"],
+    "city_ho_chi_minh": ["saigon", "hcmc", "sai gon"],
+    "city_ha_long": ["halong", "halong bay"],
+    "city_da_nang": ["danang"],
+    "city_hoi_an": ["hoian"],
+    "city_da_lat": ["dalat"],
+}
+
+ID_PREFIX = re.compile(r"^(city|attraction|hotel|activity)_")
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase, strip diacritics and punctuation, and split into tokens"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.replace("đ", "d").replace("Đ", "D")
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+class EntityMatcher:
+    """Aho-Corasick automaton over token sequences of entity names and aliases
+
+    Matching is a single left-to-right pass over the prompt tokens regardless of
+    how many entities are known, and only whole-word matches are reported.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[tuple]] = [[]]
+        self.entities: Dict[str, Dict] = {}
+        self._built = False
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], aliases: Dict[str, List[str]] = None) -> "EntityMatcher":
+        aliases = DEFAULT_ALIASES if aliases is None else aliases
+        matcher = cls()
+        for record in records:
+            names = [record['name'], *record.get('aliases', []), *aliases.get(record['id'], [])]
+            if record.get('type') == 'City':
+                # city_ho_chi_minh -> "ho chi minh"
+                names.append(ID_PREFIX.sub("", record['id']).replace("_", " "))
+            matcher.add(record['id'], names, name=record['name'], type=record.get('type'))
+        matcher.build()
+        return matcher
+
+    def add(self, entity_id: str, names: Iterable[str], **attributes):
+        """Register an entity under one or more names"""
+        if self._built:
+            raise RuntimeError("EntityMatcher cannot be extended after build()")
+        self.entities[entity_id] = {"id": entity_id, **attributes}
+        for name in names:
+            tokens = normalize(name)
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][token] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            if (len(tokens), entity_id) not in self._output[state]:
+                self._output[state].append((len(tokens), entity_id))
+
+    def build(self):
+        """Compute failure links breadth-first"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                if self._fail[child] == child:
+                    self._fail[child] = 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+
+    def find(self, text: str) -> List[Dict]:
+        """Return the entities mentioned in text, longest non-overlapping matches first-to-last"""
+        tokens = normalize(text)
+        candidates = []
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for length, entity_id in self._output[state]:
+                candidates.append((position - length + 1, position + 1, entity_id))
+
+        # Prefer the longest match at each position, e.g. "Hanoi Hotel 16" over "Hanoi"
+        candidates.sort(key=lambda match: (match[0], -(match[1] - match[0])))
+        matches, seen, covered_until = [], set(), 0
+        for start, end, entity_id in candidates:
+            if start < covered_until:
+                continue
+            covered_until = end
+            if entity_id not in seen:
+                seen.add(entity_id)
+                matches.append({**self.entities[entity_id], "span": (start, end)})
+        return matches
+
+    def find_ids(self, text: str) -> List[str]:
+        return [match["id"] for match in self.find(text)]
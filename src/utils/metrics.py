@@ -0,0 +1,199 @@
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# For histograms of counts rather than seconds, e.g. batch sizes
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+PREFIX = "travel_assistant"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start", "children", "_token", "_parent")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+        self.children: List[Tuple[str, float]] = []
+
+    def __enter__(self):
+        self._parent = _current_span.get()
+        self._token = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        self.metrics.observe("stage_seconds", elapsed, stage=self.name)
+        if self._parent is not None:
+            self._parent.children.append((self.name, elapsed))
+        else:
+            self.metrics.finish_root(self, elapsed)
+        return False
+
+
+class Metrics:
+    """Per-stage latency histograms, counters and a sampled slow-request log
+
+    When disabled, span() returns a shared no-op context manager and the other
+    recording calls return immediately, so instrumentation can stay in place.
+    """
+
+    def __init__(self, enabled: bool = Config.METRICS_ENABLED,
+                 slow_threshold: float = Config.SLOW_REQUEST_THRESHOLD,
+                 slow_sample_rate: float = Config.SLOW_REQUEST_SAMPLE_RATE,
+                 max_slow_requests: int = 100):
+        self.enabled = enabled
+        self.slow_threshold = slow_threshold
+        self.slow_sample_rate = slow_sample_rate
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple], List] = {}
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self.slow_requests = deque(maxlen=max_slow_requests)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.slow_requests.clear()
+
+    def span(self, name: str):
+        """Time a block as a stage; nested spans are attributed to the enclosing request"""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def observe(self, name: str, value: float, buckets: Tuple = BUCKETS, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(buckets), 0.0, 0, buckets]
+            index = bisect.bisect_left(histogram[3], value)
+            if index < len(histogram[3]):
+                histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def count(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def record_stage(self, name: str, seconds: float):
+        """Record a stage timed by the caller, e.g. one that spans generator yields
+
+        A span must not be held across yields: the generator may resume in a
+        different context, and resetting the context variable there fails.
+        """
+        if not self.enabled:
+            return
+        self.observe("stage_seconds", seconds, stage=name)
+        parent = _current_span.get()
+        if parent is not None:
+            parent.children.append((name, seconds))
+
+    def finish_root(self, span: _Span, elapsed: float):
+        """Keep a sampled record of requests slower than the threshold"""
+        if elapsed < self.slow_threshold:
+            return
+        self.count("slow_requests_total", stage=span.name)
+        if random.random() >= self.slow_sample_rate:
+            return
+        record = {
+            "stage": span.name,
+            "seconds": round(elapsed, 4),
+            "at": time.time(),
+            "children": [{"stage": name, "seconds": round(seconds, 4)} for name, seconds in span.children],
+        }
+        self.slow_requests.append(record)
+        logger.warning(f"Slow {span.name}: {json.dumps(record)}")
+
+    @staticmethod
+    def _labels(labels: Tuple, extra: Optional[Tuple] = None) -> str:
+        items = list(labels) + ([extra] if extra else [])
+        if not items:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+    def export_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = {key: ([*value[0]], value[1], value[2], value[3]) for key, value in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {PREFIX}_{name} histogram")
+            for (metric, labels), (buckets, total, count, bounds) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(bounds, buckets):
+                    cumulative += bucket_count
+                    lines.append(f"{PREFIX}_{name}_bucket{self._labels(labels, ('le', bound))} {cumulative}")
+                lines.append(f"{PREFIX}_{name}_bucket{self._labels(labels, ('le', '+Inf'))} {count}")
+                lines.append(f"{PREFIX}_{name}_sum{self._labels(labels)} {total:.6f}")
+                lines.append(f"{PREFIX}_{name}_count{self._labels(labels)} {count}")
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {PREFIX}_{name} counter")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{PREFIX}_{name}{self._labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str = Config.METRICS_EXPORT_PATH):
+        """Atomically write the Prometheus text file (e.g. for a node_exporter textfile collector)"""
+        if not self.enabled or not path:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.export_prometheus())
+        os.replace(tmp_path, path)
+
+
+metrics = Metrics()
+
+
+def traced(name: str):
+    """Decorator that records the wrapped call as a stage span"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            with metrics.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
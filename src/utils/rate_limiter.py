@@ -0,0 +1,255 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from src.utils.config import Config
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Refills `rate_per_minute` units per minute up to `capacity`"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` units and return how long to wait before using them
+
+        Requests larger than the capacity are clamped so they can proceed once
+        the bucket is full instead of waiting forever.
+        """
+        if self.rate <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, amount: float = 1):
+        delay = self.reserve(amount)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit adjusted by AIMD
+
+    Each success under the latency target grows the limit by 1/limit (about
+    one slot per round of requests); a rate-limit response or a slow call
+    halves it.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 64,
+                 target_latency: Optional[float] = None, decrease_factor: float = 0.5):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self, latency: float):
+        with self._condition:
+            if self.target_latency and latency > self.target_latency:
+                self._decrease()
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def on_overload(self):
+        with self._condition:
+            self._decrease()
+
+    def _decrease(self):
+        self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """HTTP status of an API error from the openai or pinecone clients, if it carries one"""
+    for attribute in ("http_status", "status", "status_code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return status_code(error) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and transient connection failures"""
+    if is_rate_limited(error):
+        return True
+    status = status_code(error)
+    if status is not None:
+        return status >= 500
+    return type(error).__name__ in (
+        "Timeout", "TimeoutError", "APIConnectionError", "ServiceUnavailableError", "TryAgain", "ConnectionError"
+    )
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds requested by a Retry-After header on the error, if any"""
+    headers = getattr(error, "headers", None) or {}
+    try:
+        value = headers.get("Retry-After") or headers.get("retry-after")
+    except AttributeError:
+        return None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = Config.RETRY_BASE_DELAY,
+                  maximum: float = Config.RETRY_MAX_DELAY) -> float:
+    """Full-jitter exponential backoff for the given (0-based) retry attempt"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+def wait_for(predicate: Callable[[], bool], timeout: float, initial: float = 0.5,
+             maximum: float = 5.0, description: str = "condition") -> float:
+    """Poll until predicate() is true, backing off between checks; returns the seconds waited"""
+    start = time.monotonic()
+    interval = initial
+    while True:
+        if predicate():
+            return time.monotonic() - start
+        elapsed = time.monotonic() - start
+        if elapsed >= timeout:
+            raise TimeoutError(f"Timed out after {timeout:.0f}s waiting for {description}")
+        time.sleep(min(interval, timeout - elapsed))
+        interval = min(maximum, interval * 2)
+
+
+class RequestScheduler:
+    """Shared gate for one API client: rate limits, adaptive concurrency and retries
+
+    Each call takes `tokens` tokens from the per-minute bucket once, and one
+    request plus a concurrency slot per attempt. Rate-limit responses halve the
+    concurrency limit and are retried after the Retry-After delay when the
+    provider sends one, otherwise after jittered exponential backoff.
+    """
+
+    def __init__(self, name: str,
+                 requests_per_minute: float = 0,
+                 tokens_per_minute: float = 0,
+                 max_concurrency: int = Config.SCHEDULER_MAX_CONCURRENCY,
+                 initial_concurrency: Optional[int] = None,
+                 target_latency: Optional[float] = None,
+                 max_retries: int = Config.RETRY_MAX_ATTEMPTS,
+                 base_delay: float = Config.RETRY_BASE_DELAY,
+                 max_delay: float = Config.RETRY_MAX_DELAY,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(
+            initial_concurrency or max(1, max_concurrency // 2), maximum=max_concurrency,
+            target_latency=target_latency
+        )
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["concurrency_limit"] = round(self.concurrency.limit, 2)
+        return stats
+
+    def call(self, fn: Callable, *args, tokens: int = 0, **kwargs):
+        """Run fn(*args, **kwargs) within the limits, retrying transient failures"""
+        attempt = 0
+        # Tokens are reserved once per logical call; a retry resends the same input
+        token_wait = self.tokens.reserve(tokens)
+        while True:
+            wait = max(self.requests.reserve(1), token_wait)
+            token_wait = 0.0
+            if wait > 0:
+                self.sleep(wait)
+            self.concurrency.acquire()
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.concurrency.release()
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    self._count("failures")
+                    raise
+                if is_rate_limited(e):
+                    self._count("rate_limited")
+                    self.concurrency.on_overload()
+                    metrics.count("rate_limited_total", client=self.name)
+                delay = retry_after(e)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+                self._count("retries")
+                metrics.count("retries_total", client=self.name)
+                logger.warning(
+                    f"{self.name} request failed ({str(e)}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                )
+                self.sleep(delay)
+                attempt += 1
+                continue
+            self.concurrency.release()
+            self.concurrency.on_success(time.perf_counter() - start)
+            self._count("calls")
+            return result
+
+
+_schedulers: Dict[str, RequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+# Per-client limits; 0 disables a bucket
+LIMITS = {
+    "embedding": lambda: dict(requests_per_minute=Config.EMBEDDING_RPM, tokens_per_minute=Config.EMBEDDING_TPM,
+                              target_latency=Config.EMBEDDING_TARGET_LATENCY or None),
+    "chat": lambda: dict(requests_per_minute=Config.CHAT_RPM, tokens_per_minute=Config.CHAT_TPM,
+                         target_latency=Config.CHAT_TARGET_LATENCY or None),
+    "vector_index": lambda: dict(requests_per_minute=Config.VECTOR_INDEX_RPM,
+                                 target_latency=Config.VECTOR_INDEX_TARGET_LATENCY or None),
+}
+
+
+def get_scheduler(name: str) -> RequestScheduler:
+    """The process-wide scheduler for a client, shared by every caller"""
+    with _schedulers_lock:
+        if name not in _schedulers:
+            _schedulers[name] = RequestScheduler(name, **LIMITS.get(name, dict)())
+        return _schedulers[name]
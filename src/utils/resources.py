@@ -0,0 +1,252 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceRegistry:
+    """Process-wide registry of lazily constructed, shared clients
+
+    Streamlit re-executes the app script on every interaction but keeps
+    imported modules, so resources held here survive reruns and are shared by
+    every session in the process. Each resource can have a health check; a
+    failed check closes the resource and everything built on top of it, and
+    the next get() reconnects.
+    """
+
+    def __init__(self, health_check_interval: float = Config.HEALTH_CHECK_INTERVAL):
+        self.health_check_interval = health_check_interval
+        self._lock = threading.RLock()
+        self._factories: Dict[str, Callable] = {}
+        self._health_checks: Dict[str, Optional[Callable]] = {}
+        self._closers: Dict[str, Optional[Callable]] = {}
+        self._dependencies: Dict[str, List[str]] = {}
+        self._resources: Dict[str, object] = {}
+        self._last_checked: Dict[str, float] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, factory: Callable,
+                 health_check: Optional[Callable] = None,
+                 close: Optional[Callable] = None,
+                 depends_on: Optional[List[str]] = None):
+        with self._lock:
+            self._factories[name] = factory
+            self._health_checks[name] = health_check
+            self._closers[name] = close
+            self._dependencies[name] = list(depends_on or [])
+
+    def get(self, name: str, check: bool = False):
+        """Return the shared resource, building it on first use
+
+        Construction holds only that resource's build lock, so independent
+        resources (e.g. the Neo4j driver and the vector index) can be built
+        concurrently while a second caller for the same one waits.
+        """
+        if check:
+            # Outside the lock, so a slow probe does not block other resources
+            self.check(name)
+        with self._lock:
+            if name not in self._factories:
+                raise KeyError(f"Unknown resource '{name}'")
+            if name in self._resources:
+                return self._resources[name]
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+        with build_lock:
+            with self._lock:
+                if name in self._resources:
+                    return self._resources[name]
+                factory = self._factories[name]
+            logger.info(f"Creating shared resource '{name}'")
+            resource = factory()
+            with self._lock:
+                self._resources[name] = resource
+                self._last_checked[name] = time.monotonic()
+            return resource
+
+    def check(self, name: str, force: bool = False) -> bool:
+        """Run the health check at most once per interval; reset the resource if it fails"""
+        with self._lock:
+            resource = self._resources.get(name)
+            health_check = self._health_checks.get(name)
+            if resource is None or health_check is None:
+                return True
+            if not force and time.monotonic() - self._last_checked.get(name, 0) < self.health_check_interval:
+                return True
+            self._last_checked[name] = time.monotonic()
+        # Probed outside the lock so checks of different backends can overlap
+        try:
+            healthy = health_check(resource) is not False
+        except Exception as e:
+            logger.warning(f"Health check for '{name}' failed: {str(e)}")
+            healthy = False
+        if not healthy:
+            with self._lock:
+                if self._resources.get(name) is resource:
+                    self.reset(name)
+        return healthy
+
+    def health(self) -> Dict[str, bool]:
+        """Force a health check of every constructed resource"""
+        with self._lock:
+            return {name: self.check(name, force=True) for name in list(self._resources)}
+
+    def reset(self, name: str):
+        """Close a resource and everything that depends on it"""
+        with self._lock:
+            for dependent, dependencies in self._dependencies.items():
+                if name in dependencies and dependent in self._resources:
+                    self.reset(dependent)
+            resource = self._resources.pop(name, None)
+            self._last_checked.pop(name, None)
+            closer = self._closers.get(name)
+            if resource is not None and closer is not None:
+                try:
+                    closer(resource)
+                except Exception as e:
+                    logger.warning(f"Error closing '{name}': {str(e)}")
+
+    def shutdown(self):
+        """Close every resource, dependents first"""
+        with self._lock:
+            for name in reversed(list(self._resources)):
+                if name in self._resources:
+                    self.reset(name)
+
+
+def _http_session():
+    import openai
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=Config.HTTP_POOL_SIZE, pool_maxsize=Config.HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # The openai 0.x client pinned in requirements.txt sends every request through this session
+    openai.requestssession = session
+    return session
+
+
+def _embedder(registry: ResourceRegistry):
+    from src.models.embedding_engine import EmbeddingEngine
+    registry.get("http_session")
+    return EmbeddingEngine()
+
+
+def _neo4j():
+    from src.database.neo4j_manager import Neo4jManager
+    return Neo4jManager()
+
+
+def _vector_store(registry: ResourceRegistry):
+    from src.database.vector_store import create_vector_manager
+    return create_vector_manager(embedder=registry.get("embedder"))
+
+
+def _vector_store_health(store):
+    index = getattr(store, "index", None)
+    if index is not None:
+        index.describe_index_stats()
+    return True
+
+
+def _llm(registry: ResourceRegistry):
+    from src.models.llm_handler import LLMHandler
+    registry.get("http_session")
+    return LLMHandler()
+
+
+def _matcher():
+    from src.utils.entity_matcher import EntityMatcher
+    from src.utils.text_processor import TextProcessor
+    return EntityMatcher.from_records(TextProcessor.parse_location_data(Config.DATASET_PATH))
+
+
+def _lexical_index():
+    from src.database.lexical_index import BM25Index
+    from src.utils.text_processor import TextProcessor
+    records = TextProcessor.parse_location_data(Config.DATASET_PATH)
+    return BM25Index.from_records(TextProcessor.attach_neighborhoods(TextProcessor.inherit_city_fields(records)))
+
+
+def _data_version():
+    from src.database.sync_manager import manifest_version
+    return manifest_version()
+
+
+def _graph_snapshot(registry: ResourceRegistry):
+    from src.database.graph_snapshot import GraphSnapshotStore
+    return GraphSnapshotStore.open(version=registry.get("data_version"))
+
+
+def graph_source() -> Optional[str]:
+    """The resource that serves retrieval's graph lookups, or None without graph retrieval"""
+    if not Config.RETRIEVAL_GRAPH_ENABLED:
+        return None
+    # The snapshot answers neighbourhood and route lookups in-process instead of Neo4j
+    return "graph_snapshot" if Config.GRAPH_SNAPSHOT_ENABLED else "neo4j"
+
+
+def _retriever(registry: ResourceRegistry):
+    from src.models.retriever import HybridRetriever
+    source = graph_source()
+    return HybridRetriever(
+        registry.get(source) if source else None, registry.get("vector_store"), registry.get("matcher"),
+        executor=registry.get("retrieval_pool"),
+        lexical=registry.get("lexical_index") if Config.LEXICAL_ENABLED else None
+    )
+
+
+def _retrieval_pool():
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=Config.RETRIEVAL_MAX_WORKERS, thread_name_prefix="retrieval")
+
+
+def _response_cache():
+    from src.models.response_cache import SemanticResponseCache
+    return SemanticResponseCache()
+
+
+def register_defaults(registry: ResourceRegistry):
+    registry.register("http_session", _http_session, close=lambda session: session.close())
+    registry.register("embedder", lambda: _embedder(registry),
+                      close=lambda engine: engine.close(), depends_on=["http_session"])
+    registry.register("neo4j", _neo4j,
+                      health_check=lambda neo4j: neo4j.driver.verify_connectivity(),
+                      close=lambda neo4j: neo4j.close())
+    registry.register("vector_store", lambda: _vector_store(registry),
+                      health_check=_vector_store_health, depends_on=["embedder"])
+    registry.register("llm", lambda: _llm(registry), depends_on=["http_session"])
+    registry.register("matcher", _matcher)
+    registry.register("lexical_index", _lexical_index)
+    # The synced data's version, read from the manifest once and reset after each sync
+    registry.register("data_version", _data_version)
+    registry.register("graph_snapshot", lambda: _graph_snapshot(registry))
+    # Owned by the registry so a retriever rebuilt after a sync does not shut down
+    # the pool that sessions holding the previous retriever still submit to
+    registry.register("retrieval_pool", _retrieval_pool, close=lambda pool: pool.shutdown(wait=False))
+    registry.register("retriever", lambda: _retriever(registry),
+                      close=lambda retriever: retriever.close(),
+                      depends_on=[name for name in (graph_source(), "vector_store", "matcher", "lexical_index", "retrieval_pool")
+                                  if name])
+    registry.register("response_cache", _response_cache)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ResourceRegistry:
+    """The process-wide registry, with the default resources registered"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ResourceRegistry()
+            register_defaults(_registry)
+            atexit.register(_registry.shutdown)
+        return _registry
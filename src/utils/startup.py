@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from src.utils.config import Config
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Wall-clock breakdown of startup phases, measured from `origin`"""
+
+    def __init__(self, origin: Optional[float] = None, path: Optional[str] = Config.STARTUP_REPORT_PATH):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.path = path
+        self._lock = threading.Lock()
+        self.phases: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] = round(seconds, 4)
+        metrics.observe("startup_seconds", seconds, phase=name)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def mark(self, name: str) -> float:
+        """Record the time from origin to now, e.g. time to first render"""
+        elapsed = time.perf_counter() - self.origin
+        with self._lock:
+            self.marks.setdefault(name, round(elapsed, 4))
+            return self.marks[name]
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {"phases": dict(self.phases), "marks": dict(self.marks)}
+
+    def write(self):
+        """Save the report as JSON; a timer without a path only logs"""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def run_checks(checks: Dict[str, Callable], deadline: float,
+               timer: Optional[StartupTimer] = None) -> Dict[str, str]:
+    """Run readiness checks concurrently and report each as ok, failed or timeout
+
+    Checks still running at the deadline are left to finish in the
+    background; their resources are then ready on first use.
+    """
+    if not checks:
+        return {}
+
+    def timed(name: str, check: Callable):
+        if timer is None:
+            return check()
+        with timer.phase(f"check:{name}"):
+            return check()
+
+    executor = ThreadPoolExecutor(max_workers=len(checks), thread_name_prefix="readiness")
+    futures = {name: executor.submit(timed, name, check) for name, check in checks.items()}
+    wait(list(futures.values()), timeout=deadline)
+    executor.shutdown(wait=False)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            results[name] = "timeout"
+        elif future.exception() is not None:
+            results[name] = f"failed: {future.exception()}"
+        else:
+            results[name] = "ok"
+    return results
+
+
+class BackgroundBoot:
+    """Readiness checks followed by the data sync, on a background thread
+
+    The app renders while this runs; status() describes progress for the UI.
+    """
+
+    def __init__(self, checks: Dict[str, Callable], sync: Optional[Callable] = None,
+                 deadline: float = Config.STARTUP_DEADLINE, timer: Optional[StartupTimer] = None):
+        self.checks = checks
+        self.sync = sync
+        self.deadline = deadline
+        self.timer = timer if timer is not None else StartupTimer()
+        self.state = "pending"
+        self.readiness: Dict[str, str] = {}
+        self.sync_summary: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="background-boot", daemon=True)
+
+    def start(self) -> "BackgroundBoot":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.state = "checking"
+            with self.timer.phase("readiness"):
+                self.readiness = run_checks(self.checks, self.deadline, self.timer)
+            failed = {name: result for name, result in self.readiness.items() if result != "ok"}
+            if failed:
+                logger.warning(f"Backends not ready at startup: {failed}")
+            if self.sync is not None:
+                self.state = "syncing"
+                with self.timer.phase("sync"):
+                    self.sync_summary = self.sync()
+            self.state = "degraded" if failed else "ready"
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            logger.error(f"Background startup failed: {str(e)}")
+        finally:
+            self.timer.mark("boot_complete")
+            logger.info(f"Startup breakdown: {json.dumps(self.timer.report())}")
+            self.timer.write()
+            self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> Optional[str]:
+        """Short notice for the UI while startup is incomplete or degraded, else None"""
+        if self.state in ("pending", "checking"):
+            return "Connecting to backends..."
+        if self.state == "syncing":
+            return "Syncing travel data in the background; answers may be incomplete."
+        if self.state == "degraded":
+            failed = ", ".join(name for name, result in self.readiness.items() if result != "ok")
+            return f"Some backends are unavailable ({failed}); answers may be incomplete."
+        if self.state == "failed":
+            return f"Startup sync failed: {self.error}"
+        return None
+
+
+_boot: Optional[BackgroundBoot] = None
+_boot_lock = threading.Lock()
+
+
+def start_once(factory: Callable[[], BackgroundBoot]) -> BackgroundBoot:
+    """Start the process-wide background boot on the first call and return it
+
+    Streamlit re-executes the app script on every interaction; this module
+    stays imported, so later reruns get the boot that is already running.
+    """
+    global _boot
+    with _boot_lock:
+        if _boot is None:
+            _boot = factory().start()
+        return _boot
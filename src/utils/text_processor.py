@@ -1,59 +1,374 @@
-import re
-from typing import List, Dict
-import json
-
-class TextProcessor:
-    @staticmethod
-    def clean_text(text: str) -> str:
-        """Clean and normalize text"""
-        # Remove special characters and extra whitespace
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip().lower()
-
-    @staticmethod
-    def chunk_text(text: str, chunk_size: int = 1000) -> List[str]:
-        """Split text into smaller chunks for processing"""
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_length = 0
-
-        for word in words:
-            if current_length + len(word) + 1 <= chunk_size:
-                current_chunk.append(word)
-                current_length += len(word) + 1
-            else:
-                chunks.append(' '.join(current_chunk))
-                current_chunk = [word]
-                current_length = len(word)
-
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
-        return chunks
-
-    @staticmethod
-    def parse_location_data(file_path: str) -> List[Dict]:
-        """Parse location data from JSON file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON format in {file_path}: {str(e)}")
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Location data file not found: {file_path}")
-
-    @staticmethod
-    def extract_relationships(locations: List[Dict]) -> List[Dict]:
-        """Extract relationships between locations"""
-        relationships = []
-        for loc in locations:
-            if 'connected_to' in loc:
-                for connection in loc['connected_to']:
-                    relationships.append({
-                        'source': loc['name'],
-                        'target': connection['name'],
-                        'type': connection.get('type', 'CONNECTS_TO')
-                    })
-        return relationships
\ No newline at end of file
+import re
+import os
+import json
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+from src.utils.config import Config
+
+TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+TEXT_FIELDS = ('name', 'semantic_text', 'description')
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken's encoding, loaded on first use; None falls back to a cheap estimate
+
+    tiktoken is optional, and get_encoding downloads its BPE file on first
+    use, so it can also fail offline; either way token counts are estimated.
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=65536)
+def _word_tokens(word: str) -> int:
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(" " + word))
+    # Roughly one token per 4 characters of a word, and one per punctuation mark
+    return sum(max(1, (len(piece) + 3) // 4) for piece in TOKEN_PIECES.findall(word)) or 1
+
+
+def _clean_batch(batch: List[Dict]) -> List[Dict]:
+    """Clean a batch of records; runs in a worker process"""
+    return [
+        {**record, 'text': TextProcessor.clean_text(record['text'])}
+        for record in batch
+    ]
+
+
+class TextProcessor:
+    # Document fields copied into vector metadata besides content and type
+    METADATA_FIELDS = ('source_id', 'name', 'city', 'region', 'tags', 'best_time_to_visit',
+                       'connected_cities', 'nearby')
+
+    @staticmethod
+    def clean_text(text: str) -> str:
+        """Clean and normalize text"""
+        # Remove special characters and extra whitespace
+        text = re.sub(r'[^\w\s]', ' ', text)
+        text = re.sub(r'\s+', ' ', text)
+        return text.strip().lower()
+
+    @staticmethod
+    def chunk_text(text: str, chunk_size: int = 1000) -> List[str]:
+        """Split text into smaller chunks for processing"""
+        words = text.split()
+        chunks = []
+        current_chunk = []
+        current_length = 0
+
+        for word in words:
+            if current_length + len(word) + 1 <= chunk_size:
+                current_chunk.append(word)
+                current_length += len(word) + 1
+            else:
+                chunks.append(' '.join(current_chunk))
+                current_chunk = [word]
+                current_length = len(word)
+
+        if current_chunk:
+            chunks.append(' '.join(current_chunk))
+        return chunks
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        """Token count with tiktoken when installed, otherwise an estimate"""
+        encoding = _encoding()
+        if encoding is not None:
+            return len(encoding.encode(text))
+        return sum(_word_tokens(word) for word in text.split())
+
+    @staticmethod
+    def chunk_tokens(text: str, max_tokens: int = Config.CHUNK_MAX_TOKENS,
+                     overlap: int = Config.CHUNK_OVERLAP_TOKENS) -> Iterator[str]:
+        """Split text into chunks of at most max_tokens, overlapping by about `overlap` tokens"""
+        if overlap >= max_tokens:
+            raise ValueError("overlap must be smaller than max_tokens")
+        window = deque()
+        window_tokens = 0
+        fresh = False
+        for word in text.split():
+            cost = _word_tokens(word)
+            if window and window_tokens + cost > max_tokens:
+                yield ' '.join(word for word, _ in window)
+                # Keep the tail of the chunk as overlap for the next one
+                while window and (window_tokens > overlap or window_tokens + cost > max_tokens):
+                    window_tokens -= window.popleft()[1]
+                fresh = False
+            window.append((word, cost))
+            window_tokens += cost
+            fresh = True
+        if window and fresh:
+            yield ' '.join(word for word, _ in window)
+
+    @staticmethod
+    def iter_json_array(file_path: str, buffer_size: int = 1 << 16) -> Iterator[Dict]:
+        """Yield the items of a top-level JSON array without loading the whole file"""
+        decoder = json.JSONDecoder()
+        with open(file_path, 'r', encoding='utf-8') as f:
+            buffer = f.read(buffer_size).lstrip()
+            if not buffer.startswith('['):
+                raise ValueError(f"Expected a JSON array in {file_path}")
+            buffer = buffer[1:]
+            eof = False
+            while True:
+                buffer = buffer.lstrip().lstrip(',').lstrip()
+                if buffer.startswith(']'):
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer)
+                    if end == len(buffer) and not eof:
+                        # A scalar may continue in the next read
+                        raise json.JSONDecodeError("Incomplete item", buffer, end)
+                except json.JSONDecodeError:
+                    if eof:
+                        if not buffer:
+                            return
+                        raise ValueError(f"Invalid JSON format in {file_path}")
+                    more = f.read(buffer_size)
+                    eof = not more
+                    buffer += more
+                    continue
+                yield item
+                buffer = buffer[end:]
+
+    @staticmethod
+    def iter_records(file_path: str) -> Iterator[Dict]:
+        """Stream {id, type, text} records from a JSON array, JSON Lines or plain-text corpus"""
+        if file_path.endswith('.json'):
+            for record in TextProcessor.iter_json_array(file_path):
+                yield {
+                    'id': record['id'],
+                    'type': record.get('type', 'unknown'),
+                    'text': '. '.join(str(record[field]) for field in TEXT_FIELDS if record.get(field))
+                }
+        elif file_path.endswith('.jsonl'):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        yield {
+                            'id': record['id'],
+                            'type': record.get('type', 'unknown'),
+                            'text': '. '.join(str(record[field]) for field in TEXT_FIELDS if record.get(field))
+                        }
+        else:
+            # Plain text: one record per blank-line separated paragraph
+            source = os.path.basename(file_path)
+            paragraph, start = [], 1
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for number, line in enumerate(f, 1):
+                    if line.strip():
+                        if not paragraph:
+                            start = number
+                        paragraph.append(line.strip())
+                    elif paragraph:
+                        yield {'id': f"{source}:{start}", 'type': 'travel_info', 'text': ' '.join(paragraph)}
+                        paragraph = []
+            if paragraph:
+                yield {'id': f"{source}:{start}", 'type': 'travel_info', 'text': ' '.join(paragraph)}
+
+    @staticmethod
+    def iter_cleaned(records: Iterator[Dict], workers: int = Config.CHUNK_WORKERS,
+                     batch_size: int = 256) -> Iterator[Dict]:
+        """Clean records in a process pool, keeping a bounded number of batches in flight"""
+        def batches():
+            batch = []
+            for record in records:
+                batch.append(record)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        if workers <= 1:
+            for batch in batches():
+                yield from _clean_batch(batch)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            for batch in batches():
+                in_flight.append(executor.submit(_clean_batch, batch))
+                if len(in_flight) >= workers * 2:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+
+    @staticmethod
+    def iter_chunks(file_path: str,
+                    max_tokens: int = Config.CHUNK_MAX_TOKENS,
+                    overlap: int = Config.CHUNK_OVERLAP_TOKENS,
+                    workers: Optional[int] = None) -> Iterator[Dict[str, str]]:
+        """Stream token-budgeted chunks, tagged with their source entity id, from a corpus file
+
+        Library use only: DatasetSync writes the dataset's own documents, so
+        chunks of the dataset itself would duplicate them under #n ids.
+        """
+        workers = Config.CHUNK_WORKERS if workers is None else workers
+        records = TextProcessor.iter_records(file_path)
+        for record in TextProcessor.iter_cleaned(records, workers=workers):
+            for n, chunk in enumerate(TextProcessor.chunk_tokens(record['text'], max_tokens, overlap)):
+                yield {
+                    "id": f"{record['id']}#{n}",
+                    "content": chunk,
+                    "type": record['type'],
+                    "source_id": record['id']
+                }
+
+    @staticmethod
+    def parse_location_data(file_path: str) -> List[Dict]:
+        """Parse location data from JSON file"""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON format in {file_path}: {str(e)}")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Location data file not found: {file_path}")
+
+    @staticmethod
+    def build_document(record: Dict) -> Dict[str, str]:
+        """Build the vector document for a dataset record"""
+        parts = [record.get('name'), record.get('semantic_text'), record.get('description')]
+        document = {
+            "id": record['id'],
+            "content": '. '.join(part for part in parts if part),
+            "type": record.get('type', 'unknown'),
+            "name": record.get('name'),
+            # A city is "in" itself, so a city filter also returns the city record
+            "city": record.get('city') or (record.get('name') if record.get('type') == 'City' else None),
+        }
+        for field in ('region', 'tags', 'best_time_to_visit', 'connected_cities', 'nearby'):
+            document[field] = record.get(field)
+        if record.get('neighborhood'):
+            # Graph context travels with the vector match, so no graph lookup is needed to ground it
+            document["content"] = f"{document['content'].rstrip('.')}. {record['neighborhood']}"
+        return {key: value for key, value in document.items() if value is not None}
+
+    @staticmethod
+    def document_metadata(text_dict: Dict) -> Dict:
+        """Metadata stored alongside a document's vector"""
+        metadata = {"content": text_dict['content'], "type": text_dict['type']}
+        for field in TextProcessor.METADATA_FIELDS:
+            # Pinecone metadata cannot hold nulls
+            if text_dict.get(field) is not None:
+                metadata[field] = list(text_dict[field]) if field == 'tags' else text_dict[field]
+        return metadata
+
+    @staticmethod
+    def inherit_city_fields(records: List[Dict]) -> List[Dict]:
+        """Copy region and best time to visit from each record's city when it has none"""
+        cities = {record['name']: record for record in records if record.get('type') == 'City'}
+        enriched = []
+        for record in records:
+            city = cities.get(record.get('city'))
+            if city is not None and record.get('type') != 'City':
+                record = dict(record)
+                for field in ('region', 'best_time_to_visit'):
+                    if record.get(field) is None and city.get(field) is not None:
+                        record[field] = city[field]
+            enriched.append(record)
+        return enriched
+
+    @staticmethod
+    def attach_neighborhoods(records: List[Dict], max_items: int = 3) -> List[Dict]:
+        """Copy records with a compact summary of their graph neighbourhood
+
+        Walks the dataset connections: a place gets its city and region plus a
+        few other places in that city, a city gets the cities it connects to
+        and a few of its hotels, attractions and activities. The summary is
+        stored as `neighborhood` text, with `connected_cities` and `nearby`
+        name lists for metadata.
+        """
+        by_id = {record['id']: record for record in records}
+        links = defaultdict(set)
+        for relationship in TextProcessor.extract_relationships(records):
+            if relationship['source'] in by_id and relationship['target'] in by_id:
+                links[relationship['source']].add(relationship['target'])
+                links[relationship['target']].add(relationship['source'])
+        cities = {record['name']: record for record in records if record.get('type') == 'City'}
+
+        def places_in(city: Dict, exclude: str) -> Dict[str, List[str]]:
+            grouped = defaultdict(list)
+            for place_id in sorted(links[city['id']]):
+                place = by_id[place_id]
+                if place_id != exclude and place.get('type') != 'City' and len(grouped[place.get('type')]) < max_items:
+                    grouped[place.get('type')].append(place['name'])
+            return grouped
+
+        enriched = []
+        for record in records:
+            record = dict(record)
+            neighbors = [by_id[neighbor] for neighbor in sorted(links[record['id']])]
+            if record.get('type') == 'City':
+                city = record
+                connected = [neighbor['name'] for neighbor in neighbors if neighbor.get('type') == 'City']
+                parts = [f"Connected to {', '.join(connected)}"] if connected else []
+            else:
+                city = cities.get(record.get('city')) or next(
+                    (neighbor for neighbor in neighbors if neighbor.get('type') == 'City'), None
+                )
+                connected = []
+                parts = []
+                if city is not None:
+                    region = f" ({city['region']})" if city.get('region') else ""
+                    parts.append(f"In {city['name']}{region}")
+            nearby = places_in(city, record['id']) if city is not None else {}
+            for place_type, label in (('Attraction', 'Attractions'), ('Hotel', 'Hotels'), ('Activity', 'Activities')):
+                if nearby.get(place_type):
+                    parts.append(f"{label} nearby: {', '.join(nearby[place_type])}")
+            if parts:
+                record['neighborhood'] = "; ".join(parts)
+                record['nearby'] = [name for names in nearby.values() for name in names]
+                if connected:
+                    record['connected_cities'] = connected
+            enriched.append(record)
+        return enriched
+
+    @staticmethod
+    def extract_relationships(locations: List[Dict]) -> List[Dict]:
+        """Extract relationships between locations"""
+        relationships = []
+        for loc in locations:
+            # Dataset records link to other records by id
+            for connection in loc.get('connections', []):
+                relationships.append({
+                    'source': loc['id'],
+                    'target': connection['target'],
+                    'type': connection.get('relation', 'CONNECTS_TO')
+                })
+            if 'connected_to' in loc:
+                for connection in loc['connected_to']:
+                    relationships.append({
+                        'source': loc['name'],
+                        'target': connection['name'],
+                        'type': connection.get('type', 'CONNECTS_TO')
+                    })
+        return relationships
+
+    @staticmethod
+    def scale_dataset(records: List[Dict], factor: int) -> List[Dict]:
+        """Make a synthetic dataset `factor` times larger with consistent ids"""
+        scaled = []
+        for replica in range(factor):
+            suffix = '' if replica == 0 else f'__{replica}'
+            for record in records:
+                item = dict(record)
+                item['id'] = record['id'] + suffix
+                if replica:
+                    item['name'] = f"{record['name']} {replica}"
+                item['connections'] = [
+                    {**connection, 'target': connection['target'] + suffix}
+                    for connection in record.get('connections', [])
+                ]
+                scaled.append(item)
+        return scaled
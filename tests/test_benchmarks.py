@@ -0,0 +1,15 @@
+import unittest
+from benchmarks.run_benchmarks import run
+
+class TestBenchmarks(unittest.TestCase):
+    def test_offline_run_reports_ingest_and_query_latency(self):
+        results = run([1], queries=5, embedding_latency=0, vector_latency=0, graph_latency=0, dimension=64)
+        scale = results["scales"]["1x"]
+        self.assertEqual(scale["ingest"]["records"], 360)
+        self.assertEqual(scale["ingest"]["graph"]["edges"], 370)
+        self.assertEqual(scale["query"]["end_to_end"]["count"], 5)
+        self.assertIn("p99_ms", scale["query"]["end_to_end"])
+        self.assertIn("vector_search", scale["query"]["stages"])
+
+if __name__ == '__main__':
+    unittest.main()
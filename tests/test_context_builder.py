@@ -0,0 +1,57 @@
+import unittest
+from src.models.context_builder import ContextBuilder
+from src.utils.text_processor import TextProcessor
+
+HANOI = {
+    "id": "city_hanoi", "name": "Hanoi", "type": "City", "region": "Northern Vietnam",
+    "best_time_to_visit": "February to May", "tags": ["culture", "food"],
+    "description": "Hanoi is known for its culture and food."
+}
+
+class TestContextBuilder(unittest.TestCase):
+    def setUp(self):
+        self.graph = [{"location": HANOI, "neighbors": [{"id": "city_hue", "name": "Hue", "type": "City", "distance": 1}]}]
+        self.vectors = [
+            {"id": "city_hanoi", "content": "Hanoi offers culture and food.", "type": "City", "score": 0.91},
+            {"id": "hotel_16#0", "content": "Hanoi Hotel 16 is a boutique stay.", "type": "Hotel", "score": 0.85},
+            {"id": "hotel_16#1", "content": "Hanoi Hotel 16 is a boutique stay.", "type": "Hotel", "score": 0.80},
+            {"id": "activity_26", "content": "Street food tour in the Old Quarter.", "type": "Activity", "score": 0.88},
+        ]
+
+    def test_dedupes_and_ranks(self):
+        text, stats = ContextBuilder(token_budget=1000).build(self.graph, self.vectors)
+        lines = text.splitlines()
+        self.assertTrue(lines[0].startswith("- Hanoi (City; Northern Vietnam"))
+        self.assertIn("Related: Hue (City)", lines[1])
+        self.assertEqual(text.count("Hanoi Hotel 16 is a boutique stay."), 1)
+        self.assertLess(text.index("Street food tour"), text.index("Hanoi Hotel 16"))
+        self.assertEqual(stats["entities"], 3)
+
+    def test_overlapping_chunks_of_one_source_are_merged(self):
+        vectors = [
+            {"id": "guide#1", "source_id": "guide", "content": "boats leave at dawn from the pier near the market",
+             "score": 0.9},
+            {"id": "guide#0", "source_id": "guide", "content": "Ha Long Bay cruises: boats leave at dawn from the pier",
+             "score": 0.8},
+            {"id": "guide#2", "source_id": "guide", "content": "from the pier near", "score": 0.7},
+            {"id": "guide#5", "source_id": "guide", "content": "Kayaks can be rented on board.", "score": 0.6},
+        ]
+        text, stats = ContextBuilder(token_budget=1000).build([], vectors)
+        self.assertEqual(text.splitlines(), [
+            "- [info] Ha Long Bay cruises: boats leave at dawn from the pier near the market",
+            "- [info] Kayaks can be rented on board.",
+        ])
+        self.assertEqual(stats["entities"], 1)
+
+    def test_respects_token_budget(self):
+        text, stats = ContextBuilder(token_budget=40).build(self.graph, self.vectors)
+        self.assertLessEqual(TextProcessor.count_tokens(text), 40)
+        self.assertGreater(stats["dropped"], 0)
+
+    def test_smaller_than_raw_repr(self):
+        text, _ = ContextBuilder().build(self.graph, self.vectors)
+        raw = f"Neo4j Information: {self.graph}\nAdditional Context: {self.vectors}\n"
+        self.assertLess(TextProcessor.count_tokens(text), TextProcessor.count_tokens(raw))
+
+if __name__ == '__main__':
+    unittest.main()
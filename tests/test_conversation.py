@@ -0,0 +1,114 @@
+import unittest
+from src.models.conversation import ConversationMemory, SessionRetriever
+from src.utils.entity_matcher import EntityMatcher
+
+RECORDS = [
+    {"id": "city_hanoi", "type": "City", "name": "Hanoi"},
+    {"id": "hotel_16", "type": "Hotel", "name": "Hanoi Hotel 16"},
+    {"id": "city_hue", "type": "City", "name": "Hue"},
+]
+
+class CountingRetriever:
+    """Stands in for HybridRetriever; answers from the matched entities"""
+    def __init__(self):
+        self.neo4j = object()
+        self.matcher = EntityMatcher.from_records(RECORDS)
+        self.queries = []
+        self.graph_lookups = 0
+
+    def retrieve(self, query, top_k=5, filter=None, graph=True):
+        self.queries.append(query)
+        self.graph_lookups += graph
+        ids = self.matcher.find_ids(query) or ["city_hue"]
+        return {
+            "graph": [{"location": {"id": ids[0]}, "neighbors": [{"id": "hotel_16", "distance": 1}]}] if graph else None,
+            "vectors": [{"id": f"{ids[0]}#0", "source_id": ids[0], "score": 0.9, "content": ids[0]}],
+            "query_embedding": [1.0, 0.0],
+            "path": "hybrid",
+        }
+
+class TestConversationMemory(unittest.TestCase):
+    def test_memory_stays_bounded_over_long_conversations(self):
+        memory = ConversationMemory(max_turns=4, summary_tokens=40, max_entities=3)
+        for i in range(200):
+            memory.add("user", f"Question number {i} about somewhere. More detail follows here.")
+            memory.add("assistant", f"Answer {i}.")
+            memory.remember({"graph": [{"location": {"id": f"place_{i}"}, "neighbors": []}], "vectors": []})
+        self.assertEqual(len(memory.turns), 4)
+        self.assertLessEqual(len(memory.entities), 3)
+        self.assertLessEqual(memory._summary_size, 40)
+        self.assertIn("Answer 197.", memory.summary)
+        self.assertNotIn("More detail", memory.summary)
+        history = memory.history()
+        self.assertEqual(history[0]["role"], "system")
+        self.assertEqual(history[-1]["content"], "Answer 199.")
+
+    def test_history_is_capped_by_tokens(self):
+        memory = ConversationMemory(max_turns=10)
+        for i in range(6):
+            memory.add("user", f"Question {i} " + "word " * 40)
+        history = memory.history(max_tokens=100)
+        self.assertEqual([turn["content"].split()[1] for turn in history], ["4", "5"])
+
+    def test_chunks_per_entity_are_capped_by_score(self):
+        memory = ConversationMemory(chunks_per_entity=2)
+        memory.remember({"vectors": [
+            {"id": f"city_hanoi#{i}", "source_id": "city_hanoi", "score": i / 10} for i in range(5)
+        ]})
+        chunks = memory.entities["city_hanoi"]["chunks"]
+        self.assertEqual([chunk["id"] for chunk in chunks], ["city_hanoi#4", "city_hanoi#3"])
+
+class TestSessionRetriever(unittest.TestCase):
+    def setUp(self):
+        self.retriever = CountingRetriever()
+        self.memory = ConversationMemory()
+        self.session = SessionRetriever(self.retriever, self.memory)
+
+    def test_bare_follow_up_reuses_cached_context(self):
+        self.session.retrieve("Tell me about Hanoi")
+        context = self.session.retrieve("And there?")
+        self.assertEqual(context["path"], "session")
+        self.assertEqual(len(self.retriever.queries), 1)
+        self.assertEqual(context["graph"][0]["location"]["id"], "city_hanoi")
+        self.assertEqual(context["vectors"][0]["source_id"], "city_hanoi")
+        self.assertEqual(self.memory.stats["resolved_references"], 1)
+        self.assertEqual(self.memory.stats["reused"], 1)
+
+    def test_follow_up_with_new_terms_searches_vectors_with_cached_graph(self):
+        self.session.retrieve("Tell me about Hanoi")
+        context = self.session.retrieve("What about hotels there?")
+        self.assertEqual(self.retriever.queries[-1], "What about hotels there? (Hanoi)")
+        self.assertEqual(self.retriever.graph_lookups, 1)
+        self.assertEqual(context["graph"][0]["location"]["id"], "city_hanoi")
+        self.assertEqual(context["path"], "hybrid")
+        self.assertEqual(self.memory.stats["graph_reused"], 1)
+
+    def test_pronouns_do_not_pull_in_the_previous_topic(self):
+        self.session.retrieve("Tell me about Hanoi")
+        self.session.retrieve("Is it worth getting a travel visa?")
+        self.assertEqual(self.retriever.queries[-1], "Is it worth getting a travel visa?")
+        self.assertEqual(self.memory.stats["resolved_references"], 0)
+
+    def test_evicted_reference_requeries_with_entity_name(self):
+        self.session.retrieve("Tell me about Hanoi")
+        self.memory.entities.clear()
+        context = self.session.retrieve("Is that city busy in summer?")
+        self.assertEqual(context["path"], "hybrid")
+        self.assertEqual(self.retriever.queries[-1], "Is that city busy in summer? (Hanoi)")
+        self.assertEqual(self.retriever.graph_lookups, 2)
+
+    def test_new_topic_and_filters_go_to_the_stores(self):
+        self.session.retrieve("Tell me about Hanoi")
+        self.session.retrieve("Where is good for history?")
+        self.session.retrieve("Hanoi", filter={"type": "Hotel"})
+        self.assertEqual(len(self.retriever.queries), 3)
+
+    def test_repeat_retrievals_are_counted(self):
+        self.session.retrieve("Where is good for history?")
+        self.memory.focus = []
+        self.session.retrieve("Any ideas for history?")
+        self.assertEqual(self.memory.stats["retrieved"], 2)
+        self.assertEqual(self.memory.stats["repeat_retrievals"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
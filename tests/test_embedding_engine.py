@@ -0,0 +1,95 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from src.models.embedding_engine import EmbeddingCache, EmbeddingEngine
+
+class FakeEmbeddingClient:
+    """Stands in for the openai module's Embedding API"""
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self.Embedding = self
+
+    def create(self, input, model):
+        time.sleep(self.latency)
+        self.calls.append(list(input))
+        return {"data": [
+            {"index": i, "embedding": [float(len(text)), float(i), 1.0]}
+            for i, text in enumerate(input)
+        ]}
+
+class TestEmbeddingEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmpdir.name, "embeddings.sqlite")
+        self.client = FakeEmbeddingClient()
+
+    def make_engine(self, **kwargs):
+        return EmbeddingEngine(cache=EmbeddingCache(self.cache_path), client=self.client, **kwargs)
+
+    def test_batches_inputs(self):
+        engine = self.make_engine(batch_size=4, max_workers=2)
+        texts = [f"text {i}" for i in range(10)]
+        vectors = engine.embed_texts(texts)
+        self.assertEqual(len(vectors), 10)
+        self.assertEqual(len(self.client.calls), 3)
+        self.assertEqual(vectors[0][0], float(len("text 0")))
+
+    def test_repeat_ingest_uses_cache(self):
+        texts = ["Hanoi", "Hoi An", "Hanoi"]
+        first = self.make_engine().embed_texts(texts)
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertEqual(self.client.calls[0], ["Hanoi", "Hoi An"])
+
+        engine = self.make_engine()
+        second = engine.embed_texts(texts)
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertEqual(engine.stats()["cache_hits"], 3)
+        self.assertEqual(engine.stats()["cache_misses"], 0)
+        self.assertEqual(first, second)
+
+    def test_concurrent_queries_share_batched_calls(self):
+        self.client.latency = 0.02
+        engine = self.make_engine(batch_window=0.02)
+        results = {}
+
+        def ask(i):
+            results[i] = engine.embed(f"query number {i}")
+
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(30)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 30)
+        self.assertEqual(results[7][0], float(len("query number 7")))
+        self.assertLess(len(self.client.calls), 30)
+        stats = engine.dispatcher.stats()
+        self.assertEqual(stats["requests"], 30)
+        self.assertGreater(stats["mean_batch_size"], 1)
+        self.assertIn("p95_ms", stats["queue_wait"])
+
+        # Cached queries skip the dispatcher entirely
+        calls = len(self.client.calls)
+        self.assertEqual(engine.embed("query number 7"), results[7])
+        self.assertEqual(len(self.client.calls), calls)
+        self.assertEqual(engine.dispatcher.stats()["requests"], 30)
+        engine.close()
+
+    def test_dispatcher_errors_reach_every_caller(self):
+        engine = self.make_engine(batch_window=0.01)
+        self.client.Embedding = None
+        with self.assertRaises(Exception):
+            engine.embed("Hanoi")
+        engine.close()
+        with self.assertRaises(RuntimeError):
+            engine.dispatcher.submit("Hue")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+from src.utils.entity_matcher import EntityMatcher
+from src.utils.text_processor import TextProcessor
+
+class TestEntityMatcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        records = TextProcessor.parse_location_data('data/vietnam_travel_dataset.json')
+        cls.matcher = EntityMatcher.from_records(records)
+
+    def test_finds_every_mentioned_city(self):
+        ids = self.matcher.find_ids("3 days in Hanoi and Hoi An?")
+        self.assertEqual(ids, ["city_hanoi", "city_hoi_an"])
+
+    def test_aliases_and_diacritics(self):
+        ids = self.matcher.find_ids("Flying from Saigon to Hà Nội, then Huế")
+        self.assertEqual(ids, ["city_ho_chi_minh", "city_hanoi", "city_hue"])
+
+    def test_prefers_longest_match(self):
+        ids = self.matcher.find_ids("Is Ha Long Bay Hotel 51 near the water?")
+        self.assertEqual(ids, ["hotel_51"])
+
+    def test_matches_whole_words_only(self):
+        self.assertEqual(self.matcher.find_ids("Huebner recommended a hotel"), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from benchmarks.fakes import InMemoryGraph
+from src.database.graph_snapshot import GraphSnapshot, GraphSnapshotStore
+from src.database.neo4j_manager import Neo4jManager
+from src.models.context_builder import ContextBuilder
+from src.models.retriever import HybridRetriever
+from src.utils.text_processor import TextProcessor
+
+class StaticMatcher:
+    def __init__(self, ids):
+        self.ids = ids
+
+    def find_ids(self, text):
+        return self.ids
+
+class NoVectors:
+    def get_embedding(self, text):
+        return [1.0]
+
+    def search(self, vector, top_k):
+        return []
+
+class TestGraphSnapshot(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.records = TextProcessor.parse_location_data('data/vietnam_travel_dataset.json')
+        cls.snapshot = GraphSnapshot.from_records(cls.records, version="v1")
+
+    def test_route_between_cities_follows_connections(self):
+        route = self.snapshot.route("Hanoi", "Sapa")
+        self.assertEqual(route["hops"], len(route["path"]) - 1)
+        self.assertEqual(route["path"][0]["id"], "city_hanoi")
+        self.assertEqual(route["path"][-1]["id"], "city_sapa")
+        for stop, next_stop in zip(route["path"], route["path"][1:]):
+            row = self.snapshot.row[stop["id"]]
+            self.assertIn(self.snapshot.row[next_stop["id"]], self.snapshot._neighbors(row, ["Connected_To"]))
+        self.assertEqual(self.snapshot.route("city_hue", "city_hue")["hops"], 0)
+
+    def test_places_resolve_to_their_city(self):
+        route = self.snapshot.route("Hanoi Hotel 16", "Hue")
+        self.assertEqual(route["from"]["id"], "hotel_16")
+        self.assertEqual(route["path"][0]["id"], "city_hanoi")
+        self.assertIsNone(self.snapshot.route("Atlantis", "Hue"))
+
+    def test_per_city_indexes(self):
+        hotels = self.snapshot.places_in("Hanoi", "Hotel")
+        expected = sorted(r['id'] for r in self.records if r.get('type') == 'Hotel' and r.get('city') == 'Hanoi')
+        self.assertEqual(sorted(hotels), expected)
+        nearby = self.snapshot.nearby("hotel_16")
+        self.assertNotIn("hotel_16", nearby)
+        self.assertTrue(set(nearby) >= set(self.snapshot.places_in("Hanoi", "Attraction")))
+
+    def test_neighborhood_matches_graph_query(self):
+        graph = InMemoryGraph()
+        neo4j = Neo4jManager(driver=graph)
+        neo4j.bulk_load(self.records)
+        ids = ["city_hanoi", "hotel_16", "attraction_1"]
+        self.assertEqual(self.snapshot.query_neighborhood(ids, limit=500), neo4j.query_neighborhood(ids, limit=500))
+        from_graph = GraphSnapshot.from_neo4j(neo4j)
+        self.assertEqual(from_graph.route("Hanoi", "Sapa"), self.snapshot.route("Hanoi", "Sapa"))
+
+    def test_save_load_and_atomic_refresh(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "graph.npz")
+            store = GraphSnapshotStore.open(path, version="v1")
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(GraphSnapshotStore.open(path, version="v1").snapshot.version, "v1")
+            before = store.snapshot
+            store.refresh(GraphSnapshot.from_records(self.records[:10], version="v2"))
+            self.assertIsNot(store.snapshot, before)
+            self.assertEqual(GraphSnapshot.load(path).version, "v2")
+            self.assertEqual(len(before.ids), len(self.records))
+
+    def test_retriever_adds_routes_to_context(self):
+        store = GraphSnapshotStore(self.snapshot, path=None)
+        retriever = HybridRetriever(store, NoVectors(), StaticMatcher(["city_hanoi", "city_hue"]))
+        context = retriever.retrieve("How do I get from Hanoi to Hue?")
+        retriever.close()
+        routes = [item["route"] for item in context["graph"] if "route" in item]
+        self.assertEqual(len(routes), 1)
+        text, _ = ContextBuilder().build(context["graph"], context["vectors"])
+        self.assertTrue(text.startswith("- Route from Hanoi to Hue: Hanoi -> Hue (1 hop)"))
+
+if __name__ == '__main__':
+    unittest.main()
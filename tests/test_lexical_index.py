@@ -0,0 +1,88 @@
+import unittest
+from src.database.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from src.models.retriever import HybridRetriever
+
+RECORDS = [
+    {"id": "city_hanoi", "type": "City", "name": "Hanoi", "tags": ["culture", "food"],
+     "semantic_text": "Capital city with old quarter street food"},
+    {"id": "hotel_16", "type": "Hotel", "name": "Hanoi Hotel 16", "city": "Hanoi", "tags": ["luxury"],
+     "semantic_text": "Luxury hotel in Hanoi"},
+    {"id": "activity_1", "type": "Activity", "name": "Hoi An Cooking Class", "city": "Hoi An",
+     "tags": ["food"], "semantic_text": "Cook local dishes with a chef"},
+    {"id": "city_hue", "type": "City", "name": "Hue", "tags": ["history"],
+     "semantic_text": "Imperial citadel and royal tombs"},
+]
+
+class CountingVectorStore:
+    def __init__(self):
+        self.embedding_calls = 0
+
+    def get_embedding(self, text):
+        self.embedding_calls += 1
+        return [1.0, 0.0]
+
+    def search(self, vector, top_k):
+        return [{"id": "city_hue", "score": 0.9, "content": "Hue"}]
+
+class StaticGraph:
+    def query_neighborhood(self, ids):
+        return [{"location": {"id": ids[0]}, "neighbors": []}] if ids else []
+
+class NoMatcher:
+    def find_ids(self, text):
+        return []
+
+class TestBM25Index(unittest.TestCase):
+    def setUp(self):
+        self.index = BM25Index.from_records(RECORDS)
+
+    def test_tokenize_drops_stopwords(self):
+        self.assertEqual(tokenize("What is the best time to visit Hue?"), ["time", "hue"])
+
+    def test_name_match_ranks_first_and_is_confident(self):
+        results = self.index.search("Is Hanoi Hotel 16 worth it?")
+        self.assertEqual(results[0]["id"], "hotel_16")
+        self.assertEqual(results[0]["source"], "lexical")
+        self.assertIn("content", results[0])
+        self.assertTrue(BM25Index.is_confident(results))
+
+    def test_vague_query_is_not_confident(self):
+        results = self.index.search("good food")
+        self.assertFalse(BM25Index.is_confident(results))
+        self.assertEqual(self.index.search("romantic beach getaway"), [])
+
+    def test_reciprocal_rank_fusion_rewards_agreement(self):
+        fused = reciprocal_rank_fusion({
+            "vector": [{"id": "a", "content": "A"}, {"id": "b", "content": "B"}],
+            "lexical": [{"id": "b", "content": "B"}, {"id": "c", "content": "C"}],
+            "graph": [{"id": "d"}],
+        }, documents={"d": {"id": "d", "content": "D"}})
+        self.assertEqual(fused[0]["id"], "b")
+        self.assertEqual({item["id"] for item in fused}, {"a", "b", "c", "d"})
+
+class TestLexicalRetrieval(unittest.TestCase):
+    def setUp(self):
+        self.vector_store = CountingVectorStore()
+        self.retriever = HybridRetriever(StaticGraph(), self.vector_store, NoMatcher(),
+                                         lexical=BM25Index.from_records(RECORDS))
+
+    def tearDown(self):
+        self.retriever.close()
+
+    def test_confident_lexical_hit_skips_embedding(self):
+        context = self.retriever.retrieve("Hanoi Hotel 16")
+        self.assertEqual(context["path"], "lexical")
+        self.assertEqual(context["vectors"][0]["id"], "hotel_16")
+        self.assertIsNone(context["query_embedding"])
+        self.assertEqual(self.vector_store.embedding_calls, 0)
+
+    def test_ambiguous_query_fuses_vector_and_lexical(self):
+        context = self.retriever.retrieve("food")
+        self.assertEqual(context["path"], "fused")
+        self.assertEqual(self.vector_store.embedding_calls, 1)
+        self.assertEqual(context["query_embedding"], [1.0, 0.0])
+        self.assertIn("city_hue", [item["id"] for item in context["vectors"]])
+        self.assertEqual(self.retriever.path_counts["fused"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
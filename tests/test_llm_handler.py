@@ -0,0 +1,71 @@
+import time
+import unittest
+from src.models.llm_handler import LLMHandler
+from src.utils.text_processor import TextProcessor
+
+class FakeStreamingClient:
+    """Stands in for the openai module's ChatCompletion API"""
+    def __init__(self, tokens, delay=0.0):
+        self.tokens = tokens
+        self.delay = delay
+        self.requests = []
+        self.ChatCompletion = self
+
+    def create(self, stream=False, **kwargs):
+        self.requests.append(kwargs)
+        return self._stream()
+
+    def _stream(self):
+        yield {"choices": [{"delta": {"role": "assistant"}}]}
+        for token in self.tokens:
+            time.sleep(self.delay)
+            yield {"choices": [{"delta": {"content": token}}]}
+
+class TestLLMHandlerStreaming(unittest.TestCase):
+    def test_yields_tokens_in_order(self):
+        client = FakeStreamingClient(["Visit ", "Hanoi ", "in spring."])
+        llm = LLMHandler(client=client)
+        tokens = list(llm.stream_response("When to visit Hanoi?", [], []))
+        self.assertEqual("".join(tokens), "Visit Hanoi in spring.")
+        self.assertIn("When to visit Hanoi?", client.requests[0]["messages"][1]["content"])
+
+    def test_history_precedes_the_query(self):
+        client = FakeStreamingClient(["Yes."])
+        llm = LLMHandler(client=client)
+        history = [{"role": "user", "content": "Tell me about Hanoi"}, {"role": "assistant", "content": "Hanoi is..."}]
+        list(llm.stream_response("Hotels there?", [], [], history))
+        messages = client.requests[0]["messages"]
+        self.assertEqual(messages[1:3], history)
+        self.assertIn("Hotels there?", messages[-1]["content"])
+
+    def test_stream_can_be_consumed_across_contexts(self):
+        import contextvars
+        from src.utils.metrics import metrics
+        enabled, metrics.enabled = metrics.enabled, True
+        try:
+            stream = LLMHandler(client=FakeStreamingClient(["a", "b"])).stream_response("q", [], [])
+            # The consumer may resume the generator from a different context than it started in
+            first = contextvars.copy_context().run(next, stream)
+            self.assertEqual([first] + list(stream), ["a", "b"])
+            self.assertIn('stage_seconds_count{stage="llm_stream"}', metrics.export_prometheus())
+        finally:
+            metrics.enabled = enabled
+
+    def test_prompt_usage_is_returned_per_call(self):
+        llm = LLMHandler(client=FakeStreamingClient([]))
+        short_messages, short = llm.build_messages("q", [], [])
+        _, long = llm.build_messages("q " * 200, [], [])
+        self.assertGreater(long["prompt_tokens"], short["prompt_tokens"])
+        self.assertEqual(short["prompt_tokens"], sum(TextProcessor.count_tokens(m["content"]) for m in short_messages))
+
+    def test_first_token_is_timed_separately(self):
+        llm = LLMHandler(client=FakeStreamingClient(["a", "b", "c", "d"], delay=0.02))
+        timings = {}
+        list(llm.stream_response("q", [], [], timings=timings))
+        self.assertLess(timings["first_token_ms"], timings["total_ms"])
+        summary = llm.latencies.summary()
+        self.assertEqual(summary["llm_first_token"]["count"], 1)
+        self.assertEqual(summary["llm_total"]["count"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
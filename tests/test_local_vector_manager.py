@@ -0,0 +1,79 @@
+import tempfile
+import unittest
+import numpy as np
+from src.database.local_vector_manager import LocalVectorManager
+
+class TestLocalVectorManager(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(7)
+        self.vectors = rng.normal(size=(200, 16)).astype(np.float32)
+        self.ids = [f"doc_{i}" for i in range(200)]
+        self.index = LocalVectorManager(index_path=self.tmpdir.name, dimension=16, embedder=object())
+        self.index.upsert_vectors(self.ids, self.vectors, [{"type": "test"} for _ in self.ids])
+
+    def test_search_returns_nearest_first(self):
+        results = self.index.search(self.vectors[42], top_k=3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["id"], "doc_42")
+        self.assertAlmostEqual(results[0]["score"], 1.0, places=5)
+        self.assertGreaterEqual(results[1]["score"], results[2]["score"])
+
+    def test_reload_is_memory_mapped(self):
+        reloaded = LocalVectorManager(index_path=self.tmpdir.name, dimension=16, embedder=object())
+        self.assertIsInstance(reloaded.vectors, np.memmap)
+        self.assertEqual(reloaded.ids, self.ids)
+        self.assertEqual(reloaded.search(self.vectors[5], top_k=1)[0]["id"], "doc_5")
+
+    def test_upsert_replaces_existing_id(self):
+        self.index.upsert_vectors(["doc_0"], self.vectors[1:2], [{"type": "replaced"}])
+        self.assertEqual(len(self.index.ids), 200)
+        top = self.index.search(self.vectors[1], top_k=2)
+        self.assertEqual({match["id"] for match in top}, {"doc_0", "doc_1"})
+
+    def test_recall_matches_brute_force(self):
+        queries = np.random.default_rng(11).normal(size=(20, 16))
+        self.assertEqual(self.index.evaluate_recall(queries, top_k=10), 1.0)
+
+    def test_filtered_search_scores_only_matching_rows(self):
+        metadata = [{"type": "Hotel" if i % 10 == 0 else "Attraction",
+                     "city": "Da Nang" if i % 20 == 0 else "Hanoi",
+                     "tags": ["beach"] if i % 40 == 0 else ["stay"]} for i in range(200)]
+        self.index.upsert_vectors(self.ids, self.vectors, metadata)
+        query_filter = {"type": "Hotel", "city": "Da Nang", "tags": {"$in": ["beach"]}}
+        self.assertEqual(len(self.index.metadata_index().candidates(query_filter)), 5)
+        results = self.index.search(self.vectors[42], top_k=10, filter=query_filter)
+        self.assertEqual({match["id"] for match in results}, {f"doc_{i}" for i in range(0, 200, 40)})
+        self.assertEqual(self.index.search(self.vectors[80], top_k=1, filter=query_filter)[0]["id"], "doc_80")
+        self.assertEqual(self.index.search(self.vectors[0], filter={"city": "Hue"}), [])
+
+    def test_searches_stay_consistent_during_writes(self):
+        import threading
+        errors, done = [], threading.Event()
+
+        def write():
+            extra = [f"extra_{i}" for i in range(20)]
+            try:
+                for _ in range(30):
+                    self.index.upsert_vectors(extra, self.vectors[:20], [{"type": "extra"}] * 20)
+                    self.index.delete(extra)
+            finally:
+                done.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        while not done.is_set():
+            try:
+                for match in self.index.search(self.vectors[3], top_k=5, filter={"type": "extra"}):
+                    self.assertTrue(match["id"].startswith("extra_"))
+                self.index.search(self.vectors[3], top_k=5, filter={"type": "test"})
+            except Exception as e:
+                errors.append(e)
+        writer.join()
+        self.assertEqual(errors, [])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,70 +1,111 @@
-import unittest
-from src.database.neo4j_manager import Neo4jManager
-from src.database.pinecone_manager import PineconeManager
-from src.models.llm_handler import LLMHandler
-from src.utils.text_processor import TextProcessor
-import os
-
-class TestNeo4jManager(unittest.TestCase):
-    def setUp(self):
-        self.neo4j = Neo4jManager()
-        self.test_location = {
-            "name": "Test City",
-            "type": "city",
-            "country": "Test Country",
-            "description": "Test description"
-        }
-
-    def test_create_and_query_location(self):
-        with self.neo4j.driver.session() as session:
-            session.execute_write(self.neo4j.create_location_node, self.test_location)
-            result = self.neo4j.query_location("Test City")
-            self.assertIsNotNone(result)
-            self.assertEqual(result['name'], "Test City")
-
-    def tearDown(self):
-        with self.neo4j.driver.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")
-        self.neo4j.close()
-
-class TestPineconeManager(unittest.TestCase):
-    def setUp(self):
-        self.pinecone = PineconeManager()
-        self.test_texts = [
-            {"content": "Test content 1", "type": "description"},
-            {"content": "Test content 2", "type": "description"}
-        ]
-
-    def test_upsert_and_query(self):
-        self.pinecone.upsert_texts(self.test_texts)
-        results = self.pinecone.query("Test content", top_k=1)
-        self.assertGreater(len(results), 0)
-
-    def tearDown(self):
-        # Clean up test vectors
-        self.pinecone.index.delete(delete_all=True)
-
-class TestTextProcessor(unittest.TestCase):
-    def test_clean_text(self):
-        text = "Hello, World!  This is a Test..."
-        cleaned = TextProcessor.clean_text(text)
-        self.assertEqual(cleaned, "hello world this is a test")
-
-    def test_chunk_text(self):
-        text = "This is a long text that needs to be chunked into smaller pieces"
-        chunks = TextProcessor.chunk_text(text, chunk_size=20)
-        self.assertTrue(all(len(chunk) <= 20 for chunk in chunks))
-
-    def test_parse_location_data(self):
-        test_data = '[{"name": "Test"}]'
-        with open('test_locations.json', 'w') as f:
-            f.write(test_data)
-        
-        locations = TextProcessor.parse_location_data('test_locations.json')
-        self.assertEqual(len(locations), 1)
-        self.assertEqual(locations[0]['name'], "Test")
-        
-        os.remove('test_locations.json')
-
-if __name__ == '__main__':
+import unittest
+from src.database.neo4j_manager import Neo4jManager
+from src.database.pinecone_manager import PineconeManager
+from src.models.llm_handler import LLMHandler
+from src.utils.text_processor import TextProcessor
+import os
+
+class TestNeo4jManager(unittest.TestCase):
+    def setUp(self):
+        self.neo4j = Neo4jManager()
+        self.test_location = {
+            "name": "Test City",
+            "type": "city",
+            "country": "Test Country",
+            "description": "Test description"
+        }
+
+    def test_create_and_query_location(self):
+        with self.neo4j.driver.session() as session:
+            session.execute_write(self.neo4j.create_location_node, self.test_location)
+            result = self.neo4j.query_location("Test City")
+            self.assertIsNotNone(result)
+            self.assertEqual(result['name'], "Test City")
+
+    def tearDown(self):
+        # Only remove what this test created; never wipe the whole graph
+        with self.neo4j.driver.session() as session:
+            session.run("MATCH (n:Location {name: $name}) DETACH DELETE n", name=self.test_location["name"])
+        self.neo4j.close()
+
+class TestPineconeManager(unittest.TestCase):
+    def setUp(self):
+        self.pinecone = PineconeManager()
+        self.test_texts = [
+            {"id": "test_content_1", "content": "Test content 1", "type": "description"},
+            {"id": "test_content_2", "content": "Test content 2", "type": "description"}
+        ]
+
+    def test_upsert_and_query(self):
+        self.pinecone.upsert_texts(self.test_texts)
+        results = self.pinecone.query("Test content", top_k=1)
+        self.assertGreater(len(results), 0)
+
+    def tearDown(self):
+        # Clean up test vectors
+        self.pinecone.delete([text["id"] for text in self.test_texts])
+
+class TestTextProcessor(unittest.TestCase):
+    def test_clean_text(self):
+        text = "Hello, World!  This is a Test..."
+        cleaned = TextProcessor.clean_text(text)
+        self.assertEqual(cleaned, "hello world this is a test")
+
+    def test_chunk_text(self):
+        text = "This is a long text that needs to be chunked into smaller pieces"
+        chunks = TextProcessor.chunk_text(text, chunk_size=20)
+        self.assertTrue(all(len(chunk) <= 20 for chunk in chunks))
+
+    def test_count_tokens_falls_back_when_encoding_cannot_load(self):
+        import sys
+        import types
+        from unittest import mock
+        from src.utils import text_processor
+
+        def offline(name):
+            raise ConnectionError("cannot download cl100k_base")
+
+        text_processor._encoding.cache_clear()
+        text_processor._word_tokens.cache_clear()
+        try:
+            with mock.patch.dict(sys.modules, {"tiktoken": types.SimpleNamespace(get_encoding=offline)}):
+                self.assertEqual(TextProcessor.count_tokens("Hanoi old quarter"), 5)
+        finally:
+            text_processor._encoding.cache_clear()
+            text_processor._word_tokens.cache_clear()
+
+    def test_parse_location_data(self):
+        test_data = '[{"name": "Test"}]'
+        with open('test_locations.json', 'w') as f:
+            f.write(test_data)
+        
+        locations = TextProcessor.parse_location_data('test_locations.json')
+        self.assertEqual(len(locations), 1)
+        self.assertEqual(locations[0]['name'], "Test")
+        
+        os.remove('test_locations.json')
+
+    def test_chunk_tokens_budget_and_overlap(self):
+        text = " ".join(f"word{i}" for i in range(200))
+        chunks = list(TextProcessor.chunk_tokens(text, max_tokens=40, overlap=10))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(TextProcessor.count_tokens(chunk) <= 40 for chunk in chunks))
+        first, second = chunks[0].split(), chunks[1].split()
+        self.assertIn(second[0], first)
+        self.assertEqual(chunks[-1].split()[-1], "word199")
+
+    def test_iter_json_array_streams_small_buffers(self):
+        path = 'data/vietnam_travel_dataset.json'
+        streamed = list(TextProcessor.iter_json_array(path, buffer_size=97))
+        self.assertEqual(streamed, TextProcessor.parse_location_data(path))
+
+    def test_iter_chunks_tags_source_ids(self):
+        path = 'data/vietnam_travel_dataset.json'
+        serial = list(TextProcessor.iter_chunks(path, max_tokens=32, overlap=8, workers=1))
+        parallel = list(TextProcessor.iter_chunks(path, max_tokens=32, overlap=8, workers=2))
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial[0]["source_id"], "city_hanoi")
+        self.assertTrue(serial[0]["id"].startswith("city_hanoi#"))
+
+if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
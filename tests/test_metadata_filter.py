@@ -0,0 +1,47 @@
+import unittest
+from src.database.metadata_filter import MetadataIndex, matches
+from src.utils.text_processor import TextProcessor
+
+class TestMetadataFilter(unittest.TestCase):
+    def setUp(self):
+        records = TextProcessor.inherit_city_fields(
+            TextProcessor.parse_location_data('data/vietnam_travel_dataset.json')
+        )
+        self.documents = [TextProcessor.build_document(record) for record in records]
+        self.metadata = [TextProcessor.document_metadata(document) for document in self.documents]
+        self.index = MetadataIndex(self.metadata)
+
+    def test_ingest_carries_structured_fields(self):
+        hotel = next(meta for meta in self.metadata if meta["type"] == "Hotel")
+        for field in ("name", "city", "region", "tags", "best_time_to_visit"):
+            self.assertIn(field, hotel)
+
+    def test_matches_supports_operators(self):
+        meta = {"type": "Hotel", "city": "Da Nang", "tags": ["beach", "stay"]}
+        self.assertTrue(matches(meta, {"type": "Hotel", "tags": "beach"}))
+        self.assertTrue(matches(meta, {"tags": {"$in": ["food", "beach"]}}))
+        self.assertFalse(matches(meta, {"tags": {"$nin": ["beach"]}}))
+        self.assertTrue(matches(meta, {"$or": [{"city": "Hue"}, {"city": {"$ne": "Hue"}}]}))
+        self.assertFalse(matches(meta, {"region": {"$exists": True}}))
+        with self.assertRaises(ValueError):
+            matches(meta, {"city": {"$regex": "Da"}})
+
+    def test_index_agrees_with_row_by_row_evaluation(self):
+        filters = [
+            {"type": "Hotel", "city": "Da Nang"},
+            {"type": {"$in": ["Attraction", "Activity"]}, "region": "Northern Vietnam"},
+            {"$or": [{"tags": "beach"}, {"city": "Hue"}], "type": {"$ne": "City"}},
+            {"best_time_to_visit": {"$exists": False}},
+            {"name": "Hanoi"},
+        ]
+        for query_filter in filters:
+            expected = [row for row, meta in enumerate(self.metadata) if matches(meta, query_filter)]
+            self.assertEqual(self.index.candidates(query_filter).tolist(), expected, query_filter)
+
+    def test_narrow_filter_selects_few_rows(self):
+        rows = self.index.candidates({"type": "Hotel", "city": "Da Nang", "tags": {"$in": ["stay"]}})
+        self.assertLess(len(rows), len(self.metadata) // 10)
+        self.assertTrue(all(self.documents[row]["city"] == "Da Nang" for row in rows))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from src.utils.metrics import SIZE_BUCKETS, Metrics, metrics, traced
+
+@traced("unit_stage")
+def stage(value):
+    return value * 2
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.saved = (metrics.enabled, metrics.slow_threshold, metrics.slow_sample_rate)
+        metrics.reset()
+
+    def test_disabled_records_nothing(self):
+        metrics.enabled = False
+        self.assertEqual(stage(2), 4)
+        with metrics.span("request"):
+            metrics.count("tokens_total", 10, kind="prompt")
+        self.assertEqual(metrics.export_prometheus(), "\n")
+
+    def test_nested_spans_and_prometheus_export(self):
+        metrics.enabled = True
+        metrics.slow_threshold = 0.0
+        metrics.slow_sample_rate = 1.0
+        with metrics.span("request"):
+            stage(1)
+            metrics.count("tokens_total", 10, kind="prompt")
+
+        slow = metrics.slow_requests[-1]
+        self.assertEqual(slow["stage"], "request")
+        self.assertEqual([child["stage"] for child in slow["children"]], ["unit_stage"])
+
+        text = metrics.export_prometheus()
+        self.assertIn('travel_assistant_stage_seconds_count{stage="unit_stage"} 1', text)
+        self.assertIn('travel_assistant_stage_seconds_bucket{stage="request",le="+Inf"} 1', text)
+        self.assertIn('travel_assistant_tokens_total{kind="prompt"} 10', text)
+
+    def test_write_exports_file(self):
+        local = Metrics(enabled=True)
+        local.observe("stage_seconds", 0.02, stage="vector_search")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "metrics.prom")
+            local.write(path)
+            with open(path, encoding='utf-8') as f:
+                self.assertIn('le="0.025"} 1', f.read())
+
+    def test_size_histograms_use_their_own_buckets(self):
+        local = Metrics(enabled=True)
+        local.observe("embedding_batch_size", 12, buckets=SIZE_BUCKETS)
+        text = local.export_prometheus()
+        self.assertIn('travel_assistant_embedding_batch_size_bucket{le="8"} 0', text)
+        self.assertIn('travel_assistant_embedding_batch_size_bucket{le="16"} 1', text)
+        self.assertIn('travel_assistant_embedding_batch_size_sum 12.000000', text)
+
+    def tearDown(self):
+        metrics.enabled, metrics.slow_threshold, metrics.slow_sample_rate = self.saved
+        metrics.reset()
+
+if __name__ == '__main__':
+    unittest.main()
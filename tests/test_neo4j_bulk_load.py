@@ -0,0 +1,61 @@
+import unittest
+from src.database.neo4j_manager import Neo4jManager
+from src.utils.text_processor import TextProcessor
+
+class RecordingSession:
+    """Captures the Cypher a Neo4jManager sends, without a database"""
+    def __init__(self, statements):
+        self.statements = statements
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        self.statements.append((" ".join(query.split()), params))
+
+    def execute_write(self, work, *args):
+        return work(self, *args)
+
+class RecordingDriver:
+    def __init__(self):
+        self.statements = []
+
+    def session(self):
+        return RecordingSession(self.statements)
+
+class TestNeo4jBulkLoad(unittest.TestCase):
+    def setUp(self):
+        self.records = TextProcessor.parse_location_data('data/vietnam_travel_dataset.json')
+        self.driver = RecordingDriver()
+        self.neo4j = Neo4jManager(driver=self.driver)
+
+    def test_loads_nodes_and_all_connections_in_batches(self):
+        stats = self.neo4j.bulk_load(self.records, batch_size=100)
+        self.assertEqual(stats["nodes"], 360)
+        self.assertEqual(stats["edges"], 370)
+
+        queries = [query for query, _ in self.driver.statements]
+        self.assertTrue(queries[0].startswith("CREATE CONSTRAINT location_id"))
+        self.assertEqual(sum("MERGE (l:Location {id: row.id})" in q for q in queries), 4)
+        edge_queries = {q for q in queries if "MERGE (a)-[:" in q}
+        self.assertEqual(len(edge_queries), 3)
+
+        edges = sum(len(params["rows"]) for query, params in self.driver.statements if query in edge_queries)
+        self.assertEqual(edges, 370)
+
+    def test_rejects_unsafe_relationship_type(self):
+        with self.assertRaises(ValueError):
+            Neo4jManager.relationship_type("KNOWS]->(x) DETACH DELETE x //")
+
+    def test_scaled_dataset_keeps_connections_consistent(self):
+        scaled = TextProcessor.scale_dataset(self.records, 3)
+        ids = {record['id'] for record in scaled}
+        self.assertEqual(len(ids), 3 * len(self.records))
+        targets = {rel['target'] for rel in TextProcessor.extract_relationships(scaled)}
+        self.assertTrue(targets <= ids)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+from benchmarks.fakes import FakeOpenAI
+from src.models.embedding_engine import EmbeddingCache, EmbeddingEngine
+from src.utils.rate_limiter import (
+    LIMITS, AdaptiveConcurrency, RequestScheduler, TokenBucket, backoff_delay, is_retryable, retry_after, wait_for
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class RateLimitError(Exception):
+    """Shaped like openai.error.RateLimitError"""
+    def __init__(self, retry_after=None):
+        super().__init__("Rate limit reached")
+        self.http_status = 429
+        self.headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+
+class BadRequest(Exception):
+    http_status = 400
+
+class Flaky:
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.calls = 0
+
+    def __call__(self, value):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return value * 2
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_refill_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=2, clock=clock)
+        self.assertEqual(bucket.reserve(1), 0.0)
+        self.assertEqual(bucket.reserve(1), 0.0)
+        self.assertAlmostEqual(bucket.reserve(1), 1.0)
+        self.assertAlmostEqual(bucket.reserve(1), 2.0)
+        clock.now = 10.0
+        self.assertEqual(bucket.reserve(1), 0.0)
+
+    def test_zero_rate_disables_limit(self):
+        self.assertEqual(TokenBucket(0).reserve(10 ** 6), 0.0)
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    def test_additive_increase_multiplicative_decrease(self):
+        limiter = AdaptiveConcurrency(initial=4, maximum=8, target_latency=1.0)
+        limiter.on_success(0.1)
+        self.assertAlmostEqual(limiter.limit, 4.25)
+        limiter.on_overload()
+        self.assertAlmostEqual(limiter.limit, 2.125)
+        limiter.on_success(5.0)
+        self.assertAlmostEqual(limiter.limit, 1.0625)
+        for _ in range(5):
+            limiter.on_overload()
+        self.assertEqual(limiter.limit, 1.0)
+
+class TestRequestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.sleeps = []
+        self.scheduler = RequestScheduler("test", max_concurrency=8, max_retries=3,
+                                          base_delay=0.1, max_delay=1.0, sleep=self.sleeps.append)
+
+    def test_retries_rate_limits_honoring_retry_after(self):
+        fn = Flaky([RateLimitError(retry_after=7), RateLimitError()])
+        self.assertEqual(self.scheduler.call(fn, 21), 42)
+        self.assertEqual(fn.calls, 3)
+        self.assertEqual(self.sleeps[0], 7.0)
+        self.assertLessEqual(self.sleeps[1], 0.2)
+        stats = self.scheduler.stats()
+        self.assertEqual((stats["rate_limited"], stats["retries"], stats["calls"]), (2, 2, 1))
+        self.assertLess(stats["concurrency_limit"], 4)
+
+    def test_tokens_are_reserved_once_per_call(self):
+        scheduler = RequestScheduler("test", tokens_per_minute=1000, max_retries=3,
+                                     base_delay=0.1, sleep=self.sleeps.append)
+        scheduler.call(Flaky([RateLimitError(retry_after=0)] * 2), 1, tokens=400)
+        self.assertLessEqual(scheduler.tokens._tokens, 600)
+        self.assertGreater(scheduler.tokens._tokens, 590)
+
+    def test_clients_get_configured_latency_targets(self):
+        from src.utils.config import Config
+        self.assertEqual(LIMITS["chat"]()["target_latency"], Config.CHAT_TARGET_LATENCY or None)
+        self.assertIn("target_latency", LIMITS["embedding"]())
+        self.assertIn("target_latency", LIMITS["vector_index"]())
+
+    def test_non_retryable_errors_raise_immediately(self):
+        fn = Flaky([BadRequest("bad input")])
+        with self.assertRaises(BadRequest):
+            self.scheduler.call(fn, 1)
+        self.assertEqual(fn.calls, 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_gives_up_after_max_retries(self):
+        fn = Flaky([RateLimitError()] * 10)
+        with self.assertRaises(RateLimitError):
+            self.scheduler.call(fn, 1)
+        self.assertEqual(fn.calls, 4)
+
+    def test_bulk_embedding_survives_provider_limits(self):
+        client = FakeOpenAI(dimension=8, embedding_latency=0.01, max_concurrent_embeddings=2)
+        scheduler = RequestScheduler("embedding", max_concurrency=8, base_delay=0.01, max_retries=20)
+        engine = EmbeddingEngine(cache=EmbeddingCache(":memory:"), client=client, batch_size=5,
+                                 max_workers=8, batch_window=0, scheduler=scheduler)
+        vectors = engine.embed_texts([f"text {i}" for i in range(80)])
+        self.assertEqual(len(vectors), 80)
+        self.assertEqual(client.embedded_texts, 80)
+        self.assertGreater(client.rate_limited, 0)
+        self.assertEqual(scheduler.stats()["failures"], 0)
+        engine.close()
+
+class TestHelpers(unittest.TestCase):
+    def test_error_classification(self):
+        self.assertTrue(is_retryable(RateLimitError()))
+        self.assertFalse(is_retryable(BadRequest()))
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertEqual(retry_after(RateLimitError(retry_after=3)), 3.0)
+        self.assertIsNone(retry_after(ValueError()))
+
+    def test_backoff_is_bounded(self):
+        for attempt in range(10):
+            self.assertLessEqual(backoff_delay(attempt, base=0.5, maximum=4.0), 4.0)
+
+    def test_wait_for_polls_until_ready(self):
+        states = iter([False, False, True])
+        self.assertGreaterEqual(wait_for(lambda: next(states), timeout=5, initial=0.001), 0.0)
+        with self.assertRaises(TimeoutError):
+            wait_for(lambda: False, timeout=0.01, initial=0.005)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from src.utils.resources import ResourceRegistry
+
+class Connection:
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+
+class TestResourceRegistry(unittest.TestCase):
+    def setUp(self):
+        self.built = []
+        self.registry = ResourceRegistry(health_check_interval=0)
+        self.registry.register("db", self.build,
+                               health_check=lambda conn: conn.healthy,
+                               close=lambda conn: setattr(conn, "closed", True))
+        self.registry.register("service", lambda: ("service", self.registry.get("db")), depends_on=["db"])
+
+    def build(self):
+        connection = Connection()
+        self.built.append(connection)
+        return connection
+
+    def test_constructed_lazily_once(self):
+        self.assertEqual(self.built, [])
+        first = self.registry.get("db")
+        self.assertIs(self.registry.get("db", check=True), first)
+        self.assertEqual(len(self.built), 1)
+
+    def test_failed_health_check_reconnects_with_dependents(self):
+        service = self.registry.get("service")
+        old = self.registry.get("db")
+        old.healthy = False
+        new = self.registry.get("db", check=True)
+        self.assertIsNot(new, old)
+        self.assertTrue(old.closed)
+        self.assertIsNot(self.registry.get("service"), service)
+        self.assertIs(self.registry.get("service")[1], new)
+
+    def test_checked_get_probes_outside_the_registry_lock(self):
+        import threading
+        probing, release = threading.Event(), threading.Event()
+        self.registry.register("slow", Connection, health_check=lambda conn: probing.set() or release.wait(2))
+        self.registry.get("slow")
+        thread = threading.Thread(target=self.registry.get, args=("slow",), kwargs={"check": True})
+        thread.start()
+        probing.wait(2)
+        try:
+            other = threading.Thread(target=self.registry.get, args=("db",))
+            other.start()
+            other.join(0.5)
+            self.assertFalse(other.is_alive())
+        finally:
+            release.set()
+            thread.join()
+
+    def test_retriever_depends_only_on_its_graph_source(self):
+        from unittest import mock
+        from src.utils.config import Config
+        from src.utils.resources import register_defaults
+        for snapshot, expected, unexpected in ((True, "graph_snapshot", "neo4j"), (False, "neo4j", "graph_snapshot")):
+            with mock.patch.object(Config, "GRAPH_SNAPSHOT_ENABLED", snapshot), \
+                    mock.patch.object(Config, "RETRIEVAL_GRAPH_ENABLED", True):
+                registry = ResourceRegistry()
+                register_defaults(registry)
+            self.assertIn(expected, registry._dependencies["retriever"])
+            self.assertNotIn(unexpected, registry._dependencies["retriever"])
+
+    def test_data_version_is_read_once_until_reset(self):
+        from unittest import mock
+        from src.utils.resources import register_defaults
+        registry = ResourceRegistry()
+        register_defaults(registry)
+        with mock.patch("src.database.sync_manager.manifest_version", side_effect=["v1", "v2"]) as read:
+            self.assertEqual([registry.get("data_version") for _ in range(3)], ["v1"] * 3)
+            registry.reset("data_version")
+            self.assertEqual(registry.get("data_version"), "v2")
+        self.assertEqual(read.call_count, 2)
+
+    def test_shutdown_closes_everything(self):
+        connection = self.registry.get("db")
+        self.registry.shutdown()
+        self.assertTrue(connection.closed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from src.models.response_cache import SemanticResponseCache, context_fingerprint
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestSemanticResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = SemanticResponseCache(max_entries=2, ttl_seconds=60, threshold=0.95, clock=self.clock)
+        self.context = context_fingerprint([{"location": {"id": "city_hanoi"}, "neighbors": []}], [{"id": "city_hanoi"}])
+
+    def test_similar_query_same_context_hits(self):
+        self.cache.store([1.0, 0.0, 0.0], self.context, "Spring.", generation_seconds=2.0)
+        self.assertEqual(self.cache.lookup([0.99, 0.05, 0.0], self.context), "Spring.")
+        self.assertIsNone(self.cache.lookup([0.0, 1.0, 0.0], self.context))
+        self.assertIsNone(self.cache.lookup([1.0, 0.0, 0.0], "other-context"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual(stats["saved_seconds"], 2.0)
+
+    def test_ttl_expiry(self):
+        self.cache.store([1.0, 0.0], self.context, "Spring.")
+        self.clock.now = 61
+        self.assertIsNone(self.cache.lookup([1.0, 0.0], self.context))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_lru_eviction(self):
+        self.cache.store([1.0, 0.0], "a", "A")
+        self.cache.store([1.0, 0.0], "b", "B")
+        self.cache.lookup([1.0, 0.0], "a")
+        self.cache.store([1.0, 0.0], "c", "C")
+        self.assertIsNone(self.cache.lookup([1.0, 0.0], "b"))
+        self.assertEqual(self.cache.lookup([1.0, 0.0], "a"), "A")
+
+    def test_queries_without_embedding_match_on_normalised_text(self):
+        self.cache.store(None, self.context, "Spring.", query="Best time to visit Hanoi?")
+        self.assertEqual(self.cache.lookup(None, self.context, query="best time to visit  hanoi"), "Spring.")
+        self.assertIsNone(self.cache.lookup(None, self.context, query="Best hotels in Hanoi?"))
+        self.assertIsNone(self.cache.lookup(None, "other-context", query="Best time to visit Hanoi?"))
+        # An embedded lookup for the same text also hits the text-keyed entry
+        self.assertEqual(self.cache.lookup([1.0, 0.0], self.context, query="Best time to visit Hanoi?"), "Spring.")
+
+    def test_history_is_part_of_the_key(self):
+        graph, vectors = [{"location": {"id": "city_hanoi"}, "neighbors": []}], [{"id": "city_hanoi"}]
+        first = [{"role": "user", "content": "Tell me about Hanoi"}, {"role": "assistant", "content": "Hanoi is..."}]
+        later = first + [{"role": "user", "content": "tell me more"}, {"role": "assistant", "content": "Also..."}]
+        self.assertNotEqual(context_fingerprint(graph, vectors, first), context_fingerprint(graph, vectors, later))
+        self.assertNotEqual(context_fingerprint(graph, vectors), context_fingerprint(graph, vectors, first))
+        self.assertEqual(context_fingerprint(graph, vectors, first), context_fingerprint(graph, vectors, list(first)))
+
+    def test_resync_invalidates(self):
+        self.cache.ensure_version("v1")
+        self.cache.store([1.0, 0.0], self.context, "Spring.")
+        self.cache.ensure_version("v2")
+        self.assertIsNone(self.cache.lookup([1.0, 0.0], self.context))
+
+if __name__ == '__main__':
+    unittest.main()
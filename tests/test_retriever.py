@@ -0,0 +1,78 @@
+import time
+import unittest
+from src.models.retriever import HybridRetriever
+
+class SlowVectorStore:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def get_embedding(self, text):
+        time.sleep(self.delay)
+        return [1.0, 0.0]
+
+    def search(self, vector, top_k):
+        time.sleep(self.delay)
+        return [{"id": "city_hanoi", "score": 0.9}]
+
+class SlowGraph:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def query_neighborhood(self, ids):
+        time.sleep(self.delay)
+        return [{"location": {"id": ids[0]}, "neighbors": []}]
+
+class StaticMatcher:
+    def find_ids(self, text):
+        return ["city_hanoi"]
+
+class TestHybridRetriever(unittest.TestCase):
+    def test_sources_run_concurrently(self):
+        retriever = HybridRetriever(SlowGraph(0.2), SlowVectorStore(0.1), StaticMatcher())
+        start = time.perf_counter()
+        context = retriever.retrieve("Hanoi")
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.35)
+        self.assertEqual(context["vectors"][0]["id"], "city_hanoi")
+        self.assertEqual(context["graph"][0]["location"]["id"], "city_hanoi")
+        self.assertEqual(context["query_embedding"], [1.0, 0.0])
+        self.assertIn("graph_query", retriever.latency_summary())
+        retriever.close()
+
+    def test_slow_source_is_dropped_after_timeout(self):
+        retriever = HybridRetriever(SlowGraph(1.0), SlowVectorStore(0.01), StaticMatcher(), graph_timeout=0.1)
+        start = time.perf_counter()
+        context = retriever.retrieve("Hanoi")
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(context["timed_out"], ["graph"])
+        self.assertIsNone(context["graph"])
+        self.assertIsNotNone(context["vectors"])
+        retriever.close()
+
+    def test_graph_source_is_optional(self):
+        retriever = HybridRetriever(None, SlowVectorStore(0.01), StaticMatcher())
+        context = retriever.retrieve("Hanoi")
+        self.assertIsNone(context["graph"])
+        self.assertEqual(context["vectors"][0]["id"], "city_hanoi")
+        self.assertNotIn("graph_query", context["timings"])
+        retriever.close()
+
+    def test_shared_executor_outlives_a_closed_retriever(self):
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=2)
+        stale = HybridRetriever(SlowGraph(0.01), SlowVectorStore(0.01), StaticMatcher(), executor=pool)
+        # A registry reset closes the retriever while a session still holds it
+        stale.close()
+        self.assertEqual(stale.retrieve("Hanoi")["vectors"][0]["id"], "city_hanoi")
+        pool.shutdown()
+
+    def test_graph_lookup_can_be_skipped(self):
+        retriever = HybridRetriever(SlowGraph(0.01), SlowVectorStore(0.01), StaticMatcher())
+        context = retriever.retrieve("Hanoi", graph=False)
+        self.assertIsNone(context["graph"])
+        self.assertEqual(context["vectors"][0]["id"], "city_hanoi")
+        self.assertNotIn("entity_linking", context["timings"])
+        retriever.close()
+
+if __name__ == '__main__':
+    unittest.main()
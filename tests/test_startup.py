@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from src.utils import startup
+from src.utils.resources import ResourceRegistry
+from src.utils.startup import BackgroundBoot, StartupTimer, run_checks
+
+class TestRunChecks(unittest.TestCase):
+    def test_checks_run_concurrently(self):
+        checks = {name: (lambda: time.sleep(0.2)) for name in ("neo4j", "vector_store", "llm")}
+        start = time.perf_counter()
+        results = run_checks(checks, deadline=2)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(set(results.values()), {"ok"})
+
+    def test_failures_and_timeouts_are_reported(self):
+        release = threading.Event()
+
+        def broken():
+            raise ConnectionError("refused")
+
+        results = run_checks({"ok": lambda: None, "broken": broken, "slow": release.wait}, deadline=0.1)
+        release.set()
+        self.assertEqual(results["ok"], "ok")
+        self.assertEqual(results["broken"], "failed: refused")
+        self.assertEqual(results["slow"], "timeout")
+
+class TestBackgroundBoot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.report = os.path.join(self.tmp.name, "startup.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sync_runs_after_checks_and_report_is_written(self):
+        timer = StartupTimer(path=self.report)
+        order = []
+        boot = BackgroundBoot({"neo4j": lambda: order.append("check")},
+                              sync=lambda: order.append("sync") or {"upserted": 0},
+                              deadline=1, timer=timer).start()
+        self.assertTrue(boot.wait(2))
+        self.assertEqual(order, ["check", "sync"])
+        self.assertEqual(boot.state, "ready")
+        self.assertIsNone(boot.status())
+        with open(self.report) as f:
+            report = json.load(f)
+        self.assertIn("readiness", report["phases"])
+        self.assertIn("check:neo4j", report["phases"])
+        self.assertIn("boot_complete", report["marks"])
+
+    def test_failed_check_degrades_but_still_syncs(self):
+        def broken():
+            raise ConnectionError("down")
+
+        timer = StartupTimer(path=None)
+        synced = []
+        boot = BackgroundBoot({"neo4j": broken}, sync=lambda: synced.append(True),
+                              deadline=1, timer=timer).start()
+        boot.wait(2)
+        self.assertEqual(synced, [True])
+        self.assertEqual(boot.state, "degraded")
+        self.assertIn("neo4j", boot.status())
+
+    def test_start_once_reuses_the_running_boot(self):
+        previous, startup._boot = startup._boot, None
+        try:
+            created = []
+
+            def factory():
+                created.append(BackgroundBoot({}, timer=StartupTimer(path=None)))
+                return created[-1]
+
+            first = startup.start_once(factory)
+            second = startup.start_once(factory)
+            self.assertIs(first, second)
+            self.assertEqual(len(created), 1)
+            first.wait(2)
+        finally:
+            startup._boot = previous
+
+class TestConcurrentConstruction(unittest.TestCase):
+    def test_independent_resources_build_in_parallel(self):
+        registry = ResourceRegistry()
+        registry.register("a", lambda: time.sleep(0.2) or "a")
+        registry.register("b", lambda: time.sleep(0.2) or "b")
+        start = time.perf_counter()
+        results = run_checks({"a": lambda: registry.get("a"), "b": lambda: registry.get("b")}, deadline=2)
+        self.assertLess(time.perf_counter() - start, 0.35)
+        self.assertEqual(set(results.values()), {"ok"})
+
+    def test_concurrent_callers_share_one_instance(self):
+        registry = ResourceRegistry()
+        built = []
+        registry.register("a", lambda: built.append(1) or time.sleep(0.1) or object())
+        threads = [threading.Thread(target=registry.get, args=("a",)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(built), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import copy
+import os
+import tempfile
+import unittest
+from src.database.sync_manager import DatasetSync
+from src.utils.text_processor import TextProcessor
+
+class RecordingStore:
+    """Records the calls DatasetSync makes against a store"""
+    def __init__(self):
+        self.upserted = []
+        self.deleted = []
+
+    def upsert_locations(self, locations):
+        self.upserted.extend(location['id'] for location in locations)
+
+    def upsert_texts(self, texts):
+        self.upserted.extend(text['id'] for text in texts)
+
+    def delete_locations(self, ids):
+        self.deleted.extend(ids)
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+
+class TestDatasetSync(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.manifest = os.path.join(self.tmpdir.name, "manifest.json")
+        self.records = TextProcessor.parse_location_data('data/vietnam_travel_dataset.json')[:20]
+        self.graph = RecordingStore()
+        self.vectors = RecordingStore()
+        self.sync = DatasetSync(self.graph, self.vectors, manifest_path=self.manifest)
+
+    def test_unchanged_dataset_is_a_no_op(self):
+        first = self.sync.sync(self.records)
+        self.assertEqual(first["upserted"], 20)
+        self.graph.upserted.clear()
+        self.vectors.upserted.clear()
+
+        second = self.sync.sync(self.records)
+        self.assertEqual(second["upserted"], 0)
+        self.assertEqual(second["deleted"], 0)
+        self.assertEqual(self.graph.upserted, [])
+        self.assertEqual(first["version"], second["version"])
+
+    def test_only_changed_and_removed_records_are_touched(self):
+        self.sync.sync(self.records)
+        self.graph.upserted.clear()
+        self.vectors.upserted.clear()
+
+        records = copy.deepcopy(self.records[1:])
+        records[0]['description'] = "Updated description"
+        summary = self.sync.sync(records)
+
+        self.assertEqual(summary["upserted"], 1)
+        self.assertEqual(self.graph.upserted, [records[0]['id']])
+        self.assertEqual(self.graph.deleted, [self.records[0]['id']])
+        self.assertEqual(self.vectors.deleted, [self.records[0]['id']])
+        # Only documents whose content changed are rewritten, including neighbours that mentioned the removed record
+        self.assertIn(records[0]['id'], self.vectors.upserted)
+        self.assertEqual(sorted(self.vectors.upserted), sorted(self.changed_documents(self.records, records)))
+        self.assertLess(len(self.vectors.upserted), len(records))
+
+    @staticmethod
+    def changed_documents(before, after):
+        previous = {document['id']: document for document in DatasetSync.documents(before)}
+        return [document['id'] for document in DatasetSync.documents(after) if previous.get(document['id']) != document]
+
+    def test_full_sync_still_deletes_removed_records(self):
+        self.sync.sync(self.records)
+        summary = self.sync.sync(self.records[1:], full=True)
+        self.assertEqual(summary["upserted"], 19)
+        self.assertEqual(summary["deleted"], 1)
+        self.assertEqual(self.graph.deleted, [self.records[0]['id']])
+        self.assertEqual(self.vectors.deleted, [self.records[0]['id']])
+
+    def test_schema_change_still_deletes_removed_records(self):
+        from unittest import mock
+        self.sync.sync(self.records)
+        with mock.patch("src.database.sync_manager.DOCUMENT_SCHEMA", 999):
+            summary = self.sync.sync(self.records[1:])
+        self.assertEqual(summary["upserted"], 19)
+        self.assertEqual(self.graph.deleted, [self.records[0]['id']])
+
+    def test_change_rewrites_exactly_the_documents_it_alters(self):
+        records = TextProcessor.parse_location_data('data/vietnam_travel_dataset.json')
+        self.sync.sync(records)
+        self.vectors.upserted.clear()
+
+        renamed = copy.deepcopy(records)
+        hotel = next(record for record in renamed if record['id'] == 'hotel_16')
+        hotel['name'] = "Hanoi Grand Hotel"
+        summary = self.sync.sync(renamed)
+
+        self.assertEqual(self.graph.upserted[-1:], ['hotel_16'])
+        self.assertIn('hotel_16', self.vectors.upserted)
+        self.assertIn('city_hanoi', self.vectors.upserted)
+        self.assertEqual(sorted(self.vectors.upserted), sorted(self.changed_documents(records, renamed)))
+        self.assertEqual(summary["documents_written"], len(self.vectors.upserted))
+
+    def test_moving_a_place_rewrites_its_previous_city(self):
+        records = TextProcessor.parse_location_data('data/vietnam_travel_dataset.json')
+        self.sync.sync(records)
+        self.vectors.upserted.clear()
+
+        moved = copy.deepcopy(records)
+        hotel = next(record for record in moved if record['id'] == 'hotel_16')
+        hotel['city'] = "Ha Long Bay"
+        hotel['connections'] = [{"relation": "Located_In", "target": "city_ha_long"}]
+        self.sync.sync(moved)
+
+        self.assertIn('city_hanoi', self.vectors.upserted)
+        self.assertIn('city_ha_long', self.vectors.upserted)
+        documents = {document['id']: document for document in DatasetSync.documents(moved)}
+        self.assertNotIn("Hanoi Hotel 16", documents['city_hanoi']['content'])
+        self.assertEqual(sorted(self.vectors.upserted), sorted(self.changed_documents(records, moved)))
+
+    def test_documents_carry_neighbourhood_summary(self):
+        records = TextProcessor.parse_location_data('data/vietnam_travel_dataset.json')
+        documents = {document['id']: document for document in DatasetSync.documents(records)}
+        hotel = documents['hotel_16']
+        self.assertIn("In Hanoi (Northern Vietnam)", hotel['content'])
+        self.assertIn("Attractions nearby:", hotel['content'])
+        self.assertEqual(hotel['region'], "Northern Vietnam")
+        self.assertNotIn("Hanoi Hotel 16", hotel['nearby'])
+        self.assertEqual(documents['city_hanoi']['connected_cities'], ["Hue", "Nha Trang"])
+        self.assertIn("nearby", TextProcessor.document_metadata(hotel))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import threading
+import unittest
+import numpy as np
+from src.database.local_vector_manager import LocalVectorManager
+from src.database.pinecone_manager import PineconeManager
+from src.database.vector_snapshot import VectorSnapshot
+from src.models.embedding_engine import EmbeddingCache, EmbeddingEngine
+from src.utils.rate_limiter import RequestScheduler
+
+DOCUMENTS = [
+    {"id": "city_hanoi", "name": "Hanoi", "type": "City", "content": "Hanoi: capital city", "tags": ["food"]},
+    {"id": "city_hue", "name": "Hue", "type": "City", "content": "Hue: imperial citadel", "tags": ["history"]},
+    {"id": "hotel_16", "name": "Hanoi Hotel 16", "type": "Hotel", "city": "Hanoi", "content": "Hanoi Hotel 16"},
+]
+
+class CountingEmbeddings:
+    """Stands in for the openai module's Embedding API"""
+    def __init__(self, dimension=8):
+        self.dimension = dimension
+        self.calls = 0
+        self.Embedding = self
+
+    def create(self, input, model):
+        self.calls += 1
+        return {"data": [
+            {"index": i, "embedding": [float(len(text) % (j + 2)) + j for j in range(self.dimension)]}
+            for i, text in enumerate(input)
+        ]}
+
+class RecordingIndex:
+    def __init__(self):
+        self.batches = []
+        self.cleared = 0
+        self._lock = threading.Lock()
+
+    def delete(self, delete_all=False):
+        self.cleared += delete_all
+
+    def upsert(self, vectors):
+        with self._lock:
+            self.batches.append(vectors)
+
+def engine(client):
+    return EmbeddingEngine(cache=EmbeddingCache(":memory:"), client=client, batch_window=0)
+
+class TestVectorSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "vectors.npz")
+        self.manifest = os.path.join(self.tmpdir.name, "sync_manifest.json")
+        self.snapshot = VectorSnapshot.from_documents(DOCUMENTS, engine(CountingEmbeddings()), version="v1")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_save_and_load_round_trip(self):
+        self.snapshot.save(self.path)
+        loaded = VectorSnapshot.load(self.path)
+        self.assertEqual(loaded.ids, ["city_hanoi", "city_hue", "hotel_16"])
+        np.testing.assert_array_equal(loaded.vectors, self.snapshot.vectors)
+        self.assertEqual(loaded.metadata[2]["city"], "Hanoi")
+        self.assertEqual(loaded.hashes, self.snapshot.hashes)
+        self.assertEqual((loaded.version, loaded.dimension), ("v1", 8))
+
+    def test_restore_into_local_index_without_embedding_calls(self):
+        client = CountingEmbeddings()
+        embedder = engine(client)
+        index = LocalVectorManager(index_path=self.tmpdir.name, dimension=8, embedder=embedder)
+        summary = VectorSnapshot.load(self._saved()).restore(index, manifest_path=self.manifest)
+        self.assertEqual((summary["vectors"], summary["cache_seeded"]), (3, 3))
+        self.assertEqual(index.search(self.snapshot.vectors[1], top_k=1)[0]["id"], "city_hue")
+        self.assertEqual(index.search(self.snapshot.vectors[0], top_k=3, filter={"type": "Hotel"})[0]["id"], "hotel_16")
+        # The seeded cache means a later sync re-embeds nothing
+        index.upsert_texts(DOCUMENTS)
+        self.assertEqual(client.calls, 0)
+
+    def test_restore_into_pinecone_in_parallel_batches(self):
+        index = RecordingIndex()
+        manager = PineconeManager(embedder=engine(CountingEmbeddings()), index=index,
+                                  scheduler=RequestScheduler("test", max_concurrency=4))
+        summary = self.snapshot.restore(manager, batch_size=2, manifest_path=self.manifest)
+        self.assertEqual(summary["batches"], 2)
+        self.assertEqual(index.cleared, 1)
+        restored = sorted(vector for batch in index.batches for vector in batch)
+        self.assertEqual([vector_id for vector_id, _, _ in restored], ["city_hanoi", "city_hue", "hotel_16"])
+        self.assertIsInstance(restored[0][1], list)
+
+    def test_restore_replaces_existing_vectors_unless_merging(self):
+        index = LocalVectorManager(index_path=self.tmpdir.name, dimension=8, embedder=engine(CountingEmbeddings()))
+        index.upsert_vectors(["stale"], [np.ones(8)], [{"type": "City"}])
+        self.snapshot.restore(index, replace=False, manifest_path=self.manifest)
+        self.assertIn("stale", index.ids)
+        self.snapshot.restore(index, manifest_path=self.manifest)
+        self.assertEqual(index.ids, ["city_hanoi", "city_hue", "hotel_16"])
+        self.assertEqual(len(index.vectors), 3)
+
+    def test_version_mismatch_makes_the_next_sync_rewrite_documents(self):
+        import json
+        manifest = {"version": "v0", "records": {"city_hue": "abc"}, "documents": {"city_hue": "def"}}
+        with open(self.manifest, 'w') as f:
+            json.dump(manifest, f)
+        index = LocalVectorManager(index_path=self.tmpdir.name, dimension=8, embedder=engine(CountingEmbeddings()))
+        summary = self.snapshot.restore(index, manifest_path=self.manifest)
+        self.assertTrue(summary["version_mismatch"])
+        with open(self.manifest) as f:
+            restored = json.load(f)
+        self.assertEqual(restored["documents"], {})
+        self.assertEqual(restored["records"], manifest["records"])
+
+        manifest["version"] = "v1"
+        with open(self.manifest, 'w') as f:
+            json.dump(manifest, f)
+        self.assertFalse(self.snapshot.restore(index, manifest_path=self.manifest)["version_mismatch"])
+
+    def test_dimension_mismatch_is_rejected(self):
+        index = LocalVectorManager(index_path=self.tmpdir.name, dimension=16, embedder=engine(CountingEmbeddings()))
+        with self.assertRaises(ValueError):
+            self.snapshot.restore(index, manifest_path=self.manifest)
+
+    def _saved(self):
+        self.snapshot.save(self.path)
+        return self.path
+
+if __name__ == '__main__':
+    unittest.main()